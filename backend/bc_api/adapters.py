@@ -27,8 +27,8 @@ class BerkeleyEmailAdapter(DefaultSocialAccountAdapter):
         # For existing users, check whitelist and update user_type if needed
         if sociallogin.is_existing:
             user = sociallogin.user
-            from .models import BCMemberWhitelist
-            if user.user_type != 'bc_member' and BCMemberWhitelist.objects.filter(email__iexact=email).exists():
+            from . import whitelist
+            if user.user_type != 'bc_member' and whitelist.is_whitelisted(email, check_database=True):
                 user.user_type = 'bc_member'
                 user.save()
 
@@ -45,8 +45,8 @@ class BerkeleyEmailAdapter(DefaultSocialAccountAdapter):
         user.photo_url = extra_data.get('picture', '')
 
         # Check if user is on BC member whitelist
-        from .models import BCMemberWhitelist
-        if BCMemberWhitelist.objects.filter(email__iexact=user.email).exists():
+        from . import whitelist
+        if whitelist.is_whitelisted(user.email, check_database=True):
             user.user_type = 'bc_member'
 
         user.save()
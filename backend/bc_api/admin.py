@@ -1,9 +1,16 @@
+from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.exceptions import PermissionDenied
+from django.db.models import Exists, OuterRef, Subquery
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils import timezone
 from django.utils.html import format_html
-from .models import User, BCMemberProfile, BCApplicantProfile, BCMatch, BCMessage, BCSwipe, BCMemberWhitelist
+from .models import User, BCMemberProfile, BCApplicantProfile, BCMatch, BCMessage, BCSwipe, BCMemberWhitelist, BCOutboxEmail
 from .emails import send_match_confirmed_notification
+from .pagination import EstimatedCountPaginator
+from . import approvals, caching, deck, imports, realtime, stats
 
 
 @admin.register(User)
@@ -32,6 +39,7 @@ class BCMemberProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'year', 'major', 'semesters_in_bc', 'availability', 'approval_status', 'created_at')
     list_filter = ('is_approved', 'year', 'semesters_in_bc')
     search_fields = ('user__email', 'user__name', 'major')
+    list_select_related = ('user',)
     readonly_fields = ('created_at', 'updated_at', 'approved_by', 'approved_at')
     actions = ['approve_members', 'revoke_approval']
 
@@ -53,29 +61,29 @@ class BCMemberProfileAdmin(admin.ModelAdmin):
             return format_html('<span style="color: green; font-weight: bold;">✓ Approved</span>')
         return format_html('<span style="color: orange; font-weight: bold;">⏳ Pending</span>')
     approval_status.short_description = 'Status'
+    approval_status.admin_order_field = 'is_approved'
 
     @admin.action(description='Approve selected BC members')
     def approve_members(self, request, queryset):
-        count = 0
-        for member in queryset.filter(is_approved=False):
-            member.is_approved = True
-            member.approved_by = request.user
-            member.approved_at = timezone.now()
-            # Also update the user record
-            member.user.user_type = 'bc_member'
-            member.user.has_completed_setup = True
-            member.user.save()
-            member.save()
-            count += 1
-        self.message_user(request, f'{count} BC member(s) approved successfully.')
+        approved = approvals.approve_members(queryset.values_list('id', flat=True), request.user)
+        self.message_user(request, f'{len(approved)} BC member(s) approved successfully.')
 
     @admin.action(description='Revoke approval for selected BC members')
     def revoke_approval(self, request, queryset):
+        revoked = list(queryset.filter(is_approved=True).values_list('user_id', 'created_at'))
+        deck.remove_candidates([user_id for user_id, _ in revoked])
+        stats.record(
+            change
+            for _, created_at in revoked
+            for change in [(stats.member_metrics(True), created_at, -1), (stats.member_metrics(False), created_at, 1)]
+        )
         count = queryset.filter(is_approved=True).update(
             is_approved=False,
             approved_by=None,
             approved_at=None
         )
+        # update() skips the signals that expire cached logins
+        caching.invalidate_auth(*(user_id for user_id, _ in revoked))
         self.message_user(request, f'{count} BC member(s) approval revoked.')
 
     def save_model(self, request, obj, form, change):
@@ -88,6 +96,11 @@ class BCMemberProfileAdmin(admin.ModelAdmin):
             obj.user.has_completed_setup = True
             obj.user.save()
         super().save_model(request, obj, form, change)
+        if 'is_approved' in form.changed_data:
+            if obj.is_approved:
+                deck.profile_became_discoverable(obj)
+            else:
+                deck.remove_candidate(obj.user_id)
 
 
 @admin.register(BCApplicantProfile)
@@ -95,19 +108,27 @@ class BCApplicantProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'role', 'has_been_matched', 'match_status', 'created_at')
     list_filter = ('role', 'has_been_matched')
     search_fields = ('user__email', 'user__name')
+    list_select_related = ('user',)
     readonly_fields = ('created_at', 'updated_at', 'has_been_matched')
 
+    def get_queryset(self, request):
+        # The applicant's latest match, as columns of the changelist query
+        latest_match = BCMatch.objects.filter(applicant=OuterRef('pk')).order_by('-matched_at')
+        return super().get_queryset(request).annotate(
+            latest_match_status=Subquery(latest_match.values('status')[:1]),
+            latest_match_member_name=Subquery(latest_match.values('bc_member__user__name')[:1]),
+        )
+
     def match_status(self, obj):
         if obj.has_been_matched:
-            match = BCMatch.objects.filter(applicant=obj).first()
-            if match:
-                if match.status == 'confirmed':
-                    return format_html('<span style="color: green;">✓ Matched with {}</span>', match.bc_member.user.name)
-                elif match.status == 'pending':
-                    return format_html('<span style="color: orange;">⏳ Pending confirmation</span>')
+            if obj.latest_match_status == 'confirmed':
+                return format_html('<span style="color: green;">✓ Matched with {}</span>', obj.latest_match_member_name)
+            elif obj.latest_match_status == 'pending':
+                return format_html('<span style="color: orange;">⏳ Pending confirmation</span>')
             return format_html('<span style="color: blue;">Matched</span>')
         return format_html('<span style="color: gray;">Not matched</span>')
     match_status.short_description = 'Match Status'
+    match_status.admin_order_field = 'has_been_matched'
 
 
 @admin.register(BCMatch)
@@ -115,6 +136,7 @@ class BCMatchAdmin(admin.ModelAdmin):
     list_display = ('id', 'applicant_name', 'bc_member_name', 'status_badge', 'matched_at', 'confirmed_at')
     list_filter = ('status', 'matched_at')
     search_fields = ('applicant__user__name', 'bc_member__user__name', 'applicant__user__email', 'bc_member__user__email')
+    list_select_related = ('applicant__user', 'bc_member__user')
     readonly_fields = ('matched_at', 'confirmed_by', 'confirmed_at')
     actions = ['confirm_matches', 'reject_matches', 'mark_completed']
 
@@ -128,10 +150,12 @@ class BCMatchAdmin(admin.ModelAdmin):
     def applicant_name(self, obj):
         return f"{obj.applicant.user.name} ({obj.applicant.user.email})"
     applicant_name.short_description = 'Applicant'
+    applicant_name.admin_order_field = 'applicant__user__name'
 
     def bc_member_name(self, obj):
         return f"{obj.bc_member.user.name} ({obj.bc_member.user.email})"
     bc_member_name.short_description = 'BC Member'
+    bc_member_name.admin_order_field = 'bc_member__user__name'
 
     def status_badge(self, obj):
         colors = {
@@ -153,38 +177,22 @@ class BCMatchAdmin(admin.ModelAdmin):
             color, icon, obj.get_status_display()
         )
     status_badge.short_description = 'Status'
+    status_badge.admin_order_field = 'status'
 
     @admin.action(description='Confirm selected matches')
     def confirm_matches(self, request, queryset):
-        count = 0
-        for match in queryset.filter(status='pending'):
-            match.status = 'confirmed'
-            match.confirmed_by = request.user
-            match.confirmed_at = timezone.now()
-            # Mark applicant as matched
-            match.applicant.has_been_matched = True
-            match.applicant.save()
-            match.save()
-            # Send confirmation email
-            send_match_confirmed_notification(match)
-            count += 1
-        self.message_user(request, f'{count} match(es) confirmed successfully.')
+        confirmed = approvals.update_matches(queryset.values_list('id', flat=True), 'confirm', request.user)
+        self.message_user(request, f'{len(confirmed)} match(es) confirmed successfully.')
 
     @admin.action(description='Reject selected matches')
     def reject_matches(self, request, queryset):
-        count = 0
-        for match in queryset.filter(status='pending'):
-            match.status = 'rejected'
-            match.confirmed_by = request.user
-            match.confirmed_at = timezone.now()
-            match.save()
-            count += 1
-        self.message_user(request, f'{count} match(es) rejected.')
+        rejected = approvals.update_matches(queryset.values_list('id', flat=True), 'reject', request.user)
+        self.message_user(request, f'{len(rejected)} match(es) rejected.')
 
     @admin.action(description='Mark selected matches as completed')
     def mark_completed(self, request, queryset):
-        count = queryset.filter(status='confirmed').update(status='completed')
-        self.message_user(request, f'{count} match(es) marked as completed.')
+        completed = approvals.update_matches(queryset.values_list('id', flat=True), 'complete', request.user)
+        self.message_user(request, f'{len(completed)} match(es) marked as completed.')
 
     def save_model(self, request, obj, form, change):
         # Track who confirmed the match
@@ -195,16 +203,25 @@ class BCMatchAdmin(admin.ModelAdmin):
                 if obj.status == 'confirmed':
                     obj.applicant.has_been_matched = True
                     obj.applicant.save()
-                    # Send confirmation email
+                    deck.profile_left_discovery(obj.applicant.user_id)
+                    # Queue confirmation emails
                     send_match_confirmed_notification(obj)
         super().save_model(request, obj, form, change)
+        if change and 'status' in form.changed_data:
+            realtime.publish_match_status(obj)
 
 
 @admin.register(BCMessage)
 class BCMessageAdmin(admin.ModelAdmin):
-    list_display = ('match', 'sender', 'content_preview', 'sent_at', 'is_read')
-    list_filter = ('is_read', 'sent_at')
+    list_display = ('match', 'sender', 'content_preview', 'sent_at')
+    list_filter = ('sent_at',)
     search_fields = ('sender__name', 'content')
+    # Millions of rows: no COUNT(*) per page and no <select> of every match/user
+    list_select_related = ('sender', 'match__applicant__user', 'match__bc_member__user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ('match',)
+    autocomplete_fields = ('sender',)
 
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
@@ -216,6 +233,17 @@ class BCSwipeAdmin(admin.ModelAdmin):
     list_display = ('swiper', 'target', 'direction', 'created_at')
     list_filter = ('direction', 'created_at')
     search_fields = ('swiper__name', 'target__name')
+    list_select_related = ('swiper', 'target')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    autocomplete_fields = ('swiper', 'target')
+
+
+class RosterImportForm(forms.Form):
+    file = forms.FileField(help_text='CSV with a header row, or JSON Lines (.jsonl).')
+    kind = forms.ChoiceField(
+        choices=[('members', 'Members (whitelist + approved profile)'), ('whitelist', 'Whitelist entries only')],
+    )
 
 
 @admin.register(BCMemberWhitelist)
@@ -223,6 +251,7 @@ class BCMemberWhitelistAdmin(admin.ModelAdmin):
     list_display = ('email', 'name', 'added_by', 'added_at', 'is_registered')
     list_filter = ('added_at',)
     search_fields = ('email', 'name')
+    list_select_related = ('added_by',)
     readonly_fields = ('added_by', 'added_at')
     ordering = ('-added_at',)
 
@@ -232,17 +261,67 @@ class BCMemberWhitelistAdmin(admin.ModelAdmin):
         ('Metadata', {'fields': ('added_by', 'added_at'), 'classes': ('collapse',)}),
     )
 
+    def get_queryset(self, request):
+        users = User.objects.filter(email=OuterRef('email'))
+        return super().get_queryset(request).annotate(
+            has_user=Exists(users),
+            has_profile=Exists(users.filter(bc_member_profile__isnull=False)),
+        )
+
     def is_registered(self, obj):
         """Check if this whitelisted email has registered."""
-        user = User.objects.filter(email=obj.email).first()
-        if user:
-            if hasattr(user, 'bc_member_profile'):
-                return format_html('<span style="color: green;">✓ Profile Complete</span>')
+        if obj.has_profile:
+            return format_html('<span style="color: green;">✓ Profile Complete</span>')
+        if obj.has_user:
             return format_html('<span style="color: orange;">⏳ Logged in, no profile</span>')
         return format_html('<span style="color: gray;">Not registered yet</span>')
     is_registered.short_description = 'Registration Status'
+    is_registered.admin_order_field = 'has_profile'
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='bc_api_bcmemberwhitelist_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """Upload a roster; see ``bc_api.imports`` for the file format."""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = RosterImportForm(request.POST or None, request.FILES or None)
+        counts, errors = {}, []
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                for entry in imports.run_import(upload, imports.format_for(upload.name), form.cleaned_data['kind'], request.user):
+                    counts[entry['status']] = counts.get(entry['status'], 0) + 1
+                    if entry['status'] == 'error':
+                        errors.append(entry)
+            except imports.ImportFormatError as exc:
+                form.add_error('file', str(exc))
+        return TemplateResponse(request, 'admin/bc_api/bcmemberwhitelist/import.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import roster',
+            'form': form,
+            'counts': sorted(counts.items()),
+            'errors': errors,
+        })
 
     def save_model(self, request, obj, form, change):
         if not change:  # New entry
             obj.added_by = request.user
         super().save_model(request, obj, form, change)
+
+
+@admin.register(BCOutboxEmail)
+class BCOutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'attempts', 'last_error')
+    actions = ['retry_now']
+
+    @admin.action(description='Retry selected emails now')
+    def retry_now(self, request, queryset):
+        count = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f'{count} email(s) queued for another attempt.')
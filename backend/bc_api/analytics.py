@@ -0,0 +1,281 @@
+"""
+Recruiting funnel analytics from incremental rollups.
+
+``rollup()`` (run by ``manage.py rollup_analytics``) folds events that
+arrived since its last run into ``BCFunnelRollup`` rows, one per hour and
+per day, and the admin analytics endpoint reads only those rows. Dashboard
+cost therefore grows with the number of days shown, not with the number of
+swipes or messages.
+
+Metrics (segments in brackets):
+
+* ``swipes`` / ``likes`` [``applicant:<role>`` or ``bc_member:<year>`` of the
+  swiper], bucketed by swipe time;
+* ``matches`` [``applicant:<role>``]: mutual likes, by match time;
+* ``confirmations``: matches an admin confirmed, by confirmation time, with
+  the match-to-confirmation latency;
+* ``first_messages``: first message of a confirmed match, by send time, with
+  the confirmation-to-first-message latency.
+
+Each source keeps a high-water mark in ``BCRollupWatermark``: the last id
+rolled up for append-only tables, the last timestamp for confirmations. A
+run only looks at rows older than ``BC_ROLLUP_LAG`` seconds so transactions
+still in flight can't commit behind the mark. The aggregation, the upsert
+and the new mark share one transaction, so every event is counted once even
+if runs overlap or fail.
+"""
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, DurationField, Exists, ExpressionWrapper, F, OuterRef, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import BCFunnelRollup, BCMatch, BCMessage, BCRollupWatermark, BCSwipe
+
+BATCH_SIZE = 50000
+
+MAX_DAYS = 365
+MAX_HOURS = 24 * 14
+
+
+def _segment(side, value):
+    return f'{side}:{value}' if value else ''
+
+
+def _duration(end, start):
+    return Sum(ExpressionWrapper(F(end) - F(start), output_field=DurationField()))
+
+
+def _seconds(value):
+    return value.total_seconds() if value else 0
+
+
+def _next_high_water(queryset, last_id, batch_size):
+    """Return ``(id, full)`` for the next batch after ``last_id``.
+
+    ``id`` is the last row of the batch (None if there is nothing new) and
+    ``full`` says whether the batch was filled, so more rows may remain.
+    """
+    ids = queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)
+    last = ids[batch_size - 1:batch_size].first()
+    if last is not None:
+        return last, True
+    return ids.order_by('-id').first(), False
+
+
+def _roll_swipes(state, cutoff, batch_size, add):
+    high, full = _next_high_water(BCSwipe.objects.filter(created_at__lt=cutoff), state.last_id, batch_size)
+    if high is None:
+        return 0, False
+    rows = BCSwipe.objects.filter(id__gt=state.last_id, id__lte=high).annotate(
+        hour=TruncHour('created_at'),
+    ).values('hour', 'swiper__applicant_profile__role', 'swiper__bc_member_profile__year').annotate(
+        swipes=Count('id'), likes=Count('id', filter=Q(direction='like')),
+    ).order_by()
+    processed = 0
+    for row in rows:
+        segment = (
+            _segment('applicant', row['swiper__applicant_profile__role'])
+            or _segment('bc_member', row['swiper__bc_member_profile__year'])
+        )
+        add(row['hour'], 'swipes', segment, row['swipes'])
+        add(row['hour'], 'likes', segment, row['likes'])
+        processed += row['swipes']
+    state.last_id = high
+    return processed, full
+
+
+def _roll_matches(state, cutoff, batch_size, add):
+    high, full = _next_high_water(BCMatch.objects.filter(matched_at__lt=cutoff), state.last_id, batch_size)
+    if high is None:
+        return 0, False
+    rows = BCMatch.objects.filter(id__gt=state.last_id, id__lte=high).annotate(
+        hour=TruncHour('matched_at'),
+    ).values('hour', 'applicant__role').annotate(matches=Count('id')).order_by()
+    processed = 0
+    for row in rows:
+        add(row['hour'], 'matches', _segment('applicant', row['applicant__role']), row['matches'])
+        processed += row['matches']
+    state.last_id = high
+    return processed, full
+
+
+def _roll_confirmations(state, cutoff, batch_size, add):
+    matches = BCMatch.objects.filter(confirmed_at__lt=cutoff, status__in=['confirmed', 'completed'])
+    if state.last_time:
+        matches = matches.filter(confirmed_at__gte=state.last_time)
+    rows = matches.annotate(hour=TruncHour('confirmed_at')).values('hour').annotate(
+        confirmations=Count('id'), latency=_duration('confirmed_at', 'matched_at'),
+    ).order_by()
+    processed = 0
+    for row in rows:
+        add(row['hour'], 'confirmations', '', row['confirmations'], _seconds(row['latency']))
+        processed += row['confirmations']
+    state.last_time = cutoff
+    return processed, False
+
+
+def _roll_first_messages(state, cutoff, batch_size, add):
+    high, full = _next_high_water(BCMessage.objects.filter(sent_at__lt=cutoff), state.last_id, batch_size)
+    if high is None:
+        return 0, False
+    earlier = BCMessage.objects.filter(match=OuterRef('match'), id__lt=OuterRef('id'))
+    rows = BCMessage.objects.filter(
+        id__gt=state.last_id, id__lte=high,
+        match__confirmed_at__isnull=False, match__confirmed_at__lte=F('sent_at'),
+    ).exclude(Exists(earlier)).annotate(hour=TruncHour('sent_at')).values('hour').annotate(
+        first_messages=Count('id'), latency=_duration('sent_at', 'match__confirmed_at'),
+    ).order_by()
+    processed = 0
+    for row in rows:
+        add(row['hour'], 'first_messages', '', row['first_messages'], _seconds(row['latency']))
+        processed += row['first_messages']
+    state.last_id = high
+    return processed, full
+
+
+SOURCES = {
+    'swipes': _roll_swipes,
+    'matches': _roll_matches,
+    'confirmations': _roll_confirmations,
+    'first_messages': _roll_first_messages,
+}
+
+
+@transaction.atomic
+def rollup(batch_size=BATCH_SIZE):
+    """Roll up one batch of new events per source.
+
+    Returns ``({source: events rolled up}, caught_up)``; after a backlog,
+    call again until ``caught_up`` is true.
+    """
+    BCRollupWatermark.objects.bulk_create(
+        [BCRollupWatermark(source=source) for source in SOURCES], ignore_conflicts=True,
+    )
+    # Locked so overlapping runs wait instead of double counting
+    states = {state.source: state for state in BCRollupWatermark.objects.select_for_update().filter(source__in=SOURCES)}
+    cutoff = timezone.now() - datetime.timedelta(seconds=settings.BC_ROLLUP_LAG)
+
+    deltas = defaultdict(lambda: [0, 0.0])
+
+    def add(hour, metric, segment, count, total_seconds=0.0):
+        # Days are local days; hours are truncated in local time, so they nest
+        day = timezone.localtime(hour).replace(hour=0)
+        for period, bucket in (('hour', hour), ('day', day)):
+            delta = deltas[(period, bucket, metric, segment)]
+            delta[0] += count
+            delta[1] += total_seconds
+
+    results = {source: roll(states[source], cutoff, batch_size, add) for source, roll in SOURCES.items()}
+    _apply({key: delta for key, delta in deltas.items() if delta[0]})
+    for state in states.values():
+        state.updated_at = timezone.now()
+    BCRollupWatermark.objects.bulk_update(states.values(), ['last_id', 'last_time', 'updated_at'])
+    processed = {source: events for source, (events, _) in results.items()}
+    return processed, not any(full for _, full in results.values())
+
+
+def _apply(deltas):
+    """Upsert ``{(period, bucket, metric, segment): [count, seconds]}`` in one statement."""
+    if not deltas:
+        return
+    table = connection.ops.quote_name(BCFunnelRollup._meta.db_table)
+    rows = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(deltas))
+    params = [
+        value
+        for (period, bucket, metric, segment), (count, seconds) in deltas.items()
+        for value in (period, connection.ops.adapt_datetimefield_value(bucket), metric, segment, count, seconds)
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (period, bucket, metric, segment, count, total_seconds) VALUES {rows} '
+            f'ON CONFLICT (period, bucket, metric, segment) DO UPDATE SET '
+            f'count = {table}.count + EXCLUDED.count, '
+            f'total_seconds = {table}.total_seconds + EXCLUDED.total_seconds',
+            params,
+        )
+
+
+@transaction.atomic
+def reset():
+    """Drop every rollup and mark so the next runs rebuild from scratch."""
+    BCFunnelRollup.objects.all().delete()
+    BCRollupWatermark.objects.all().delete()
+
+
+def _rate(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def _hours(seconds, count):
+    return round(seconds / count / 3600, 2) if count else None
+
+
+def get_funnel(days=30, hours=48):
+    """Funnel numbers for the dashboard, read from the rollup rows only.
+
+    ``daily`` has one entry per day of the last ``days`` with any activity,
+    ``hourly`` the same for the last ``hours``, and ``segments`` the like and
+    mutual-like rates per applicant role / member year over the ``days``.
+    """
+    days = max(1, min(days, MAX_DAYS))
+    hours = max(1, min(hours, MAX_HOURS))
+    now = timezone.localtime()
+    since_day = (now - datetime.timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    since_hour = (now - datetime.timedelta(hours=hours - 1)).replace(minute=0, second=0, microsecond=0)
+
+    rows = BCFunnelRollup.objects.filter(
+        Q(period='day', bucket__gte=since_day) | Q(period='hour', bucket__gte=since_hour)
+    ).values_list('period', 'bucket', 'metric', 'segment', 'count', 'total_seconds')
+
+    buckets = {'day': defaultdict(lambda: defaultdict(lambda: [0, 0.0])), 'hour': defaultdict(lambda: defaultdict(lambda: [0, 0.0]))}
+    segments = defaultdict(lambda: defaultdict(int))
+    for period, bucket, metric, segment, count, seconds in rows:
+        totals = buckets[period][bucket][metric]
+        totals[0] += count
+        totals[1] += seconds
+        if period == 'day' and segment:
+            segments[segment][metric] += count
+
+    def summarize(metrics):
+        swipes, likes, matches = (metrics[name][0] for name in ('swipes', 'likes', 'matches'))
+        confirmations, confirmation_seconds = metrics['confirmations']
+        first_messages, first_message_seconds = metrics['first_messages']
+        return {
+            'swipes': swipes,
+            'likes': likes,
+            'like_rate': _rate(likes, swipes),
+            'matches': matches,
+            'mutual_like_rate': _rate(matches, likes),
+            'confirmations': confirmations,
+            'avg_hours_to_confirmation': _hours(confirmation_seconds, confirmations),
+            'first_messages': first_messages,
+            'avg_hours_to_first_message': _hours(first_message_seconds, first_messages),
+        }
+
+    watermark = BCRollupWatermark.objects.filter(source='confirmations').values_list('last_time', flat=True).first()
+    return {
+        'daily': [
+            {'date': timezone.localtime(bucket).date().isoformat(), **summarize(metrics)}
+            for bucket, metrics in sorted(buckets['day'].items())
+        ],
+        'hourly': [
+            {'hour': timezone.localtime(bucket).isoformat(), **summarize(metrics)}
+            for bucket, metrics in sorted(buckets['hour'].items())
+        ],
+        'segments': [
+            {
+                'segment': segment,
+                'swipes': counts['swipes'],
+                'likes': counts['likes'],
+                'like_rate': _rate(counts['likes'], counts['swipes']),
+                'matches': counts['matches'],
+                'mutual_like_rate': _rate(counts['matches'], counts['likes']),
+            }
+            for segment, counts in sorted(segments.items())
+        ],
+        'updated_through': watermark.isoformat() if watermark else None,
+    }
@@ -0,0 +1,118 @@
+"""
+Set-based admin approvals.
+
+Approving BC members and confirming, rejecting or completing matches in bulk
+takes a fixed number of queries however many ids are given: the eligible
+rows are locked and loaded in one query, moved with a single ``update()``
+per table, and their notifications queued in one insert. ``update()`` skips
+the model signals, so these functions also do what the signals would have
+done: keep the discovery decks, cached logins and stat counters current.
+
+Ids that don't exist or are not in the right state (e.g. confirming a match
+that is no longer pending) are skipped rather than treated as errors, so a
+review session can be resubmitted safely.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching, deck, realtime, stats
+from .emails import send_match_confirmed_notifications
+from .models import User, BCApplicantProfile, BCMatch, BCMemberProfile
+
+# action: (status it applies to, status it sets)
+MATCH_ACTIONS = {
+    'confirm': ('pending', 'confirmed'),
+    'reject': ('pending', 'rejected'),
+    'complete': ('confirmed', 'completed'),
+}
+
+
+@transaction.atomic
+def approve_members(member_ids, admin):
+    """Approve every pending member profile in ``member_ids``.
+
+    Returns the approved profiles.
+    """
+    members = list(
+        BCMemberProfile.objects.filter(id__in=member_ids, is_approved=False)
+        .select_related('user').select_for_update(of=('self',))
+    )
+    if not members:
+        return []
+
+    now = timezone.now()
+    BCMemberProfile.objects.filter(id__in=[member.id for member in members]).update(
+        is_approved=True, approved_by=admin, approved_at=now,
+    )
+    User.objects.filter(id__in=[member.user_id for member in members]).update(
+        user_type='bc_member', has_completed_setup=True,
+    )
+    for member in members:
+        member.is_approved, member.approved_by, member.approved_at = True, admin, now
+        member.user.user_type, member.user.has_completed_setup = 'bc_member', True
+
+    deck.profiles_became_discoverable(members)
+    caching.invalidate_auth(*(member.user_id for member in members))
+    stats.record(
+        change
+        for member in members
+        for change in [(stats.member_metrics(False), member.created_at, -1), (stats.member_metrics(True), member.created_at, 1)]
+    )
+    return members
+
+
+@transaction.atomic
+def update_matches(match_ids, action, admin):
+    """Apply ``action`` ('confirm', 'reject' or 'complete') to matches.
+
+    Only matches in the state the action applies to are changed. Confirming
+    marks every affected applicant as matched in one statement, takes them
+    out of discovery and queues the confirmation emails. An applicant gets
+    at most one confirmed match: matches of applicants who already have one
+    are skipped, as are all but the lowest id per applicant in the batch.
+    Returns the updated matches.
+    """
+    from_status, to_status = MATCH_ACTIONS[action]
+    # Confirming also locks the applicants, so concurrent batches can't
+    # both confirm the same one
+    lock = ('self', 'applicant') if action == 'confirm' else ('self',)
+    matches = list(
+        BCMatch.objects.filter(id__in=match_ids, status=from_status)
+        .select_related('applicant__user', 'bc_member__user').select_for_update(of=lock)
+        .order_by('id')
+    )
+    if action == 'confirm':
+        first_per_applicant = {}
+        for match in matches:
+            if not match.applicant.has_been_matched:
+                first_per_applicant.setdefault(match.applicant_id, match)
+        matches = list(first_per_applicant.values())
+    if not matches:
+        return []
+
+    changes = {'status': to_status}
+    if action in ('confirm', 'reject'):
+        changes.update(confirmed_by=admin, confirmed_at=timezone.now())
+    BCMatch.objects.filter(id__in=[match.id for match in matches]).update(**changes)
+    for match in matches:
+        for field, value in changes.items():
+            setattr(match, field, value)
+
+    if action == 'confirm':
+        BCApplicantProfile.objects.filter(
+            id__in={match.applicant_id for match in matches}, has_been_matched=False
+        ).update(has_been_matched=True)
+        for match in matches:
+            match.applicant.has_been_matched = True
+        deck.profiles_left_discovery({match.applicant.user_id for match in matches})
+        caching.invalidate_auth(*{match.applicant.user_id for match in matches})
+        send_match_confirmed_notifications(matches)
+
+    stats.record(
+        change
+        for match in matches
+        for change in [(stats.match_metrics(from_status), match.matched_at, -1), (stats.match_metrics(to_status), match.matched_at, 1)]
+    )
+    for match in matches:
+        realtime.publish_match_status(match)
+    return matches
@@ -0,0 +1,297 @@
+"""
+Match suggestions for the admin review queue.
+
+Pending matches are the edges of a bipartite graph between applicants
+(each can be confirmed once) and BC members (each can take a limited number
+of coffee chats). ``suggest_confirmations`` picks the set of pending
+matches to confirm that maximizes the total weight, where every edge is
+worth ``BASE_WEIGHT`` plus ``OVERLAP_WEIGHT`` per interest the applicant
+shares with the member's areas of expertise. The assignment is solved
+exactly as a min-cost flow:
+
+    source -> applicant (capacity 1) -> member (capacity c, cost -weight) -> sink
+
+with successive shortest paths: Dijkstra over reduced costs finds the
+cheapest augmenting path, node potentials keep the reduced costs
+non-negative, and every shortest path of the same cost is augmented in one
+phase before Dijkstra runs again. Weights are small integers, so path costs
+take few distinct values and a season-sized graph needs only a handful of
+phases (see ``manage.py suggest_matches --benchmark``).
+"""
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count
+
+from . import ranking
+from .models import BCApplicantProfile, BCMatch, BCMemberProfile
+
+BASE_WEIGHT = 10
+OVERLAP_WEIGHT = 1
+MAX_OVERLAP = 5
+
+INF = float('inf')
+
+
+class MinCostFlow:
+    """Min-cost flow on a graph whose only negative costs leave the source layer.
+
+    Edges are stored in parallel lists; edge ``e ^ 1`` is the residual
+    twin of edge ``e``.
+    """
+
+    def __init__(self, node_count):
+        self.node_count = node_count
+        self.adjacency = [[] for _ in range(node_count)]
+        self.to = []
+        self.capacity = []
+        self.cost = []
+
+    def add_edge(self, source, target, capacity, cost):
+        """Add an edge and return its index."""
+        index = len(self.to)
+        self.adjacency[source].append(index)
+        self.to.append(target)
+        self.capacity.append(capacity)
+        self.cost.append(cost)
+        self.adjacency[target].append(index + 1)
+        self.to.append(source)
+        self.capacity.append(0)
+        self.cost.append(-cost)
+        return index
+
+    def _initial_potentials(self, source, order):
+        """Shortest distances for a DAG given in topological ``order``."""
+        potential = [INF] * self.node_count
+        potential[source] = 0
+        for node in order:
+            if potential[node] == INF:
+                continue
+            for edge in self.adjacency[node]:
+                if self.capacity[edge] > 0:
+                    target = self.to[edge]
+                    candidate = potential[node] + self.cost[edge]
+                    if candidate < potential[target]:
+                        potential[target] = candidate
+        return potential
+
+    def _dijkstra(self, source, potential):
+        """Reduced-cost distances from ``source`` and the edge into each node."""
+        distance = [INF] * self.node_count
+        previous = [-1] * self.node_count
+        distance[source] = 0
+        heap = [(0, source)]
+        to, capacity, cost, adjacency = self.to, self.capacity, self.cost, self.adjacency
+        while heap:
+            dist, node = heapq.heappop(heap)
+            if dist > distance[node]:
+                continue
+            base = dist + potential[node]
+            for edge in adjacency[node]:
+                if capacity[edge] > 0:
+                    target = to[edge]
+                    candidate = base + cost[edge] - potential[target]
+                    if candidate < distance[target]:
+                        distance[target] = candidate
+                        previous[target] = edge
+                        heapq.heappush(heap, (candidate, target))
+        return distance, previous
+
+    def _augment_admissible(self, source, sink, potential):
+        """Push flow along zero-reduced-cost paths; returns units pushed.
+
+        Iterative DFS with per-node edge pointers, so each edge is scanned
+        a bounded number of times per phase and long alternating paths
+        don't hit the recursion limit.
+        """
+        to, capacity, cost, adjacency = self.to, self.capacity, self.cost, self.adjacency
+        pointer = [0] * self.node_count
+        dead = bytearray(self.node_count)
+        pushed = 0
+        while True:
+            path = []
+            on_path = bytearray(self.node_count)
+            on_path[source] = 1
+            node = source
+            while node != sink:
+                edges = adjacency[node]
+                while pointer[node] < len(edges):
+                    edge = edges[pointer[node]]
+                    target = to[edge]
+                    if (
+                        capacity[edge] > 0 and not dead[target] and not on_path[target]
+                        and cost[edge] + potential[node] - potential[target] == 0
+                    ):
+                        break
+                    pointer[node] += 1
+                else:
+                    # No way forward from here this phase
+                    if node == source:
+                        return pushed
+                    dead[node] = 1
+                    on_path[node] = 0
+                    edge = path.pop()
+                    node = to[edge ^ 1]
+                    pointer[node] += 1
+                    continue
+                path.append(edge)
+                node = target
+                on_path[node] = 1
+            # Every path from the source starts with a capacity-1 edge
+            for edge in path:
+                capacity[edge] -= 1
+                capacity[edge ^ 1] += 1
+            pushed += 1
+
+    def max_profit_flow(self, source, sink, order):
+        """Send flow while it lowers the total cost; returns that cost.
+
+        ``order`` lists the nodes in topological order of the initial
+        (acyclic) graph, used to seed the potentials.
+        """
+        potential = self._initial_potentials(source, order)
+        total = 0
+        while True:
+            distance, previous = self._dijkstra(source, potential)
+            if distance[sink] == INF:
+                break
+            for node in range(self.node_count):
+                if distance[node] < INF:
+                    potential[node] += distance[node]
+            path_cost = potential[sink] - potential[source]
+            if path_cost >= 0:
+                # Further flow would not add weight
+                break
+            pushed = self._augment_admissible(source, sink, potential)
+            if not pushed:
+                # The DFS avoids revisiting nodes, so it can miss a path through
+                # a cycle; the shortest-path tree always has one
+                node = sink
+                while node != source:
+                    edge = previous[node]
+                    self.capacity[edge] -= 1
+                    self.capacity[edge ^ 1] += 1
+                    node = self.to[edge ^ 1]
+                pushed = 1
+            total += path_cost * pushed
+        return total
+
+
+def interest_overlap(interests, expertise):
+    # The same overlap discovery ranks by, capped
+    return min(ranking.score(ranking.tag_set(interests), ranking.tag_set(expertise)), MAX_OVERLAP)
+
+
+def solve(edges, capacities):
+    """Maximum-weight assignment.
+
+    ``edges`` is a list of ``(key, applicant, member, weight)`` and
+    ``capacities`` maps each member to how many more applicants it can
+    take. Every applicant gets at most one edge. Returns the chosen keys.
+    """
+    applicants = {applicant: index for index, applicant in enumerate(dict.fromkeys(a for _, a, _, _ in edges))}
+    members = {member: index for index, member in enumerate(capacities)}
+    source = len(applicants) + len(members)
+    sink = source + 1
+    graph = MinCostFlow(sink + 1)
+
+    for index in applicants.values():
+        graph.add_edge(source, index, 1, 0)
+    chosen = []
+    for key, applicant, member, weight in edges:
+        if capacities.get(member, 0) > 0 and weight > 0:
+            chosen.append((key, graph.add_edge(applicants[applicant], len(applicants) + members[member], 1, -weight)))
+    for member, index in members.items():
+        if capacities[member] > 0:
+            graph.add_edge(len(applicants) + index, sink, capacities[member], 0)
+
+    order = [source, *applicants.values(), *(len(applicants) + index for index in members.values()), sink]
+    graph.max_profit_flow(source, sink, order)
+    return [key for key, edge in chosen if graph.capacity[edge] == 0]
+
+
+def suggest_confirmations(capacity=None, weighting='overlap'):
+    """Propose which pending matches to confirm.
+
+    ``capacity`` caps how many confirmed matches a member may hold
+    (``BC_MATCH_MEMBER_CAPACITY`` by default; matches already confirmed
+    count towards it). With ``weighting='none'`` every match is worth the
+    same and the solver simply confirms as many as possible.
+
+    Returns ``(proposals, summary)``: one dict per proposed match, ordered
+    by weight, and the size of the graph that was solved.
+    """
+    if capacity is None:
+        capacity = settings.BC_MATCH_MEMBER_CAPACITY
+    pending = list(BCMatch.objects.filter(
+        status='pending', applicant__has_been_matched=False, bc_member__is_approved=True,
+    ).values_list('id', 'applicant_id', 'bc_member_id'))
+
+    applicant_ids = {applicant for _, applicant, _ in pending}
+    member_ids = {member for _, _, member in pending}
+    confirmed = dict(BCMatch.objects.filter(
+        status='confirmed', bc_member_id__in=member_ids,
+    ).values('bc_member_id').annotate(count=Count('id')).order_by().values_list('bc_member_id', 'count'))
+    capacities = {member: max(capacity - confirmed.get(member, 0), 0) for member in member_ids}
+
+    if weighting == 'overlap':
+        interests = dict(BCApplicantProfile.objects.filter(id__in=applicant_ids).values_list('id', 'interests'))
+        expertise = dict(BCMemberProfile.objects.filter(id__in=member_ids).values_list('id', 'areas_of_expertise'))
+        overlap = {
+            match_id: interest_overlap(interests.get(applicant), expertise.get(member))
+            for match_id, applicant, member in pending
+        }
+    else:
+        overlap = defaultdict(int)
+
+    edges = [
+        (match_id, applicant, member, BASE_WEIGHT + OVERLAP_WEIGHT * overlap[match_id])
+        for match_id, applicant, member in pending
+    ]
+    chosen = set(solve(edges, capacities))
+    proposals = sorted(
+        (
+            {
+                'match_id': match_id,
+                'applicant_id': applicant,
+                'bc_member_id': member,
+                'interest_overlap': overlap[match_id],
+                'weight': weight,
+            }
+            for match_id, applicant, member, weight in edges
+            if match_id in chosen
+        ),
+        key=lambda proposal: (-proposal['weight'], proposal['match_id']),
+    )
+    summary = {
+        'pending_matches': len(pending),
+        'applicants': len(applicant_ids),
+        'members': len(member_ids),
+        'proposed': len(proposals),
+        'total_weight': sum(proposal['weight'] for proposal in proposals),
+    }
+    return proposals, summary
+
+
+def benchmark(applicants=10000, members=1000, matches_per_applicant=5, capacity=None, seed=0):
+    """Solve a random graph of the given size; returns ``(seconds, proposed, edges)``."""
+    import random
+    import time
+
+    if capacity is None:
+        capacity = settings.BC_MATCH_MEMBER_CAPACITY
+    rng = random.Random(seed)
+    pairs = (
+        (applicant, member)
+        for applicant in range(applicants)
+        for member in rng.sample(range(members), min(matches_per_applicant, members))
+    )
+    edges = [
+        (key, applicant, member, BASE_WEIGHT + OVERLAP_WEIGHT * rng.randint(0, MAX_OVERLAP))
+        for key, (applicant, member) in enumerate(pairs)
+    ]
+    capacities = {member: capacity for member in range(members)}
+    started = time.perf_counter()
+    chosen = solve(edges, capacities)
+    return time.perf_counter() - started, len(chosen), len(edges)
@@ -0,0 +1,112 @@
+"""
+Token authentication that loads the user together with their profile.
+
+DRF's ``TokenAuthentication`` joins ``Token`` and ``User`` and views then
+fetch ``applicant_profile`` / ``bc_member_profile`` lazily in a second
+query. ``ProfileTokenAuthentication`` selects both profiles in the same
+query, and keeps the result in a bounded per-process LRU cache so repeated
+requests with the same token skip the database altogether.
+
+Cached entries are pickled, so every request gets its own copy of the user
+to modify, and each one records the user's auth generation
+(``caching.auth_generation``). The signals bump it when the user, their
+profile or a token changes (logout, ``ResetProfileView``, profile edits) and
+bulk updates bump it explicitly; an entry whose generation has moved is
+dropped and the user reloaded, so a view saving ``request.user`` never
+writes back fields someone else has changed since.
+
+That only holds if every process sees every bump, so logins are cached only
+when the Django cache is shared (``caching.is_shared``, i.e. ``REDIS_URL``
+is set). With the per-process memory cache a logout, or a user saved by a
+management command, would go unnoticed, and each request loads the token
+from the database instead.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from . import caching
+
+
+class TokenCache:
+    """Thread-safe LRU of token key -> ``(expires, user_id, generation, pickled token)``.
+
+    The pickled token is None for a token only seen once (see
+    ``ProfileTokenAuthentication``).
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, user_id, generation, token):
+        ttl, max_size = settings.BC_AUTH_CACHE_TTL, settings.BC_AUTH_CACHE_SIZE
+        if ttl <= 0 or max_size <= 0 or not caching.is_shared():
+            return
+        blob = pickle.dumps(token, pickle.HIGHEST_PROTOCOL) if token is not None else None
+        entry = (time.monotonic() + ttl, user_id, generation, blob)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class ProfileTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` with the profiles prefetched and a token cache."""
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        generation = None
+        if entry is not None:
+            user_id, cached_generation, blob = entry[1:]
+            generation = caching.auth_generation(user_id)
+            if blob is not None and generation == cached_generation:
+                token = pickle.loads(blob)
+                return token.user, token
+
+        model = self.get_model()
+        try:
+            token = model.objects.select_related(
+                'user', 'user__applicant_profile', 'user__bc_member_profile',
+            ).get(key=key)
+        except model.DoesNotExist:
+            token_cache.discard(key)
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        # Generations are bumped once a change has committed, so only one
+        # read before loading proves the loaded user current. Which user a
+        # token belongs to is only known after the first load, so a new
+        # token is remembered without the user and cached on its next use.
+        token_cache.set(key, token.user_id, generation, token if generation is not None else None)
+        return token.user, token
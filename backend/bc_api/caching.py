@@ -0,0 +1,150 @@
+"""
+Generation-based cache invalidation for discovery.
+
+Rather than deleting cached entries one by one, every cached value embeds the
+current generation numbers of the things it depends on in its key. Bumping a
+generation makes every key built from the old number unreachable, and the
+stale entries simply expire.
+
+Four kinds of generations are tracked:
+
+* a per-side *pool* generation (``'applicant'`` / ``'bc_member'``), bumped
+  whenever the set or content of discoverable profiles on that side changes;
+* a per-*user* generation, bumped when something only affects that user's
+  view (their own swipes, profile edits or deck rebuilds);
+* a per-user *auth* generation, bumped when the user row, their profile or
+  their tokens change, which expires the logins cached by
+  ``bc_api.authentication``. It is kept apart from the user generation so
+  swiping doesn't keep throwing those away;
+* a single *whitelist* generation, bumped when the BC member whitelist
+  changes, which reloads the set cached by ``bc_api.whitelist``.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+DISCOVER_CACHE_TIMEOUT = 10 * 60
+STATS_PREFIX = 'bc_api:discover_cache'
+
+# The side a user discovers, keyed by their user_type
+VIEWED_SIDE = {'applicant': 'bc_member', 'bc_member': 'applicant'}
+
+
+# Backends that keep a separate copy of the cache in every process
+PROCESS_LOCAL_BACKENDS = ('LocMemCache', 'DummyCache')
+
+
+def is_shared():
+    """Whether every process reads the same generations.
+
+    With a per-process cache a change made in one process (another web
+    worker, a management command) never reaches the others' generations.
+    """
+    return not settings.CACHES['default']['BACKEND'].endswith(PROCESS_LOCAL_BACKENDS)
+
+
+def _get(key):
+    return cache.get_or_set(key, 1, timeout=None)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+def _pool_key(side):
+    return f'bc_api:gen:pool:{side}'
+
+
+def _user_key(user_id):
+    return f'bc_api:gen:user:{user_id}'
+
+
+def _auth_key(user_id):
+    return f'bc_api:gen:auth:{user_id}'
+
+
+def pool_generation(side):
+    return _get(_pool_key(side))
+
+
+def user_generation(user_id):
+    return _get(_user_key(user_id))
+
+
+def invalidate_pool(*sides):
+    """Profiles on the given side(s) changed; every viewer must recompute."""
+    def bump():
+        for side in sides or VIEWED_SIDE.values():
+            _bump(_pool_key(side))
+    # After commit, so a page read meanwhile can't be cached under the new generation
+    transaction.on_commit(bump)
+
+
+def invalidate_user(user_id):
+    """Only this user's own discovery answer changed."""
+    transaction.on_commit(lambda: _bump(_user_key(user_id)))
+
+
+def auth_generation(user_id):
+    return _get(_auth_key(user_id))
+
+
+def invalidate_auth(*user_ids):
+    """These users, their profiles or their tokens changed; cached logins must reload."""
+    def bump():
+        for user_id in user_ids:
+            _bump(_auth_key(user_id))
+    # After commit, so a login loaded meanwhile can't be cached under the new generation
+    transaction.on_commit(bump)
+
+
+def whitelist_generation():
+    return _get('bc_api:gen:whitelist')
+
+
+def invalidate_whitelist():
+    """The BC member whitelist changed."""
+    transaction.on_commit(lambda: _bump('bc_api:gen:whitelist'))
+
+
+def discover_cache_key(user, cursor, limit):
+    side = VIEWED_SIDE.get(user.user_type)
+    pool_gen = pool_generation(side) if side else 0
+    return 'bc_api:discover:{}:{}:{}:{}:{}:{}'.format(
+        user.id, user.user_type, user_generation(user.id), pool_gen, limit, cursor or ''
+    )
+
+
+def get_discover_response(key):
+    """Look up a cached discover payload, recording a hit or a miss."""
+    data = cache.get(key)
+    _count('hits' if data is not None else 'misses')
+    return data
+
+
+def set_discover_response(key, data):
+    cache.set(key, data, DISCOVER_CACHE_TIMEOUT)
+
+
+def _count(name):
+    key = f'{STATS_PREFIX}:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def discover_cache_stats():
+    counts = cache.get_many([f'{STATS_PREFIX}:hits', f'{STATS_PREFIX}:misses'])
+    hits = counts.get(f'{STATS_PREFIX}:hits', 0)
+    misses = counts.get(f'{STATS_PREFIX}:misses', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 3) if total else None,
+    }
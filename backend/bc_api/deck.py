@@ -0,0 +1,321 @@
+"""
+Maintenance of the materialized discovery decks (``BCDeckEntry``).
+
+A user's deck holds every candidate they may still swipe on:
+
+* applicants see approved BC members;
+* BC members see applicants who have not been matched yet;
+* anyone the owner already swiped on is left out.
+
+The write paths that change eligibility call into this module so that
+``DiscoverView`` can read pre-filtered rows instead of recomputing the
+anti-join against ``BCSwipe`` on every request. Every change also bumps the
+matching generation in ``bc_api.caching`` so cached discover responses that
+depended on the old deck are no longer served.
+
+Each row also stores its relevance ``score`` (see ``bc_api.ranking``).
+Every row pairs an applicant with a BC member, so the score is the overlap
+of the applicant's interests with the member's expertise whichever of them
+owns the deck; ``profiles_retagged`` rewrites it when either side's tags
+change.
+"""
+from collections import defaultdict
+
+from django.db.models import Q
+
+from . import caching, ranking
+from .models import User, BCApplicantProfile, BCDeckEntry, BCMemberProfile, BCSwipe
+from .pagination import deck_key
+
+BATCH_SIZE = 1000
+
+
+def _eligible_members():
+    return BCMemberProfile.objects.filter(is_approved=True)
+
+
+def _eligible_applicants():
+    return BCApplicantProfile.objects.filter(has_been_matched=False)
+
+
+def _applicant_owners():
+    """Users whose deck shows BC members (mirrors DiscoverView)."""
+    return User.objects.filter(user_type='applicant', applicant_profile__has_been_matched=False)
+
+
+def _member_owners():
+    """Users whose deck shows applicants (mirrors DiscoverView)."""
+    return User.objects.filter(user_type='bc_member')
+
+
+def _candidate_pool(user):
+    """Profiles the given user may see, or None if they have no deck."""
+    if user.user_type == 'applicant':
+        if not _applicant_owners().filter(id=user.id).exists():
+            return None
+        return _eligible_members()
+    if user.user_type == 'bc_member':
+        return _eligible_applicants()
+    return None
+
+
+def _tags_field(profiles):
+    """Tag field of a profile queryset's model."""
+    return ranking.tags_field('bc_member' if profiles.model is BCMemberProfile else 'applicant')
+
+
+def _owner_tags(owner_ids, viewed_side):
+    """``{owner_id: tag_set}`` for owners whose decks show ``viewed_side``."""
+    model = BCApplicantProfile if viewed_side == 'bc_member' else BCMemberProfile
+    field = ranking.tags_field('applicant' if viewed_side == 'bc_member' else 'bc_member')
+    return {
+        user_id: ranking.tag_set(tags)
+        for user_id, tags in model.objects.filter(user_id__in=list(owner_ids)).values_list('user_id', field)
+    }
+
+
+def _entry(owner_id, profile_id, candidate_user_id, owner_tags, candidate_tags):
+    return BCDeckEntry(
+        owner_id=owner_id, candidate_id=candidate_user_id, deck_key=deck_key(owner_id, profile_id),
+        score=ranking.score(owner_tags, candidate_tags),
+    )
+
+
+def _insert(entries):
+    """Write deck rows from an iterable ``BATCH_SIZE`` at a time.
+
+    Only one batch is held in memory, however many owner × candidate pairs
+    the iterable yields. Returns the number of rows passed in.
+    """
+    batch = []
+    total = 0
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) == BATCH_SIZE:
+            BCDeckEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+            batch = []
+    if batch:
+        BCDeckEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        total += len(batch)
+    return total
+
+
+def build_deck(user):
+    """Rebuild one user's deck from scratch."""
+    BCDeckEntry.objects.filter(owner=user).delete()
+    caching.invalidate_user(user.id)
+    pool = _candidate_pool(user)
+    if pool is None:
+        return 0
+
+    viewed_side = 'bc_member' if pool.model is BCMemberProfile else 'applicant'
+    owner_tags = _owner_tags([user.id], viewed_side).get(user.id, frozenset())
+    swiped_ids = BCSwipe.objects.filter(swiper=user).values_list('target_id', flat=True)
+    candidates = pool.exclude(user_id__in=swiped_ids).exclude(user_id=user.id).values_list(
+        'id', 'user_id', _tags_field(pool)
+    )
+    return _insert(
+        _entry(user.id, profile_id, candidate_user_id, owner_tags, ranking.tag_set(tags))
+        for profile_id, candidate_user_id, tags in candidates.iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+def add_candidate(profile):
+    """Put a newly discoverable profile into every eligible deck."""
+    if isinstance(profile, BCMemberProfile):
+        side, owners, owner_field = 'bc_member', _applicant_owners(), 'applicant_profile__interests'
+    else:
+        side, owners, owner_field = 'applicant', _member_owners(), 'bc_member_profile__areas_of_expertise'
+    caching.invalidate_pool(side)
+
+    candidate_tags = ranking.tag_set(getattr(profile, ranking.tags_field(side)))
+    swiper_ids = BCSwipe.objects.filter(target_id=profile.user_id).values_list('swiper_id', flat=True)
+    owners = owners.exclude(id__in=swiper_ids).exclude(id=profile.user_id).values_list('id', owner_field)
+    return _insert(
+        _entry(owner_id, profile.id, profile.user_id, ranking.tag_set(tags), candidate_tags)
+        for owner_id, tags in owners.iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+def add_candidates(profiles):
+    """Bulk version of ``add_candidate`` for profiles on the same side."""
+    if not profiles:
+        return 0
+    if isinstance(profiles[0], BCMemberProfile):
+        side, owners, owner_field = 'bc_member', _applicant_owners(), 'applicant_profile__interests'
+    else:
+        side, owners, owner_field = 'applicant', _member_owners(), 'bc_member_profile__areas_of_expertise'
+    caching.invalidate_pool(side)
+
+    candidate_tags = {profile.id: ranking.tag_set(getattr(profile, ranking.tags_field(side))) for profile in profiles}
+    candidate_ids = [profile.user_id for profile in profiles]
+    swiped = set(BCSwipe.objects.filter(target_id__in=candidate_ids).values_list('swiper_id', 'target_id'))
+    return _insert(
+        _entry(owner_id, profile.id, profile.user_id, ranking.tag_set(tags), candidate_tags[profile.id])
+        for owner_id, tags in owners.values_list('id', owner_field).iterator(chunk_size=BATCH_SIZE)
+        for profile in profiles
+        if owner_id != profile.user_id and (owner_id, profile.user_id) not in swiped
+    )
+
+
+def remove_candidate(user_id):
+    """Take a user out of every deck (rejected, matched, or reset)."""
+    BCDeckEntry.objects.filter(candidate_id=user_id).delete()
+    caching.invalidate_pool()
+
+
+def remove_candidates(user_ids):
+    """Bulk version of ``remove_candidate``."""
+    BCDeckEntry.objects.filter(candidate_id__in=list(user_ids)).delete()
+    caching.invalidate_pool()
+
+
+def build_decks(users):
+    """Bulk version of ``build_deck``: one query per side, not per user."""
+    user_ids = [user.id for user in users]
+    BCDeckEntry.objects.filter(owner_id__in=user_ids).delete()
+    for user_id in user_ids:
+        caching.invalidate_user(user_id)
+
+    applicant_owners = set(_applicant_owners().filter(id__in=user_ids).values_list('id', flat=True))
+    owners_by_pool = defaultdict(list)
+    for user in users:
+        if user.user_type == 'bc_member':
+            owners_by_pool['applicants'].append(user.id)
+        elif user.id in applicant_owners:
+            owners_by_pool['members'].append(user.id)
+    if not owners_by_pool:
+        return 0
+
+    swiped = set(BCSwipe.objects.filter(swiper_id__in=user_ids).values_list('swiper_id', 'target_id'))
+    pools = {'applicants': _eligible_applicants(), 'members': _eligible_members()}
+    total = 0
+    for pool, owner_ids in owners_by_pool.items():
+        profiles = pools[pool]
+        owner_tags = _owner_tags(owner_ids, 'bc_member' if pool == 'members' else 'applicant')
+        candidates = [
+            (profile_id, candidate_user_id, ranking.tag_set(tags))
+            for profile_id, candidate_user_id, tags in profiles.values_list('id', 'user_id', _tags_field(profiles))
+        ]
+        total += _insert(
+            _entry(owner_id, profile_id, candidate_user_id, owner_tags.get(owner_id, frozenset()), tags)
+            for owner_id in owner_ids
+            for profile_id, candidate_user_id, tags in candidates
+            if owner_id != candidate_user_id and (owner_id, candidate_user_id) not in swiped
+        )
+    return total
+
+
+def clear_deck(user_id):
+    """Drop a user's own deck."""
+    BCDeckEntry.objects.filter(owner_id=user_id).delete()
+    caching.invalidate_user(user_id)
+
+
+def clear_decks(user_ids):
+    """Bulk version of ``clear_deck``."""
+    user_ids = list(user_ids)
+    BCDeckEntry.objects.filter(owner_id__in=user_ids).delete()
+    for user_id in user_ids:
+        caching.invalidate_user(user_id)
+
+
+def record_swipe(swiper_id, target_id):
+    """A swiped candidate leaves the swiper's deck."""
+    BCDeckEntry.objects.filter(owner_id=swiper_id, candidate_id=target_id).delete()
+    caching.invalidate_user(swiper_id)
+
+
+def record_swipes(swiper_id, target_ids):
+    """Bulk version of ``record_swipe``."""
+    if target_ids:
+        BCDeckEntry.objects.filter(owner_id=swiper_id, candidate_id__in=list(target_ids)).delete()
+        caching.invalidate_user(swiper_id)
+
+
+def profile_became_discoverable(profile):
+    """A profile was created or approved: fill its owner's deck and others'."""
+    add_candidate(profile)
+    build_deck(profile.user)
+
+
+def profile_left_discovery(user_id):
+    """A profile was rejected, matched or reset: remove it from all decks."""
+    remove_candidate(user_id)
+    clear_deck(user_id)
+
+
+def profiles_became_discoverable(profiles):
+    """Bulk version of ``profile_became_discoverable`` for one side."""
+    add_candidates(profiles)
+    build_decks([profile.user for profile in profiles])
+
+
+def profiles_left_discovery(user_ids):
+    """Bulk version of ``profile_left_discovery``."""
+    user_ids = list(user_ids)
+    remove_candidates(user_ids)
+    clear_decks(user_ids)
+
+
+def _rescore(entries):
+    """Recompute the stored score of the given deck rows.
+
+    One UPDATE per distinct score per ``BATCH_SIZE`` rows; scores are small
+    integers, so that is a handful of statements.
+    """
+    # Every row pairs an applicant with a member, whichever owns the deck
+    rows = (
+        entries.filter(owner__user_type='applicant').values_list(
+            'id', 'score', 'owner__applicant_profile__interests', 'candidate__bc_member_profile__areas_of_expertise'
+        ),
+        entries.filter(owner__user_type='bc_member').values_list(
+            'id', 'score', 'candidate__applicant_profile__interests', 'owner__bc_member_profile__areas_of_expertise'
+        ),
+    )
+    changed = defaultdict(list)
+
+    def flush():
+        for new_score, entry_ids in changed.items():
+            BCDeckEntry.objects.filter(id__in=entry_ids).update(score=new_score)
+        changed.clear()
+
+    for queryset in rows:
+        for count, (entry_id, old_score, interests, expertise) in enumerate(queryset.iterator(chunk_size=BATCH_SIZE), 1):
+            new_score = ranking.score(ranking.tag_set(interests), ranking.tag_set(expertise))
+            if new_score != old_score:
+                changed[new_score].append(entry_id)
+            if count % BATCH_SIZE == 0:
+                flush()
+        flush()
+
+
+def profiles_retagged(profiles):
+    """Profiles' interests or expertise changed: rescore their deck rows.
+
+    Covers both the rows in their own decks and the rows showing them in
+    everyone else's.
+    """
+    user_ids = [profile.user_id for profile in profiles]
+    if not user_ids:
+        return
+    _rescore(BCDeckEntry.objects.filter(Q(owner_id__in=user_ids) | Q(candidate_id__in=user_ids)))
+    caching.invalidate_pool()
+    for user_id in user_ids:
+        caching.invalidate_user(user_id)
+
+
+def rebuild_all_decks():
+    """Rebuild every deck from scratch, e.g. after a bulk import."""
+    BCDeckEntry.objects.all().delete()
+    caching.invalidate_pool()
+    owners = User.objects.filter(
+        user_type__in=['applicant', 'bc_member']
+    ).only('id', 'user_type')
+    total_owners = 0
+    total_entries = 0
+    for user in owners.iterator(chunk_size=BATCH_SIZE):
+        total_entries += build_deck(user)
+        total_owners += 1
+    return total_owners, total_entries
@@ -1,15 +1,41 @@
 """
 Email notification utilities for BC Coffee Chat.
+
+Notifications are not sent inline: the ``send_*`` helpers queue rows in the
+``BCOutboxEmail`` table inside the caller's transaction, and
+``manage.py send_queued_emails`` delivers them with ``deliver_queued_emails``.
+New chat messages are batched into per-recipient digests by
+``queue_message_digests`` rather than emailed one by one.
 """
-from django.core.mail import send_mail
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
 
+from .models import BCMatch, BCMessage, BCOutboxEmail
 
-def send_match_notification(match):
-    """Send email notification when a new match is created."""
+logger = logging.getLogger(__name__)
+
+
+def queue_emails(emails):
+    """Add ``(to_email, subject, body)`` triples to the outbox in one insert."""
+    return BCOutboxEmail.objects.bulk_create([
+        BCOutboxEmail(to_email=to_email, subject=subject, body=body)
+        for to_email, subject, body in emails
+        if to_email
+    ])
+
+
+def _match_notification_emails(match):
     applicant = match.applicant
     bc_member = match.bc_member
+    emails = []
 
     # Email to applicant
     if applicant.user.email:
@@ -26,16 +52,7 @@ Note: This match is pending confirmation from the BC admin. You'll receive anoth
 Best,
 BC Coffee Chat Team
         """
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [applicant.user.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print(f"Failed to send match notification to applicant: {e}")
+        emails.append((applicant.user.email, subject, message))
 
     # Email to BC member
     if bc_member.user.email:
@@ -55,22 +72,25 @@ Note: This match is pending confirmation from the BC admin. You'll receive anoth
 Best,
 BC Coffee Chat Team
         """
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [bc_member.user.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print(f"Failed to send match notification to BC member: {e}")
+        emails.append((bc_member.user.email, subject, message))
 
+    return emails
 
-def send_match_confirmed_notification(match):
-    """Send email when admin confirms a match."""
+
+def send_match_notification(match):
+    """Queue email notifications for a newly created match."""
+    return queue_emails(_match_notification_emails(match))
+
+
+def send_match_notifications(matches):
+    """Queue new-match notifications for several matches in one insert."""
+    return queue_emails([email for match in matches for email in _match_notification_emails(match)])
+
+
+def _match_confirmed_emails(match):
     applicant = match.applicant
     bc_member = match.bc_member
+    emails = []
 
     # Email to applicant
     if applicant.user.email:
@@ -85,16 +105,7 @@ You can now message each other to schedule your coffee chat. Log in to the app t
 Best,
 BC Coffee Chat Team
         """
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [applicant.user.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print(f"Failed to send confirmation to applicant: {e}")
+        emails.append((applicant.user.email, subject, message))
 
     # Email to BC member
     if bc_member.user.email:
@@ -109,50 +120,191 @@ You can now message each other to schedule your coffee chat. Log in to the app t
 Best,
 BC Coffee Chat Team
         """
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [bc_member.user.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print(f"Failed to send confirmation to BC member: {e}")
-
-
-def send_new_message_notification(message):
-    """Send email notification for new messages."""
-    match = message.match
-    sender = message.sender
-
-    # Determine recipient
-    if match.applicant.user == sender:
-        recipient = match.bc_member.user
-    else:
-        recipient = match.applicant.user
+        emails.append((bc_member.user.email, subject, message))
+
+    return emails
+
+
+def send_match_confirmed_notification(match):
+    """Queue emails telling both participants the admin confirmed their match."""
+    return queue_emails(_match_confirmed_emails(match))
 
-    if recipient.email:
-        subject = f"BC Coffee Chat - New message from {sender.name}"
-        message_text = f"""
+
+def send_match_confirmed_notifications(matches):
+    """Queue confirmation emails for several matches in one insert."""
+    return queue_emails([email for match in matches for email in _match_confirmed_emails(match)])
+
+
+def _message_digest_email(recipient, conversations):
+    """One email summarizing unread messages across a recipient's chats.
+
+    ``conversations`` is a list of ``(sender, unread_count, latest_content)``.
+    """
+    total = sum(count for _, count, _ in conversations)
+    subject = f"BC Coffee Chat - You have {total} new message{'s' if total != 1 else ''}"
+    lines = '\n'.join(
+        f"- {sender.name} ({count} new): \"{content[:200]}{'...' if len(content) > 200 else ''}\""
+        for sender, count, content in conversations
+    )
+    message_text = f"""
 Hi {recipient.name or 'there'},
 
-You have a new message from {sender.name}:
+You have new messages waiting:
 
-"{message.content[:200]}{'...' if len(message.content) > 200 else ''}"
+{lines}
 
 Log in to the app to reply.
 
 Best,
 BC Coffee Chat Team
         """
+    return recipient.email, subject, message_text
+
+
+@transaction.atomic
+def queue_message_digests():
+    """Queue one digest email per recipient with unread chat messages.
+
+    A conversation is included once its oldest unemailed unread message is
+    ``BC_MESSAGE_DIGEST_WINDOW`` seconds old, so a burst of messages becomes
+    a single email. Messages the recipient has read in the meantime (their
+    read cursor moved past them) are never mentioned. Each recipient's
+    ``*_last_notified_message_id`` cursor then moves forward so the same
+    messages aren't emailed twice. Returns the number of digests queued.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.BC_MESSAGE_DIGEST_WINDOW)
+    since = now - timedelta(seconds=settings.BC_MESSAGE_DIGEST_MAX_AGE)
+
+    to_applicant = Q(sender=F('match__bc_member__user'), id__gt=Greatest(
+        'match__applicant_last_read_message_id', 'match__applicant_last_notified_message_id'
+    ))
+    to_member = Q(sender=F('match__applicant__user'), id__gt=Greatest(
+        'match__bc_member_last_read_message_id', 'match__bc_member_last_notified_message_id'
+    ))
+    pending = list(
+        BCMessage.objects.filter(match__status='confirmed', sent_at__gte=since)
+        .filter(to_applicant | to_member)
+        .order_by()
+        .values('match_id', 'sender_id')
+        .annotate(count=Count('id'), first_sent_at=Min('sent_at'), last_id=Max('id'))
+        .filter(first_sent_at__lte=cutoff)
+    )
+    if not pending:
+        return 0
+
+    # Matches another digest run is working on are left for its next pass
+    matches = BCMatch.objects.select_related('applicant__user', 'bc_member__user').select_for_update(
+        of=('self',), skip_locked=True
+    ).filter(id__in={row['match_id'] for row in pending})
+    matches = {match.id: match for match in matches}
+    latest = dict(BCMessage.objects.filter(id__in=[row['last_id'] for row in pending]).values_list('id', 'content'))
+
+    recipients = {}
+    conversations = defaultdict(list)
+    for row in pending:
+        match = matches.get(row['match_id'])
+        if match is None:
+            continue
+        if row['sender_id'] == match.applicant.user_id:
+            sender, recipient, cursor = match.applicant.user, match.bc_member.user, 'bc_member_last_notified_message_id'
+        else:
+            sender, recipient, cursor = match.bc_member.user, match.applicant.user, 'applicant_last_notified_message_id'
+        if getattr(match, cursor) >= row['last_id']:
+            continue
+        setattr(match, cursor, row['last_id'])
+        recipients[recipient.id] = recipient
+        conversations[recipient.id].append((sender, row['count'], latest[row['last_id']]))
+
+    queue_emails([
+        _message_digest_email(recipients[user_id], items) for user_id, items in conversations.items()
+    ])
+    BCMatch.objects.bulk_update(
+        matches.values(), ['applicant_last_notified_message_id', 'bc_member_last_notified_message_id']
+    )
+    return len(conversations)
+
+
+def retry_delay(attempts):
+    """Backoff before the next try after ``attempts`` failures: 1, 2, 4... min, capped at 6h."""
+    return timedelta(minutes=min(2 ** (attempts - 1), 6 * 60))
+
+
+def deliver_queued_emails(batch_size=50):
+    """Send one batch of due outbox emails over a single SMTP connection.
+
+    A short transaction claims the batch (``SKIP LOCKED``, so several workers
+    can drain the outbox side by side): the rows become ``sending`` with a
+    lease of ``BC_EMAIL_LEASE`` seconds. SMTP runs outside any transaction,
+    and the results are written back only to rows this worker still holds.
+    Rows whose worker died mid-batch are claimed again once the lease runs
+    out. Returns ``(sent, failed)``; an empty batch is ``(0, 0)``.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.BC_EMAIL_LEASE)
+    with transaction.atomic():
+        batch = list(
+            BCOutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'sending'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+        # Counted as tried up front, so an email whose sending keeps
+        # killing the worker still ends up dead-lettered
+        exhausted = [email for email in batch if email.attempts >= settings.BC_EMAIL_MAX_ATTEMPTS]
+        batch = [email for email in batch if email.attempts < settings.BC_EMAIL_MAX_ATTEMPTS]
+        BCOutboxEmail.objects.filter(id__in=[email.id for email in exhausted]).update(
+            status='dead', last_error='Lease expired on the last attempt',
+        )
+        BCOutboxEmail.objects.filter(id__in=[email.id for email in batch]).update(
+            status='sending', next_attempt_at=lease_until, attempts=F('attempts') + 1,
+        )
+    for email in batch:
+        email.attempts += 1
+
+    sent = []
+    failed = []
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # Couldn't reach the server at all; the whole batch failed
+        failed = [(email, exc) for email in batch]
+    else:
         try:
-            send_mail(
-                subject,
-                message_text,
-                settings.DEFAULT_FROM_EMAIL,
-                [recipient.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print(f"Failed to send message notification: {e}")
+            for email in batch:
+                try:
+                    EmailMessage(
+                        email.subject, email.body, settings.DEFAULT_FROM_EMAIL, [email.to_email],
+                        connection=connection,
+                    ).send()
+                except Exception as exc:
+                    failed.append((email, exc))
+                else:
+                    sent.append(email.id)
+        finally:
+            connection.close()
+
+    # Only rows still under this worker's lease
+    held = BCOutboxEmail.objects.filter(status='sending', next_attempt_at=lease_until)
+    held.filter(id__in=sent).update(status='sent', sent_at=timezone.now(), last_error='')
+    now = timezone.now()
+    for email, exc in failed:
+        _record_failure(email, exc, now)
+        held.filter(id=email.id).update(
+            status=email.status, next_attempt_at=email.next_attempt_at, last_error=email.last_error,
+        )
+    return len(sent), len(failed)
+
+
+def _record_failure(email, exc, now):
+    email.last_error = f'{type(exc).__name__}: {exc}'
+    if email.attempts >= settings.BC_EMAIL_MAX_ATTEMPTS:
+        email.status = 'dead'
+        email.next_attempt_at = now
+        logger.error('Giving up on outbox email %s to %s: %s', email.id, email.to_email, exc)
+    else:
+        email.status = 'pending'
+        email.next_attempt_at = now + retry_delay(email.attempts)
+        logger.warning('Outbox email %s to %s failed (attempt %s): %s', email.id, email.to_email, email.attempts, exc)
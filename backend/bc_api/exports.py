@@ -0,0 +1,206 @@
+"""
+Streaming CSV / NDJSON exports for admins.
+
+Each dataset is a ``values_list`` query read with ``.iterator()`` (a
+server-side cursor on PostgreSQL), encoded row by row and streamed, so memory
+stays flat however many rows there are and the header goes out before the
+query has finished. Under ASGI the rows are pulled in batches on the
+database thread and handed to the event loop; Django would otherwise read a
+synchronous iterator into a list before sending anything.
+"""
+import csv
+import datetime
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import BCApplicantProfile, BCMatch, BCMemberProfile, BCMessage, BCSwipe
+
+CHUNK_SIZE = 2000
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _day_start(day):
+    """Midnight starting ``day`` in the current time zone."""
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+class Dataset:
+    """An exportable query: ``columns`` maps output names to lookups."""
+
+    def __init__(self, queryset, columns, date_field, statuses):
+        self.queryset = queryset
+        self.columns = columns
+        self.date_field = date_field
+        # status value accepted in ?status= -> filter it selects
+        self.statuses = statuses
+
+    def rows(self, since=None, until=None, statuses=None):
+        queryset = self.queryset
+        # Bounds on the column itself (not its date), so its index applies
+        if since:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': _day_start(since)})
+        if until:
+            queryset = queryset.filter(**{f'{self.date_field}__lt': _day_start(until + datetime.timedelta(days=1))})
+        if statuses:
+            condition = Q()
+            for value in statuses:
+                condition |= self.statuses[value]
+            queryset = queryset.filter(condition)
+        return queryset.order_by('id').values_list(*self.columns.values()).iterator(chunk_size=CHUNK_SIZE)
+
+
+DATASETS = {
+    'matches': Dataset(
+        BCMatch.objects.all(),
+        {
+            'id': 'id',
+            'matched_at': 'matched_at',
+            'status': 'status',
+            'applicant_email': 'applicant__user__email',
+            'applicant_name': 'applicant__user__name',
+            'applicant_role': 'applicant__role',
+            'member_email': 'bc_member__user__email',
+            'member_name': 'bc_member__user__name',
+            'member_year': 'bc_member__year',
+            'confirmed_at': 'confirmed_at',
+            'confirmed_by': 'confirmed_by__email',
+            'admin_notes': 'admin_notes',
+        },
+        'matched_at',
+        {status: Q(status=status) for status, _ in BCMatch.STATUS_CHOICES},
+    ),
+    'applicants': Dataset(
+        BCApplicantProfile.objects.all(),
+        {
+            'id': 'id',
+            'email': 'user__email',
+            'name': 'user__name',
+            'role': 'role',
+            'interests': 'interests',
+            'has_been_matched': 'has_been_matched',
+            'created_at': 'created_at',
+        },
+        'created_at',
+        {'matched': Q(has_been_matched=True), 'unmatched': Q(has_been_matched=False)},
+    ),
+    'members': Dataset(
+        BCMemberProfile.objects.all(),
+        {
+            'id': 'id',
+            'email': 'user__email',
+            'name': 'user__name',
+            'year': 'year',
+            'major': 'major',
+            'semesters_in_bc': 'semesters_in_bc',
+            'areas_of_expertise': 'areas_of_expertise',
+            'availability': 'availability',
+            'is_approved': 'is_approved',
+            'approved_at': 'approved_at',
+            'created_at': 'created_at',
+        },
+        'created_at',
+        {'approved': Q(is_approved=True), 'pending': Q(is_approved=False)},
+    ),
+    'swipes': Dataset(
+        BCSwipe.objects.all(),
+        {
+            'id': 'id',
+            'swiper_email': 'swiper__email',
+            'target_email': 'target__email',
+            'direction': 'direction',
+            'created_at': 'created_at',
+        },
+        'created_at',
+        {direction: Q(direction=direction) for direction, _ in BCSwipe.DIRECTION_CHOICES},
+    ),
+    # ?status= filters on the status of the conversation's match
+    'messages': Dataset(
+        BCMessage.objects.all(),
+        {
+            'id': 'id',
+            'match_id': 'match_id',
+            'sender_email': 'sender__email',
+            'content': 'content',
+            'sent_at': 'sent_at',
+        },
+        'sent_at',
+        {status: Q(match__status=status) for status, _ in BCMatch.STATUS_CHOICES},
+    ),
+}
+
+
+class _Echo:
+    """File-like object whose write() returns the line for the generator."""
+
+    def write(self, value):
+        return value
+
+
+# Spreadsheets evaluate text cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    if isinstance(value, list):
+        # Same "a; b" form the roster import reads
+        value = '; '.join(str(item) for item in value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Names, notes and messages are user input; make them plain text
+        return "'" + value
+    return value
+
+
+def encode(dataset, rows, fmt):
+    """Yield the encoded export, one line (bytes) at a time."""
+    names = list(dataset.columns)
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(names).encode()
+        for row in rows:
+            yield writer.writerow([_csv_cell(value) for value in row]).encode()
+    else:
+        for row in rows:
+            yield (json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n').encode()
+
+
+async def _in_batches(lines):
+    """Drive a synchronous generator from the event loop, a batch at a time.
+
+    thread_sensitive keeps every batch on the same thread, and so on the
+    same database connection and server-side cursor.
+    """
+    next_batch = sync_to_async(lambda size: b''.join(islice(lines, size)), thread_sensitive=True)
+    # The first line (the CSV header) goes out on its own, before the query runs
+    size = 1
+    while True:
+        batch = await next_batch(size)
+        if not batch:
+            return
+        yield batch
+        size = CHUNK_SIZE
+
+
+def export_response(dataset_name, fmt, since=None, until=None, statuses=None, asynchronous=False):
+    """Build the streaming download for a dataset."""
+    dataset = DATASETS[dataset_name]
+    lines = encode(dataset, dataset.rows(since, until, statuses), fmt)
+    response = StreamingHttpResponse(
+        _in_batches(lines) if asynchronous else lines,
+        content_type=FORMATS[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dataset_name}.{fmt}"'
+    # Keep proxies from buffering the whole download
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,117 @@
+"""
+Idempotency-Key support for write endpoints.
+
+Clients on flaky connections may resend the same request. When a request
+carries an ``Idempotency-Key`` header, the first response is stored with the
+key and any retry within ``BC_IDEMPOTENCY_KEY_TTL`` seconds gets that stored
+response back (with ``Idempotent-Replayed: true``) instead of running the
+view again. The view and the key are written in the same transaction, so a
+retry that races the original either sees the committed response or rolls
+its own work back and replays it; side effects written in the same
+transaction (such as queued emails) or deferred with ``transaction.on_commit``
+only ever happen once.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import BCIdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+class _KeyTaken(Exception):
+    """Another request stored a response for this key first."""
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    payload = f'{request.method} {request.path}\n{body}'
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response(
+            {'error': 'Idempotency-Key was already used for a different request'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    response = Response(record.response_body, status=record.response_status)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _lookup(user, key):
+    record = BCIdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is None:
+        return None
+    if record.created_at < timezone.now() - timedelta(seconds=settings.BC_IDEMPOTENCY_KEY_TTL):
+        record.delete()
+        return None
+    return record
+
+
+def idempotent(handler):
+    """Decorate an APIView/ViewSet handler to honour ``Idempotency-Key``."""
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = _fingerprint(request)
+        record = _lookup(request.user, key)
+        if record is not None:
+            return _replay(record, fingerprint)
+
+        try:
+            with transaction.atomic():
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code >= 500:
+                    return response
+                # Round-trip through the renderer so the body is plain JSON
+                body = json.loads(JSONRenderer().render(response.data) or 'null')
+                try:
+                    with transaction.atomic():
+                        BCIdempotencyKey.objects.create(
+                            user=request.user,
+                            key=key,
+                            fingerprint=fingerprint,
+                            response_status=response.status_code,
+                            response_body=body,
+                        )
+                except IntegrityError:
+                    raise _KeyTaken
+                return response
+        except _KeyTaken:
+            record = _lookup(request.user, key)
+            if record is None:
+                return Response(
+                    {'error': 'A request with this Idempotency-Key is still in progress'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return _replay(record, fingerprint)
+
+    return wrapper
+
+
+def purge_expired(now=None):
+    """Delete keys older than the TTL; returns the number removed."""
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.BC_IDEMPOTENCY_KEY_TTL)
+    deleted, _ = BCIdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
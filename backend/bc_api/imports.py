@@ -0,0 +1,208 @@
+"""
+Bulk import of whitelist entries and BC member rosters.
+
+Files are CSV (header row) or JSON Lines (one object per line) and are read
+incrementally, so a roster of any size is never held in memory at once.
+Rows are validated and written in chunks of ``CHUNK_SIZE``, each chunk in
+its own transaction with a fixed number of queries:
+
+* ``whitelist``: ``BCMemberWhitelist`` rows, inserted with
+  ``ignore_conflicts`` so emails already on the list are left alone;
+* ``members``: the whitelist entry, plus the ``User`` (upserted on email)
+  and an approved ``BCMemberProfile``. Existing profiles are updated in
+  place and approved if they were pending.
+
+``bulk_create`` and ``bulk_update`` skip the model signals, so each chunk
+also refreshes the discovery caches and decks and the stat counters itself.
+
+Every row gets a report entry: ``{'row', 'email', 'status', 'errors'}``
+with a status of ``'created'``, ``'updated'``, ``'exists'`` or ``'error'``.
+Emails are lowercased as the whitelist stores them, and matched against
+existing users case-insensitively, so a roster row never adds a second
+user next to one whose address differs only in case.
+Rows with errors are skipped; the rest of the chunk is still written.
+"""
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from . import caching, deck, stats
+from .models import User, BCMemberProfile, BCMemberWhitelist
+from .serializers import MemberImportRowSerializer, WhitelistImportRowSerializer
+
+CHUNK_SIZE = 500
+
+KINDS = {
+    'whitelist': WhitelistImportRowSerializer,
+    'members': MemberImportRowSerializer,
+}
+
+PROFILE_FIELDS = ['year', 'major', 'semesters_in_bc', 'areas_of_expertise', 'availability', 'bio', 'project_experience']
+
+
+class ImportFormatError(ValueError):
+    """The file could not be parsed at all (as opposed to a bad row)."""
+
+
+def read_rows(stream, fmt):
+    """Yield row dicts from a binary stream of CSV or JSON Lines."""
+    lines = codecs.iterdecode(stream, 'utf-8-sig')
+    if fmt == 'csv':
+        for row in csv.DictReader(lines):
+            # Empty cells fall back to the field defaults
+            yield {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+    elif fmt == 'jsonl':
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ImportFormatError(f'Line {number} is not valid JSON: {exc}')
+            if not isinstance(row, dict):
+                raise ImportFormatError(f'Line {number} is not a JSON object')
+            yield row
+    else:
+        raise ImportFormatError(f'Unsupported format "{fmt}"; use csv or jsonl')
+
+
+def format_for(filename):
+    """Guess the format from a file name."""
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def run_import(stream, fmt, kind, added_by=None):
+    """Import every row of ``stream``; yields one report entry per row."""
+    serializer_class = KINDS[kind]
+    rows = enumerate(read_rows(stream, fmt), start=1)
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            return
+        yield from _import_chunk(chunk, serializer_class, kind, added_by)
+
+
+def _import_chunk(chunk, serializer_class, kind, added_by):
+    report = {}
+    valid = {}
+    for number, row in chunk:
+        serializer = serializer_class(data=row)
+        email = str(row.get('email', '')).strip()
+        if not serializer.is_valid():
+            report[number] = {'row': number, 'email': email, 'status': 'error', 'errors': serializer.errors}
+            continue
+        data = serializer.validated_data
+        data['email'] = BCMemberWhitelist.normalize_email(data['email'])
+        if data['email'] in valid:
+            report[number] = {'row': number, 'email': email, 'status': 'error', 'errors': {'email': ['Duplicate of an earlier row']}}
+            continue
+        valid[data['email']] = (number, data)
+
+    if valid and kind == 'members':
+        # Applicants can't be turned into members
+        applicants = _users_by_email(valid).filter(applicant_profile__isnull=False)
+        for email in applicants.values_list('email_key', flat=True):
+            number, _ = valid.pop(email)
+            report[number] = {'row': number, 'email': email, 'status': 'error', 'errors': {'email': ['This user is an applicant']}}
+
+    if valid:
+        with transaction.atomic():
+            statuses = _write_whitelist(valid, added_by)
+            if kind == 'members':
+                statuses.update(_write_members(valid, added_by))
+        for email, (number, _) in valid.items():
+            if number not in report:
+                report[number] = {'row': number, 'email': email, 'status': statuses[email], 'errors': {}}
+
+    for number, _ in chunk:
+        yield report[number]
+
+
+def _users_by_email(emails):
+    """Users whose email matches one of ``emails`` (lowercased) in any case."""
+    return User.objects.annotate(email_key=Lower('email')).filter(email_key__in=list(emails))
+
+
+def _write_whitelist(valid, added_by):
+    existing = set(BCMemberWhitelist.objects.filter(email__in=list(valid)).values_list('email', flat=True))
+    BCMemberWhitelist.objects.bulk_create([
+        BCMemberWhitelist(email=email, name=data.get('name', ''), notes=data.get('notes', ''), added_by=added_by)
+        for email, (_, data) in valid.items()
+        if email not in existing
+    ], ignore_conflicts=True)
+    caching.invalidate_whitelist()
+    return {email: 'exists' if email in existing else 'created' for email in valid}
+
+
+def _write_members(valid, added_by):
+    """Upsert users and profiles for a chunk; returns ``{email: status}``."""
+    rows = {email: data for email, (_, data) in valid.items()}
+    # Existing users keep the address as they signed up with it
+    stored_emails = dict(_users_by_email(rows).values_list('email_key', 'email'))
+    unusable_password = make_password(None)
+    User.objects.bulk_create(
+        [
+            User(
+                email=stored_emails.get(email, email), name=data['name'], photo_url=data.get('photo_url', ''),
+                password=unusable_password, user_type='bc_member', has_completed_setup=True,
+            )
+            for email, data in rows.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['email'],
+        update_fields=['name', 'user_type', 'has_completed_setup'],
+    )
+    users = {user.email_key: user for user in _users_by_email(rows).select_related('bc_member_profile')}
+
+    now = timezone.now()
+    statuses = {}
+    new_profiles, changed_profiles, newly_approved = [], [], []
+    for email, data in rows.items():
+        user = users[email]
+        profile = getattr(user, 'bc_member_profile', None)
+        statuses[email] = 'created' if profile is None else 'updated'
+        if profile is None:
+            new_profiles.append(BCMemberProfile(
+                user=user, is_approved=True, approved_by=added_by, approved_at=now,
+                **{field: data[field] for field in PROFILE_FIELDS},
+            ))
+            continue
+        for field in PROFILE_FIELDS:
+            setattr(profile, field, data[field])
+        if not profile.is_approved:
+            profile.is_approved, profile.approved_by, profile.approved_at = True, added_by, now
+            newly_approved.append(profile)
+        profile.updated_at = now
+        changed_profiles.append(profile)
+
+    BCMemberProfile.objects.bulk_create(new_profiles, ignore_conflicts=True)
+    BCMemberProfile.objects.bulk_update(
+        changed_profiles, PROFILE_FIELDS + ['is_approved', 'approved_by', 'approved_at', 'updated_at'],
+    )
+
+    # What the profile and user signals would have done
+    caching.invalidate_pool('bc_member')
+    for user in users.values():
+        caching.invalidate_user(user.id)
+    caching.invalidate_auth(*(user.id for user in users.values()))
+    discoverable = list(BCMemberProfile.objects.filter(
+        user_id__in=[profile.user_id for profile in new_profiles + newly_approved]
+    ).select_related('user'))
+    deck.profiles_became_discoverable(discoverable)
+    # Rebuilt decks are scored already; the others may have new expertise
+    deck.profiles_retagged([profile for profile in changed_profiles if profile not in newly_approved])
+    stats.record(
+        [(stats.member_metrics(True), now, 1) for _ in new_profiles]
+        + [
+            change
+            for profile in newly_approved
+            for change in [(stats.member_metrics(False), profile.created_at, -1), (stats.member_metrics(True), profile.created_at, 1)]
+        ]
+    )
+    return statuses
@@ -0,0 +1,20 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from bc_api.photos import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Delete stored profile photos and variants that no user refers to any more.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age-hours', type=float, default=24, help='Keep files younger than this (default 24).')
+        parser.add_argument('--dry-run', action='store_true', help='List the files without deleting them.')
+
+    def handle(self, *args, **options):
+        deleted = collect_garbage(datetime.timedelta(hours=options['min_age_hours']), options['dry_run'])
+        for path in deleted:
+            self.stdout.write(path)
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(deleted)} file(s).'))
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bc_api.imports import KINDS, ImportFormatError, format_for, run_import
+
+
+class Command(BaseCommand):
+    help = 'Import whitelist entries or a BC member roster from a CSV or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or .jsonl file.')
+        parser.add_argument('--kind', choices=sorted(KINDS), default='members', help='What each row creates.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to a guess from the file name.')
+        parser.add_argument('--report', help='Write the per-row report here as JSON Lines.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or format_for(options['path'])
+        counts = {}
+        report = open(options['report'], 'w') if options['report'] else None
+        try:
+            with open(options['path'], 'rb') as stream:
+                for entry in run_import(stream, fmt, options['kind']):
+                    counts[entry['status']] = counts.get(entry['status'], 0) + 1
+                    if report:
+                        report.write(json.dumps(entry) + '\n')
+                    if entry['status'] == 'error':
+                        self.stderr.write(f"Row {entry['row']} ({entry['email'] or 'no email'}): {json.dumps(entry['errors'])}")
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if report:
+                report.close()
+        summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items())) or 'no rows'
+        self.stdout.write(self.style.SUCCESS(f'Imported {summary}.'))
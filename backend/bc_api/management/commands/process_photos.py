@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bc_api import photos
+from bc_api.models import User
+
+
+class Command(BaseCommand):
+    help = 'Strip and generate resized variants for uploaded profile photos that have none yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate variants for every uploaded photo.')
+
+    def handle(self, *args, **options):
+        if not photos.HAS_PILLOW:
+            raise CommandError('Pillow is not installed')
+        users = User.objects.filter(photo_url__startswith=settings.MEDIA_URL).only('id', 'photo_url', 'photo_variants')
+        done = failed = 0
+        for user in users.iterator():
+            if not options['all'] and (user.photo_variants or {}).get('source') == user.photo_url:
+                continue
+            path = user.photo_url[len(settings.MEDIA_URL):]
+            try:
+                photos.process(user.id, path, force=options['all'])
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f'User {user.id} ({path}): {exc}')
+                continue
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f'Processed {done} photo(s), {failed} failed.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bc_api.deck import rebuild_all_decks
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every discovery deck from profiles and swipes (e.g. after a bulk import).'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            owners, entries = rebuild_all_decks()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {owners} deck(s) with {entries} entries.'))
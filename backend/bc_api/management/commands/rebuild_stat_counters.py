@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from bc_api.stats import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the admin dashboard counters (BCStatCounter) from the source tables.'
+
+    def handle(self, *args, **options):
+        rows = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} counter row(s).'))
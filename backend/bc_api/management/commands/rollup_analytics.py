@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bc_api.analytics import BATCH_SIZE, reset, rollup
+
+
+class Command(BaseCommand):
+    help = 'Fold new swipes, matches, confirmations and messages into the funnel rollup tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per source per transaction.')
+        parser.add_argument('--loop', action='store_true', help='Keep running and roll up new events as they settle.')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds to sleep once caught up (with --loop).')
+        parser.add_argument('--rebuild', action='store_true', help='Drop all rollups first and rebuild them from history.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            reset()
+            self.stdout.write('Dropped existing rollups.')
+        while True:
+            processed, caught_up = rollup(options['batch_size'])
+            if any(processed.values()):
+                self.stdout.write(', '.join(f'{count} {source}' for source, count in processed.items()))
+            if not caught_up:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Rollups are up to date.'))
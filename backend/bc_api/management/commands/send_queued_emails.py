@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bc_api.emails import deliver_queued_emails, queue_message_digests
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbox emails in batches, retrying failures with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails sent per SMTP connection.')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new emails.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to sleep when the outbox is empty (with --loop).')
+        parser.add_argument('--digests', action='store_true', help='Also queue due new-message digests before each pass.')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            if options['digests']:
+                digests = queue_message_digests()
+                if digests:
+                    self.stdout.write(f'Queued {digests} message digest(s).')
+            sent, failed = deliver_queued_emails(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}.')
+            elif options['loop']:
+                time.sleep(options['interval'])
+            else:
+                break
+        self.stdout.write(self.style.SUCCESS(f'Done: {total_sent} sent, {total_failed} failed.'))
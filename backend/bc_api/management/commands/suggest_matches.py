@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bc_api import approvals
+from bc_api.assignment import benchmark, suggest_confirmations
+from bc_api.models import User
+
+
+class Command(BaseCommand):
+    help = 'Propose the best set of pending matches to confirm (and optionally confirm them).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--capacity', type=int, help='Confirmed matches per member (default BC_MATCH_MEMBER_CAPACITY).')
+        parser.add_argument('--weighting', choices=['overlap', 'none'], default='overlap', help='Prefer shared interests, or just maximize confirmations.')
+        parser.add_argument('--apply', action='store_true', help='Confirm the proposed matches.')
+        parser.add_argument('--admin-email', help='Staff user recorded as confirming them (with --apply).')
+        parser.add_argument('--benchmark', action='store_true', help='Time the solver on a random 10k x 1k graph instead.')
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            seconds, proposed, edges = benchmark(capacity=options['capacity'])
+            self.stdout.write(self.style.SUCCESS(f'Solved {edges} edges in {seconds:.2f}s; {proposed} matches proposed.'))
+            return
+
+        admin = None
+        if options['admin_email']:
+            admin = User.objects.filter(email=options['admin_email'], is_staff=True).first()
+            if admin is None:
+                raise CommandError(f'No staff user {options["admin_email"]}')
+
+        proposals, summary = suggest_confirmations(options['capacity'], options['weighting'])
+        for proposal in proposals:
+            self.stdout.write(
+                f"match {proposal['match_id']}: applicant {proposal['applicant_id']} -> member {proposal['bc_member_id']} "
+                f"(overlap {proposal['interest_overlap']})"
+            )
+        self.stdout.write(
+            f"{summary['proposed']} of {summary['pending_matches']} pending matches proposed "
+            f"({summary['applicants']} applicants, {summary['members']} members)."
+        )
+        if options['apply']:
+            confirmed = approvals.update_matches([proposal['match_id'] for proposal in proposals], 'confirm', admin)
+            self.stdout.write(self.style.SUCCESS(f'Confirmed {len(confirmed)} match(es).'))
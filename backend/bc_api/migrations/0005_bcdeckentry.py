@@ -0,0 +1,64 @@
+# Generated by Django 5.1.3 on 2026-10-16 22:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from bc_api.pagination import deck_key
+
+
+def build_decks(apps, schema_editor):
+    """Materialize decks for everyone who could already use discovery."""
+    User = apps.get_model('bc_api', 'User')
+    BCMemberProfile = apps.get_model('bc_api', 'BCMemberProfile')
+    BCApplicantProfile = apps.get_model('bc_api', 'BCApplicantProfile')
+    BCSwipe = apps.get_model('bc_api', 'BCSwipe')
+    BCDeckEntry = apps.get_model('bc_api', 'BCDeckEntry')
+
+    members = list(BCMemberProfile.objects.filter(is_approved=True).values_list('id', 'user_id'))
+    applicants = list(BCApplicantProfile.objects.filter(has_been_matched=False).values_list('id', 'user_id'))
+    owners = User.objects.filter(user_type__in=['applicant', 'bc_member']).exclude(
+        user_type='applicant', applicant_profile__isnull=True
+    ).exclude(
+        user_type='applicant', applicant_profile__has_been_matched=True
+    )
+
+    for owner_id, user_type in owners.values_list('id', 'user_type').iterator():
+        pool = members if user_type == 'applicant' else applicants
+        swiped = set(BCSwipe.objects.filter(swiper_id=owner_id).values_list('target_id', flat=True))
+        BCDeckEntry.objects.bulk_create([
+            BCDeckEntry(owner_id=owner_id, candidate_id=user_id, deck_key=deck_key(owner_id, profile_id))
+            for profile_id, user_id in pool
+            if user_id not in swiped and user_id != owner_id
+        ], batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bc_api', '0004_bcmemberwhitelist'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='bcmemberwhitelist',
+            options={'ordering': ['-added_at'], 'verbose_name': 'BC Member Whitelist Entry', 'verbose_name_plural': 'BC Member Whitelist'},
+        ),
+        migrations.CreateModel(
+            name='BCDeckEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deck_key', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deck_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Deck Entry',
+                'verbose_name_plural': 'Deck Entries',
+                'indexes': [models.Index(fields=['owner', 'deck_key'], name='bc_deck_owner_key_idx')],
+                'unique_together': {('owner', 'candidate')},
+            },
+        ),
+        migrations.RunPython(build_decks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-16 22:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bc_api', '0006_bcidempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bcmessage',
+            index=models.Index(fields=['match', 'id'], name='bc_message_match_id_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.3 on 2026-10-16 22:45
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_read_cursors(apps, schema_editor):
+    """Point each cursor at the newest received message already marked read."""
+    BCMatch = apps.get_model('bc_api', 'BCMatch')
+    BCMessage = apps.get_model('bc_api', 'BCMessage')
+
+    matches = BCMatch.objects.values_list('id', 'applicant__user_id', 'bc_member__user_id')
+    for match_id, applicant_user_id, member_user_id in matches.iterator():
+        read = BCMessage.objects.filter(match_id=match_id, is_read=True)
+        cursors = read.aggregate(
+            applicant=Max('id', filter=~models.Q(sender_id=applicant_user_id)),
+            bc_member=Max('id', filter=~models.Q(sender_id=member_user_id)),
+        )
+        if cursors['applicant'] or cursors['bc_member']:
+            BCMatch.objects.filter(id=match_id).update(
+                applicant_last_read_message_id=cursors['applicant'] or 0,
+                bc_member_last_read_message_id=cursors['bc_member'] or 0,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bc_api', '0007_bcmessage_match_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bcmatch',
+            name='applicant_last_read_message_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bcmatch',
+            name='bc_member_last_read_message_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_read_cursors, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='bcmessage',
+            name='is_read',
+        ),
+    ]
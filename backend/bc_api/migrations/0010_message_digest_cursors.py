@@ -0,0 +1,43 @@
+# Generated by Django 5.1.3 on 2026-10-16 22:49
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def start_after_existing_messages(apps, schema_editor):
+    """Only messages sent after this migration should trigger digests."""
+    BCMatch = apps.get_model('bc_api', 'BCMatch')
+    BCMessage = apps.get_model('bc_api', 'BCMessage')
+    newest = Coalesce(Subquery(
+        BCMessage.objects.filter(match=OuterRef('pk')).order_by('-id').values('id')[:1]
+    ), 0)
+    BCMatch.objects.update(
+        applicant_last_notified_message_id=newest,
+        bc_member_last_notified_message_id=newest,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bc_api', '0009_bcoutboxemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bcmatch',
+            name='applicant_last_notified_message_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bcmatch',
+            name='bc_member_last_notified_message_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='bcmessage',
+            index=models.Index(fields=['sent_at'], name='bc_message_sent_at_idx'),
+        ),
+        migrations.RunPython(start_after_existing_messages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.3 on 2026-10-16 22:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bc_api', '0010_message_digest_cursors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BCStatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Stat Counter',
+                'unique_together': {('metric', 'day')},
+            },
+        ),
+    ]
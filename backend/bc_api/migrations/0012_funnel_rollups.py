@@ -0,0 +1,49 @@
+# Generated by Django 5.1.3 on 2026-10-16 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bc_api', '0011_bcstatcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BCFunnelRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('metric', models.CharField(max_length=50)),
+                ('segment', models.CharField(blank=True, max_length=50)),
+                ('count', models.BigIntegerField(default=0)),
+                ('total_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Funnel Rollup',
+            },
+        ),
+        migrations.CreateModel(
+            name='BCRollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('last_time', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Rollup Watermark',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bcmatch',
+            index=models.Index(fields=['confirmed_at'], name='bc_match_confirmed_at_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='bcfunnelrollup',
+            unique_together={('period', 'bucket', 'metric', 'segment')},
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.3 on 2026-10-16 23:11
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def lowercase_emails(apps, schema_editor):
+    """Lowercase every entry, keeping the oldest of any case-insensitive duplicates."""
+    BCMemberWhitelist = apps.get_model('bc_api', 'BCMemberWhitelist')
+    seen = set()
+    for entry in BCMemberWhitelist.objects.order_by('added_at', 'id'):
+        email = entry.email.strip().lower()
+        if email in seen:
+            entry.delete()
+            continue
+        seen.add(email)
+        if entry.email != email:
+            # Free the lowercase address in case a later duplicate holds it
+            BCMemberWhitelist.objects.filter(email=email).exclude(id=entry.id).delete()
+            entry.email = email
+            entry.save(update_fields=['email'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bc_api', '0012_funnel_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bcmemberwhitelist',
+            constraint=models.CheckConstraint(condition=models.Q(('email', django.db.models.functions.text.Lower('email'))), name='bc_whitelist_email_lowercase'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-16 23:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bc_api', '0013_whitelist_lowercase_emails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
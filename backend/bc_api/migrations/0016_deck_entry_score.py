@@ -0,0 +1,61 @@
+# Generated by Django 5.1.3 on 2026-10-16 23:32
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def tag_set(tags):
+    # Frozen copy of bc_api.ranking.tag_set as of this migration
+    return frozenset(' '.join(str(tag).split()).casefold() for tag in tags or [])
+
+
+def score_entries(apps, schema_editor):
+    """Store the shared-tag score on existing deck rows."""
+    BCDeckEntry = apps.get_model('bc_api', 'BCDeckEntry')
+    rows = (
+        BCDeckEntry.objects.filter(owner__user_type='applicant').values_list(
+            'id', 'owner__applicant_profile__interests', 'candidate__bc_member_profile__areas_of_expertise'
+        ),
+        BCDeckEntry.objects.filter(owner__user_type='bc_member').values_list(
+            'id', 'candidate__applicant_profile__interests', 'owner__bc_member_profile__areas_of_expertise'
+        ),
+    )
+    for queryset in rows:
+        scored = defaultdict(list)
+        for count, (entry_id, interests, expertise) in enumerate(queryset.iterator(chunk_size=BATCH_SIZE), 1):
+            score = len(tag_set(interests) & tag_set(expertise))
+            if score:
+                scored[score].append(entry_id)
+            if count % BATCH_SIZE == 0:
+                for value, entry_ids in scored.items():
+                    BCDeckEntry.objects.filter(id__in=entry_ids).update(score=value)
+                scored.clear()
+        for value, entry_ids in scored.items():
+            BCDeckEntry.objects.filter(id__in=entry_ids).update(score=value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bc_api', '0014_user_photo_variants'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bcdeckentry',
+            name='bc_deck_owner_key_idx',
+        ),
+        migrations.AddField(
+            model_name='bcdeckentry',
+            name='score',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='bcdeckentry',
+            index=models.Index(fields=['owner', '-score', 'deck_key'], name='bc_deck_owner_rank_idx'),
+        ),
+        migrations.RunPython(score_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bc_api', '0016_deck_entry_score'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bcoutboxemail',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('dead', 'Dead Letter')], default='pending', max_length=10),
+        ),
+    ]
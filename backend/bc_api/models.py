@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
 
@@ -25,6 +27,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
     name = models.CharField(max_length=255, blank=True)
     photo_url = models.URLField(max_length=500, blank=True)
+    # Resized copies of an uploaded photo_url (see bc_api.photos)
+    photo_variants = models.JSONField(default=dict, blank=True)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
@@ -150,16 +154,43 @@ class BCMatch(models.Model):
     confirmed_at = models.DateTimeField(null=True, blank=True)
     admin_notes = models.TextField(blank=True, help_text="Internal notes about this match")
 
+    # Read cursors: id of the newest message each participant has read.
+    # Messages from the other side with a higher id are unread.
+    applicant_last_read_message_id = models.PositiveBigIntegerField(default=0)
+    bc_member_last_read_message_id = models.PositiveBigIntegerField(default=0)
+    # Newest message each participant has already been emailed about
+    # (see bc_api.emails.queue_message_digests)
+    applicant_last_notified_message_id = models.PositiveBigIntegerField(default=0)
+    bc_member_last_notified_message_id = models.PositiveBigIntegerField(default=0)
+
     class Meta:
         unique_together = ('applicant', 'bc_member')
         ordering = ['-matched_at']
         verbose_name_plural = 'BC Matches'
+        indexes = [
+            # Incremental funnel rollup of confirmations
+            models.Index(fields=['confirmed_at'], name='bc_match_confirmed_at_idx'),
+        ]
 
     def __str__(self):
         status_icons = {'pending': '⏳', 'confirmed': '✓', 'rejected': '✗', 'completed': '☕'}
         icon = status_icons.get(self.status, '')
         return f"{icon} {self.applicant.user.name} ↔ {self.bc_member.user.name}"
 
+    def read_cursor_field(self, user_id):
+        """Name of the read cursor belonging to participant ``user_id``."""
+        if user_id == self.applicant.user_id:
+            return 'applicant_last_read_message_id'
+        if user_id == self.bc_member.user_id:
+            return 'bc_member_last_read_message_id'
+        return None
+
+    def is_read_by_recipient(self, message):
+        """Whether the participant who didn't send ``message`` has read it."""
+        if message.sender_id == self.applicant.user_id:
+            return message.id <= self.bc_member_last_read_message_id
+        return message.id <= self.applicant_last_read_message_id
+
 
 class BCMessage(models.Model):
     """Messages within a coffee chat match."""
@@ -167,10 +198,15 @@ class BCMessage(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
     sent_at = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['sent_at']
+        indexes = [
+            # Keyset pagination for chat polling (?after_id= / ?before_id=)
+            models.Index(fields=['match', 'id'], name='bc_message_match_id_idx'),
+            # Recent-message scan for email digests
+            models.Index(fields=['sent_at'], name='bc_message_sent_at_idx'),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.name} at {self.sent_at}"
@@ -202,6 +238,9 @@ class BCMemberWhitelist(models.Model):
     Admin adds emails here. When a user logs in via Google OAuth,
     if their email is on this list, they're automatically recognized
     as a BC member and can complete their profile setup.
+
+    Emails are stored lowercased, so lookups use the unique index on
+    ``email`` (see ``bc_api.whitelist`` for the cached check).
     """
     email = models.EmailField(unique=True, help_text="Berkeley email of the BC member")
     name = models.CharField(max_length=255, blank=True, help_text="Optional: BC member's name for reference")
@@ -219,8 +258,174 @@ class BCMemberWhitelist(models.Model):
         verbose_name = "BC Member Whitelist Entry"
         verbose_name_plural = "BC Member Whitelist"
         ordering = ['-added_at']
+        constraints = [
+            models.CheckConstraint(condition=models.Q(email=Lower('email')), name='bc_whitelist_email_lowercase'),
+        ]
+
+    @staticmethod
+    def normalize_email(email):
+        return (email or '').strip().lower()
+
+    def clean(self):
+        # Before the unique check, so "Name@Berkeley.edu" is a duplicate of "name@berkeley.edu"
+        self.email = self.normalize_email(self.email)
+
+    def save(self, *args, **kwargs):
+        self.email = self.normalize_email(self.email)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         if self.name:
             return f"{self.name} ({self.email})"
         return self.email
+
+
+class BCDeckEntry(models.Model):
+    """A candidate the owner can still swipe on.
+
+    This is a materialized copy of the discovery set difference (eligible
+    profiles minus everyone the owner already swiped on). Rows are added when
+    a profile becomes discoverable and removed when the owner swipes or the
+    candidate stops being eligible. See ``bc_api.deck`` for the maintenance
+    helpers and ``manage.py rebuild_decks`` for a full rebuild.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='deck_entries')
+    candidate = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    deck_key = models.BigIntegerField()  # Position in the owner's deck, see bc_api.pagination
+    score = models.PositiveSmallIntegerField(default=0)  # Shared tags, see bc_api.ranking
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('owner', 'candidate')
+        indexes = [
+            # Discover pages: best score first, then the stable deck order
+            models.Index(fields=['owner', '-score', 'deck_key'], name='bc_deck_owner_rank_idx'),
+        ]
+        verbose_name = 'Deck Entry'
+        verbose_name_plural = 'Deck Entries'
+
+    def __str__(self):
+        return f"{self.owner_id} -> {self.candidate_id}"
+
+
+class BCIdempotencyKey(models.Model):
+    """Response recorded for a client-supplied ``Idempotency-Key`` header.
+
+    Retries that reuse the key within ``BC_IDEMPOTENCY_KEY_TTL`` get this
+    response replayed instead of running the request again.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64, help_text="Hash of the method, path and body of the original request")
+    response_status = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'key')
+        verbose_name = 'Idempotency Key'
+
+    def __str__(self):
+        return f"{self.key} ({self.response_status})"
+
+
+class BCOutboxEmail(models.Model):
+    """An email queued for delivery by ``manage.py send_queued_emails``.
+
+    Rows are written in the same transaction as the change they announce, so
+    an email goes out if and only if that change commits, and requests never
+    wait on SMTP. A worker holds a row as ``sending`` while it sends it.
+    Failed sends are retried with exponential backoff; after
+    ``BC_EMAIL_MAX_ATTEMPTS`` the row is parked as ``dead`` for inspection.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),  # Claimed by a worker until next_attempt_at
+        ('sent', 'Sent'),
+        ('dead', 'Dead Letter'),
+    ]
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker's "what is due" scan
+            models.Index(fields=['status', 'next_attempt_at'], name='bc_outbox_due_idx'),
+        ]
+        verbose_name = 'Outbox Email'
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+
+
+class BCStatCounter(models.Model):
+    """Running count behind the admin dashboard (see ``bc_api.stats``).
+
+    One row per metric per day, plus an all-time row per metric dated
+    ``bc_api.stats.ALL_TIME``. Only maintained when ``BC_STATS_COUNTERS`` is
+    enabled.
+    """
+    metric = models.CharField(max_length=50)
+    day = models.DateField()
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('metric', 'day')
+        verbose_name = 'Stat Counter'
+
+    def __str__(self):
+        return f"{self.metric} {self.day}: {self.value}"
+
+
+class BCFunnelRollup(models.Model):
+    """Pre-aggregated recruiting funnel numbers (see ``bc_api.analytics``).
+
+    One row per metric, segment and hour or day. ``count`` counts events;
+    ``total_seconds`` sums the durations of latency metrics, so averages
+    can be taken over any range of buckets.
+    """
+    PERIOD_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField()
+    metric = models.CharField(max_length=50)
+    segment = models.CharField(max_length=50, blank=True)
+    count = models.BigIntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('period', 'bucket', 'metric', 'segment')
+        verbose_name = 'Funnel Rollup'
+
+    def __str__(self):
+        return f"{self.metric} {self.segment} {self.period} {self.bucket:%Y-%m-%d %H:%M}: {self.count}"
+
+
+class BCRollupWatermark(models.Model):
+    """How far each funnel source has been rolled up.
+
+    Append-only sources advance ``last_id``; confirmations, which are
+    updates rather than inserts, advance ``last_time``.
+    """
+    source = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    last_time = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Rollup Watermark'
+
+    def __str__(self):
+        return f"{self.source}: {self.last_id or self.last_time}"
@@ -0,0 +1,354 @@
+"""
+Content-addressed profile photo storage and resized WebP variants.
+
+``store_upload`` streams an upload as is to ``uploads/<aa>/<sha256>.<ext>``,
+``CHUNK_SIZE`` bytes at a time, and the profile points there at first.
+``schedule`` then has a small thread pool, once the request's transaction
+commits, decode it, re-encode it with its EXIF orientation applied and
+without its metadata (Pillow only writes metadata it is given), and publish
+that under the hash of the new bytes, ``profiles/<aa>/<sha256>.<ext>``,
+with one WebP per ``VARIANTS`` entry next to it. Identical photos share
+those files.
+
+Files under ``profiles/`` hold the same bytes from the moment they appear,
+so ``serve_media`` lets browsers cache them for good; pending uploads still
+carry their metadata and are never cached. Uploads and replaced photos
+leave files nobody references; ``manage.py gc_photos`` deletes them
+(``collect_garbage``).
+
+Once published, the photo and its variant URLs are recorded in
+``User.photo_url`` and ``User.photo_variants``, unless the user has moved
+on to another photo meanwhile. ``photo_urls`` only uses the variants while
+``photo_url`` still points at the photo they were made from, and falls
+back to ``photo_url`` itself for Google avatars, admin-entered URLs and
+photos that are still being processed.
+
+Pillow is optional: without it uploads are stored and served unprocessed.
+``manage.py process_photos`` processes earlier uploads.
+"""
+import datetime
+import hashlib
+import io
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.views.static import serve
+
+from .models import User
+
+try:
+    from PIL import Image, ImageOps, ImageSequence
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+logger = logging.getLogger(__name__)
+
+# name: (width, height, crop). Cropped variants are cut to exactly that size,
+# the others are scaled to fit inside it.
+VARIANTS = {
+    'thumbnail': (160, 160, True),
+    'card': (720, 960, False),
+    'full': (1600, 1600, False),
+}
+WEBP_QUALITY = 80
+
+# Refuse to decode anything bigger (about a 48 megapixel camera)
+MAX_PIXELS = 50_000_000
+
+# Formats an upload is re-encoded in once its metadata is stripped; others
+# become PNGs, and multi-picture JPEGs (MPO) plain JPEGs
+ORIGINAL_FORMATS = {'JPEG': {'quality': 90}, 'PNG': {'optimize': True}, 'WEBP': {'quality': 90}, 'GIF': {}}
+
+# Formats whose animations are kept, frame by frame
+ANIMATED_FORMATS = {'GIF', 'WEBP'}
+
+# Read at a time while hashing and storing an upload
+CHUNK_SIZE = 64 * 1024
+
+# Where uploads wait, metadata and all, to be processed
+UPLOADS = 'uploads'
+
+# Stored extension per accepted upload type, and per format once processed
+EXTENSIONS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/gif': '.gif', 'image/webp': '.webp'}
+FORMAT_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+
+CONTENT_ADDRESSED = re.compile(r'^profiles/[0-9a-f]{2}/[0-9a-f]{64}(_[a-z]+)?\.[a-z]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+PENDING = 'no-store'
+
+_executor = None
+
+
+class InvalidPhoto(ValueError):
+    """The upload is not an image Pillow can decode."""
+
+
+def check(upload):
+    """Make sure an upload is a decodable image of sane size.
+
+    Reads only the header; the file is rewound afterwards.
+    """
+    if not HAS_PILLOW:
+        return
+    try:
+        with Image.open(upload) as image:
+            width, height = image.size
+            image.verify()
+    except Exception:
+        raise InvalidPhoto('File is not a valid image')
+    finally:
+        upload.seek(0)
+    if width * height > MAX_PIXELS:
+        raise InvalidPhoto('Image dimensions are too large')
+
+
+def store_upload(upload):
+    """Store an upload as is, named by its hash; returns the storage path.
+
+    The upload is read in ``CHUNK_SIZE`` pieces, once to hash it and once
+    to store it, so it is never held in memory whole. Each upload gets a
+    file of its own (storage adds a suffix to a repeated name); only the
+    processed photo is shared.
+    """
+    extension = EXTENSIONS.get(upload.content_type, '')
+    digest = hashlib.sha256()
+    for chunk in upload.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    digest = digest.hexdigest()
+    upload.seek(0)
+    return default_storage.save(f'{UPLOADS}/{digest[:2]}/{digest}{extension}', upload)
+
+
+def _decode(file):
+    """The photo in ``file``, upright, in RGB(A)."""
+    with Image.open(file) as original:
+        if original.width * original.height > MAX_PIXELS:
+            raise InvalidPhoto('Image dimensions are too large')
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    return image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+
+def strip(file):
+    """``(content, extension)``: ``file`` re-encoded upright, without metadata.
+
+    Animations keep all their frames and timings (but not their
+    orientation), unless they hold more than ``MAX_PIXELS`` altogether;
+    then only the first frame is kept.
+    """
+    with Image.open(file) as original:
+        output_format = 'JPEG' if original.format == 'MPO' else original.format
+        if output_format not in ORIGINAL_FORMATS:
+            output_format = 'PNG'
+        animated = (
+            output_format in ANIMATED_FORMATS
+            and getattr(original, 'is_animated', False)
+            and original.width * original.height * original.n_frames <= MAX_PIXELS
+        )
+        if animated:
+            loop = original.info.get('loop', 0)
+            frames, durations = _frames(original)
+    buffer = io.BytesIO()
+    if animated:
+        frames[0].save(
+            buffer, output_format, save_all=True, append_images=frames[1:], duration=durations, loop=loop,
+            **ORIGINAL_FORMATS[output_format],
+        )
+    else:
+        file.seek(0)
+        image = _decode(file)
+        if output_format == 'JPEG':
+            image = image.convert('RGB')
+        image.save(buffer, output_format, **ORIGINAL_FORMATS[output_format])
+    return buffer.getvalue(), FORMAT_EXTENSIONS[output_format]
+
+
+def _frames(animation):
+    """``(frames, durations)`` of an animation, each frame without metadata."""
+    frames, durations = [], []
+    for frame in ImageSequence.Iterator(animation):
+        durations.append(frame.info.get('duration', 100))
+        frame = frame.convert('RGBA')
+        frame.info = {}
+        frames.append(frame)
+    return frames, durations
+
+
+def schedule(user_id, path):
+    """Process the stored upload at ``path`` for ``user_id`` after commit.
+
+    With ``BC_PHOTO_WORKERS = 0`` the photo is processed in the calling
+    thread instead.
+    """
+    if not HAS_PILLOW:
+        return
+
+    def submit():
+        global _executor
+        if settings.BC_PHOTO_WORKERS <= 0:
+            process(user_id, path)
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.BC_PHOTO_WORKERS, thread_name_prefix='bc-photos')
+        _executor.submit(_process_in_worker, user_id, path)
+
+    transaction.on_commit(submit)
+
+
+def _process_in_worker(user_id, path):
+    try:
+        process(user_id, path)
+    except Exception:
+        logger.exception('Processing photo %s for user %s failed', path, user_id)
+    finally:
+        close_old_connections()
+
+
+def _url(path):
+    return f'{settings.MEDIA_URL}{path}'
+
+
+def _encode(image, size, crop):
+    if crop:
+        resized = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    else:
+        resized = image.copy()
+        resized.thumbnail(size, Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    resized.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def _save(path, content):
+    """Store ``content`` under ``path``, replacing any file there.
+
+    Only through the storage API, so any backend will do. Storages never
+    overwrite, so an existing file is deleted first; the names are
+    content-addressed, so that only happens when variants are regenerated.
+    """
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    saved = default_storage.save(path, ContentFile(content))
+    if saved != path:
+        # Another worker stored the same name meanwhile
+        default_storage.delete(saved)
+
+
+def _publish(path):
+    """Strip the photo at ``path`` and store it under its own hash."""
+    with default_storage.open(path, 'rb') as stored:
+        content, extension = strip(stored)
+    digest = hashlib.sha256(content).hexdigest()
+    published = f'profiles/{digest[:2]}/{digest}{extension}'
+    if not default_storage.exists(published):
+        _save(published, content)
+    return published
+
+
+def process(user_id, path, force=False):
+    """Publish the photo at ``path`` for ``user_id`` with its variants.
+
+    Anything not yet content-addressed (a fresh upload, or a photo stored
+    before photos were published) is stripped and published first. Variants already
+    made for the same photo are reused unless ``force`` is set. Returns the
+    recorded variants, or None if the user has since switched to another
+    photo.
+    """
+    uploaded_url = _url(path)
+    if not CONTENT_ADDRESSED.match(path):
+        path = _publish(path)
+    stem = os.path.splitext(path)[0]
+    variants = {'source': _url(path)}
+    variants.update({name: _url(f'{stem}_{name}.webp') for name in VARIANTS})
+    missing = [name for name in VARIANTS if force or not default_storage.exists(f'{stem}_{name}.webp')]
+    if missing:
+        _write_variants(path, stem, missing)
+    return _record(user_id, uploaded_url, variants)
+
+
+def _write_variants(path, stem, names):
+    with default_storage.open(path, 'rb') as stored:
+        image = _decode(stored)
+    for name in names:
+        width, height, crop = VARIANTS[name]
+        _save(f'{stem}_{name}.webp', _encode(image, (width, height), crop))
+
+
+def _record(user_id, uploaded_url, variants):
+    with transaction.atomic():
+        user = User.objects.select_for_update().filter(id=user_id, photo_url=uploaded_url).first()
+        if user is None:
+            return None
+        user.photo_url = variants['source']
+        user.photo_variants = variants
+        # Through save() so the discovery and login caches pick up the new URLs
+        user.save(update_fields=['photo_url', 'photo_variants'])
+    return variants
+
+
+def photo_urls(user):
+    """``{'thumbnail', 'card', 'full'}`` URLs for a user's photo, or None."""
+    if not user.photo_url:
+        return None
+    variants = user.photo_variants or {}
+    if variants.get('source') == user.photo_url:
+        return {name: variants[name] for name in VARIANTS}
+    return {name: user.photo_url for name in VARIANTS}
+
+
+def serve_media(request, path):
+    """Serve an upload, cacheable for good if it is content-addressed."""
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if CONTENT_ADDRESSED.match(path):
+        response['Cache-Control'] = IMMUTABLE
+    elif path.startswith(f'{UPLOADS}/'):
+        response['Cache-Control'] = PENDING
+    return response
+
+
+def _stored_files(directory):
+    folders, files = default_storage.listdir(directory)
+    for name in files:
+        yield f'{directory}/{name}'
+    for folder in folders:
+        yield from _stored_files(f'{directory}/{folder}')
+
+
+def collect_garbage(min_age=datetime.timedelta(days=1), dry_run=False):
+    """Delete stored photos no user refers to; returns their paths.
+
+    Files younger than ``min_age`` are kept, since an upload is stored
+    before the profile that uses it is saved and processed.
+    """
+    # Listed before the references are read, so a file stored meanwhile is
+    # not mistaken for garbage
+    stored = [
+        path
+        for directory in ('profiles', UPLOADS) if default_storage.exists(directory)
+        for path in _stored_files(directory)
+    ]
+    if not stored:
+        return []
+    referenced = set()
+    for photo_url, variants in User.objects.values_list('photo_url', 'photo_variants').iterator():
+        for url in [photo_url, *(variants or {}).values()]:
+            if url and url.startswith(settings.MEDIA_URL):
+                referenced.add(url[len(settings.MEDIA_URL):])
+
+    cutoff = timezone.now() - min_age
+    deleted = []
+    for path in stored:
+        if path in referenced or default_storage.get_modified_time(path) > cutoff:
+            continue
+        if not dry_run:
+            default_storage.delete(path)
+        deleted.append(path)
+    return deleted
@@ -0,0 +1,41 @@
+"""
+Relevance ranking for the discovery deck.
+
+Candidates are scored by how many tags they share with the viewer:
+applicants' ``interests`` against BC members' ``areas_of_expertise``.
+
+The score of every (owner, candidate) pair is stored on its ``BCDeckEntry``
+when the row is written, and rewritten when either side edits their tags
+(see ``bc_api.deck``), so ``DiscoverView`` pages through a deck in SQL on
+the ``(owner, -score, deck_key)`` index without scoring anything itself.
+"""
+from .models import BCApplicantProfile, BCMemberProfile
+
+SIDES = {
+    'applicant': (BCApplicantProfile, 'interests'),
+    'bc_member': (BCMemberProfile, 'areas_of_expertise'),
+}
+
+
+def normalize_tag(tag):
+    return ' '.join(str(tag).split()).casefold()
+
+
+def tag_set(tags):
+    """Normalized tags of a profile, ready to intersect with another's."""
+    return frozenset(normalize_tag(tag) for tag in tags or [])
+
+
+def score(viewer_tags, candidate_tags):
+    """Number of tags two ``tag_set`` results share."""
+    return len(viewer_tags & candidate_tags)
+
+
+def tags_field(side):
+    """Name of the tag field on profiles of one side of the market."""
+    return SIDES[side][1]
+
+
+def rank_key(score, deck_key):
+    """Sort key for a deck row: best score first, then stable deck order."""
+    return (-score, deck_key)
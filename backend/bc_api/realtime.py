@@ -0,0 +1,288 @@
+"""
+Real-time event delivery for chat.
+
+Events (new messages, match status changes, read receipts) are published to
+per-user channels and streamed to browsers as Server-Sent Events by
+``event_stream`` when the app runs under ASGI (``config.asgi``).
+
+The pub/sub backend is pluggable through ``BC_REALTIME_BACKEND``:
+
+* ``bc_api.realtime.InProcessBroker`` delivers to subscribers in the same
+  process; enough for a single worker.
+* ``bc_api.realtime.PostgresBroker`` fans events out through PostgreSQL
+  ``LISTEN``/``NOTIFY`` so every worker receives every event.
+
+Publishing is always deferred until the surrounding transaction commits, so
+clients never hear about rows they cannot read yet.
+
+Browsers' ``EventSource`` cannot send an ``Authorization`` header, and an API
+token in the URL would end up in access and proxy logs. Clients therefore
+trade their token for a signed *stream ticket* (``issue_ticket``, served by
+``StreamTicketView``) that names the user, expires after
+``BC_STREAM_TICKET_TTL`` seconds and stops working when their logins are
+invalidated, and open the stream with ``?ticket=``.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db import connections, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 100
+TICKET_SALT = 'bc_api.realtime.ticket'
+
+
+class Subscription:
+    """One open event stream: an asyncio queue bound to its event loop."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A stalled client; it will resync from the REST endpoints
+            logger.warning('Dropping realtime event for user %s: queue full', self.user_id)
+
+
+class InProcessBroker:
+    """Delivers events to subscribers living in this process."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_ids, event):
+        self.deliver(user_ids, event)
+
+    def deliver(self, user_ids, event):
+        with self._lock:
+            targets = [sub for user_id in user_ids for sub in self._subscribers.get(user_id, ())]
+        for subscription in targets:
+            subscription.loop.call_soon_threadsafe(subscription.put, event)
+
+
+class PostgresBroker(InProcessBroker):
+    """Fans events out to every worker through PostgreSQL LISTEN/NOTIFY.
+
+    Each process keeps one dedicated listening connection in a background
+    thread and hands incoming notifications to its local subscribers.
+    """
+    CHANNEL = 'bc_api_events'
+    # NOTIFY payloads must stay under 8000 bytes
+    MAX_PAYLOAD = 7900
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, user_ids, event):
+        payload = json.dumps({'users': list(user_ids), 'event': event})
+        if len(payload.encode()) > self.MAX_PAYLOAD:
+            # Too big to NOTIFY; tell clients to refetch instead
+            event = {'type': event['type'], 'data': {'truncated': True, **event.get('ids', {})}}
+            payload = json.dumps({'users': list(user_ids), 'event': event})
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.CHANNEL, payload])
+
+    def subscribe(self, user_id):
+        self._ensure_listener()
+        return super().subscribe(user_id)
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='bc-realtime-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        import psycopg2
+
+        params = connections['default'].get_connection_params()
+        while True:
+            try:
+                conn = psycopg2.connect(**params)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.CHANNEL}')
+                while True:
+                    if select.select([conn], [], [], HEARTBEAT_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        message = json.loads(notify.payload)
+                        self.deliver(message['users'], message['event'])
+            except Exception:
+                logger.exception('Realtime listener lost its connection; reconnecting')
+                time.sleep(1)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.BC_REALTIME_BACKEND)()
+    return _broker
+
+
+def publish(user_ids, event_type, data, ids=None):
+    """Send an event to the given users once the current transaction commits.
+
+    ``ids`` holds the identifiers a client needs to refetch the event over
+    REST if the full payload cannot be delivered.
+    """
+    event = {'type': event_type, 'data': data, 'ids': ids or {}}
+    user_ids = list(user_ids)
+
+    def send():
+        try:
+            get_broker().publish(user_ids, event)
+        except Exception:
+            logger.exception('Failed to publish realtime event %s', event_type)
+
+    transaction.on_commit(send)
+
+
+def match_participant_ids(match):
+    return [match.applicant.user_id, match.bc_member.user_id]
+
+
+def publish_message(message, data):
+    """A new chat message; ``data`` is its serialized form."""
+    publish(
+        match_participant_ids(message.match), 'message.created', data,
+        ids={'match_id': message.match_id, 'message_id': message.id},
+    )
+
+
+def publish_match_status(match):
+    publish(
+        match_participant_ids(match), 'match.status',
+        {'status': match.status, 'confirmed_at': match.confirmed_at.isoformat() if match.confirmed_at else None},
+        ids={'match_id': match.id},
+    )
+
+
+def publish_read_receipt(match, reader, last_read_message_id):
+    """Tell the other participant how far ``reader`` has read."""
+    others = [user_id for user_id in match_participant_ids(match) if user_id != reader.id]
+    publish(
+        others, 'messages.read', {'reader_id': reader.id},
+        ids={'match_id': match.id, 'last_read_message_id': last_read_message_id},
+    )
+
+
+def _format(event):
+    data = {**event.get('ids', {}), **event['data']}
+    return f"event: {event['type']}\ndata: {json.dumps(data)}\n\n"
+
+
+def issue_ticket(user):
+    """Signed, short-lived ticket that opens ``user``'s event stream."""
+    from .caching import auth_generation
+
+    return signing.dumps([user.id, auth_generation(user.id)], salt=TICKET_SALT)
+
+
+def _ticket_user(ticket):
+    from .caching import auth_generation
+    from .models import User
+
+    try:
+        user_id, generation = signing.loads(ticket, salt=TICKET_SALT, max_age=settings.BC_STREAM_TICKET_TTL)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    # Logging out (or any other login invalidation) revokes open tickets
+    if generation != auth_generation(user_id):
+        return None
+    return User.objects.filter(id=user_id, is_active=True).first()
+
+
+@sync_to_async
+def _authenticate(request):
+    """Resolve the user from a stream ticket, a DRF token header or the session."""
+    from rest_framework.exceptions import AuthenticationFailed
+
+    from .authentication import ProfileTokenAuthentication
+
+    ticket = request.GET.get('ticket')
+    if ticket:
+        return _ticket_user(ticket)
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Token '):
+        try:
+            user, _ = ProfileTokenAuthentication().authenticate_credentials(header[len('Token '):].strip())
+        except AuthenticationFailed:
+            return None
+        return user
+    user = request.user
+    return user if user.is_authenticated else None
+
+
+async def event_stream(request):
+    """Stream the caller's events as ``text/event-stream``.
+
+    Browsers' ``EventSource`` cannot set headers, so they pass a stream
+    ticket as ``?ticket=``. A comment line is sent every few seconds to keep
+    proxies from closing an idle stream.
+    """
+    user = await _authenticate(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided.'}, status=401)
+
+    broker = get_broker()
+    subscription = broker.subscribe(user.id)
+
+    async def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield _format(event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
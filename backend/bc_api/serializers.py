@@ -1,13 +1,19 @@
 from rest_framework import serializers
 from .models import User, BCMemberProfile, BCApplicantProfile, BCMatch, BCMessage, BCSwipe
+from .photos import photo_urls
 
 
 class UserSerializer(serializers.ModelSerializer):
+    photo = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ['id', 'email', 'name', 'photo_url', 'user_type', 'has_completed_setup', 'date_joined']
+        fields = ['id', 'email', 'name', 'photo_url', 'photo', 'user_type', 'has_completed_setup', 'date_joined']
         read_only_fields = ['id', 'email', 'date_joined']
 
+    def get_photo(self, obj):
+        return photo_urls(obj)
+
 
 class BCMemberProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -124,13 +130,23 @@ class BCApplicantProfileCreateSerializer(serializers.ModelSerializer):
 
 
 class BCMessageSerializer(serializers.ModelSerializer):
+    """Chat message; ``is_read`` comes from the recipient's read cursor.
+
+    Pass the match (with ``applicant`` and ``bc_member`` loaded) as
+    ``context['match']`` when serializing a page of one conversation.
+    """
     sender_name = serializers.CharField(source='sender.name', read_only=True)
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = BCMessage
         fields = ['id', 'sender', 'sender_name', 'content', 'sent_at', 'is_read']
         read_only_fields = ['id', 'sender', 'sender_name', 'sent_at']
 
+    def get_is_read(self, obj):
+        match = self.context.get('match') or obj.match
+        return match.is_read_by_recipient(obj)
+
 
 class BCMatchSerializer(serializers.ModelSerializer):
     applicant = BCApplicantProfileSerializer(read_only=True)
@@ -144,6 +160,65 @@ class BCMatchSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'matched_at', 'status', 'confirmed_at']
 
 
+class BCMatchSummarySerializer(serializers.ModelSerializer):
+    """Compact match row for the matches tab.
+
+    Expects the queryset annotations added by ``MatchViewSet.summary`` and the
+    viewing user in ``context['user']``.
+    """
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    counterpart = serializers.SerializerMethodField()
+    last_message = serializers.SerializerMethodField()
+    last_message_at = serializers.DateTimeField(read_only=True)
+    unread_count = serializers.IntegerField(read_only=True)
+    last_read_message_id = serializers.SerializerMethodField()
+    counterpart_last_read_message_id = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BCMatch
+        fields = [
+            'id', 'status', 'status_display', 'matched_at', 'confirmed_at',
+            'counterpart', 'last_message', 'last_message_at', 'unread_count',
+            'last_read_message_id', 'counterpart_last_read_message_id'
+        ]
+
+    def _is_applicant(self, obj):
+        return obj.applicant.user_id == self.context['user'].id
+
+    def get_last_read_message_id(self, obj):
+        if self._is_applicant(obj):
+            return obj.applicant_last_read_message_id
+        return obj.bc_member_last_read_message_id
+
+    def get_counterpart_last_read_message_id(self, obj):
+        if self._is_applicant(obj):
+            return obj.bc_member_last_read_message_id
+        return obj.applicant_last_read_message_id
+
+    def get_counterpart(self, obj):
+        if self._is_applicant(obj):
+            profile = obj.bc_member
+        else:
+            profile = obj.applicant
+        return {
+            'id': profile.user.id,
+            'profile_id': profile.id,
+            'name': profile.user.name,
+            'photo_url': profile.user.photo_url,
+            'photo': photo_urls(profile.user),
+        }
+
+    def get_last_message(self, obj):
+        if obj.last_message_id is None:
+            return None
+        return {
+            'id': obj.last_message_id,
+            'sender': obj.last_message_sender_id,
+            'content': obj.last_message_content,
+            'sent_at': serializers.DateTimeField().to_representation(obj.last_message_at),
+        }
+
+
 class BCSwipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = BCSwipe
@@ -154,3 +229,80 @@ class BCSwipeSerializer(serializers.ModelSerializer):
         swiper = self.context['request'].user
         validated_data['swiper'] = swiper
         return super().create(validated_data)
+
+
+class AdminBCMemberSerializer(BCMemberProfileSerializer):
+    """BC member row for admin lists, with approval state."""
+
+    class Meta(BCMemberProfileSerializer.Meta):
+        fields = BCMemberProfileSerializer.Meta.fields + ['is_approved', 'approved_at']
+
+
+class AdminUserSummarySerializer(serializers.ModelSerializer):
+    """The user columns admin lists show next to a profile."""
+    photo = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'email', 'name', 'photo_url', 'photo']
+
+    def get_photo(self, obj):
+        return photo_urls(obj)
+
+
+class AdminBCApplicantSerializer(serializers.ModelSerializer):
+    """Applicant row for admin lists, with only what the list renders."""
+    user = AdminUserSummarySerializer(read_only=True)
+
+    class Meta:
+        model = BCApplicantProfile
+        fields = ['id', 'user', 'role', 'why_bc', 'relevant_experience', 'interests', 'has_been_matched']
+
+
+class AdminBCMatchSerializer(serializers.ModelSerializer):
+    """Match row for admin lists.
+
+    Unlike ``BCMatchSerializer`` it leaves out the chat history and reports
+    ``message_count``/``last_message_at`` annotations instead (see
+    ``AdminAllMatchesView``).
+    """
+    applicant = BCApplicantProfileSerializer(read_only=True)
+    bc_member = BCMemberProfileSerializer(read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    confirmed_by_name = serializers.CharField(source='confirmed_by.name', read_only=True, default=None)
+    message_count = serializers.IntegerField(read_only=True)
+    last_message_at = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = BCMatch
+        fields = [
+            'id', 'applicant', 'bc_member', 'matched_at', 'status', 'status_display',
+            'confirmed_at', 'confirmed_by_name', 'admin_notes', 'message_count', 'last_message_at'
+        ]
+
+
+class WhitelistImportRowSerializer(serializers.Serializer):
+    """One row of a whitelist import (see ``bc_api.imports``)."""
+    email = serializers.EmailField(max_length=254)
+    name = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class MemberImportRowSerializer(WhitelistImportRowSerializer):
+    """One row of a member roster import: whitelist entry, user and profile."""
+    name = serializers.CharField(max_length=255)
+    photo_url = serializers.URLField(max_length=500, required=False, allow_blank=True, default='')
+    year = serializers.ChoiceField(choices=BCMemberProfile.YEAR_CHOICES)
+    major = serializers.CharField(max_length=100)
+    semesters_in_bc = serializers.IntegerField(min_value=0, required=False, default=1)
+    areas_of_expertise = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    availability = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    bio = serializers.CharField(required=False, allow_blank=True, default='')
+    project_experience = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def to_internal_value(self, data):
+        # CSV cells hold lists as "Strategy; Operations"
+        expertise = data.get('areas_of_expertise')
+        if isinstance(expertise, str):
+            data = {**data, 'areas_of_expertise': [item.strip() for item in expertise.split(';') if item.strip()]}
+        return super().to_internal_value(data)
@@ -0,0 +1,163 @@
+"""
+Signal handlers that keep cached discovery data, logins and the whitelist in
+sync with edits, the deck scores in sync with tag edits, and the admin stat
+counters in sync with profile and match changes.
+"""
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import caching, deck, ranking, stats
+from .models import User, BCApplicantProfile, BCMatch, BCMemberProfile, BCMemberWhitelist
+
+
+@receiver([post_save, post_delete], sender=BCApplicantProfile)
+def applicant_profile_changed(sender, instance, **kwargs):
+    caching.invalidate_pool('applicant')
+    caching.invalidate_user(instance.user_id)
+    caching.invalidate_auth(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=BCMemberProfile)
+def member_profile_changed(sender, instance, **kwargs):
+    caching.invalidate_pool('bc_member')
+    caching.invalidate_user(instance.user_id)
+    caching.invalidate_auth(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which discovery never shows
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    caching.invalidate_auth(instance.id)
+    # Name and photo are rendered on every card of this user's side
+    if instance.user_type in caching.VIEWED_SIDE:
+        caching.invalidate_pool(instance.user_type)
+    caching.invalidate_user(instance.id)
+
+
+@receiver([post_save, post_delete], sender=BCMemberWhitelist)
+def whitelist_changed(sender, **kwargs):
+    caching.invalidate_whitelist()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # Logging out deletes the token; cached logins with it must stop working
+    caching.invalidate_auth(instance.user_id)
+
+
+# Deck scores. post_init remembers the tags a profile was loaded with so
+# only saves that change them rescore its deck rows.
+
+def _tags_field(sender):
+    return ranking.tags_field('bc_member' if sender is BCMemberProfile else 'applicant')
+
+
+@receiver(post_init, sender=BCApplicantProfile)
+@receiver(post_init, sender=BCMemberProfile)
+def remember_profile_tags(sender, instance, **kwargs):
+    # Deferred tags stay deferred rather than costing a query per row
+    tags = instance.__dict__.get(_tags_field(sender))
+    instance._deck_tags = None if tags is None else ranking.tag_set(tags)
+
+
+@receiver(post_save, sender=BCApplicantProfile)
+@receiver(post_save, sender=BCMemberProfile)
+def rescore_profile_tags(sender, instance, created, update_fields=None, **kwargs):
+    field = _tags_field(sender)
+    # New profiles are scored as their deck rows are written
+    if created or (update_fields is not None and field not in update_fields):
+        return
+    tags = ranking.tag_set(getattr(instance, field))
+    if tags != instance._deck_tags:
+        deck.profiles_retagged([instance])
+    instance._deck_tags = tags
+
+
+# Stat counters. post_init remembers the state a row was loaded with so a
+# save can tell which counters it moved without querying the old row. Rows
+# loaded with that state deferred (only()/defer()) don't load it per row;
+# a save or delete of one looks it up once instead.
+
+def _load_stored_state(instance, remembered, field, date_field):
+    if getattr(instance, remembered) is not None or instance._state.adding or instance.pk is None:
+        return
+    stored = type(instance)._base_manager.filter(pk=instance.pk).values(field, date_field).first()
+    if stored is None:
+        return
+    setattr(instance, remembered, stored[field])
+    if date_field not in instance.__dict__:
+        setattr(instance, date_field, stored[date_field])
+
+
+@receiver(post_init, sender=BCMemberProfile)
+def remember_member_state(sender, instance, **kwargs):
+    instance._stats_approved = instance.__dict__.get('is_approved')
+
+
+@receiver([pre_save, pre_delete], sender=BCMemberProfile)
+def load_member_state(sender, instance, **kwargs):
+    _load_stored_state(instance, '_stats_approved', 'is_approved', 'created_at')
+
+
+@receiver(post_save, sender=BCMemberProfile)
+def count_member_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        stats.record([(stats.member_metrics(instance.is_approved), instance.created_at, 1)])
+    elif update_fields is not None and 'is_approved' not in update_fields:
+        return
+    elif instance._stats_approved is not None and instance.is_approved != instance._stats_approved:
+        stats.record([
+            (stats.member_metrics(instance._stats_approved), instance.created_at, -1),
+            (stats.member_metrics(instance.is_approved), instance.created_at, 1),
+        ])
+    instance._stats_approved = instance.is_approved
+
+
+@receiver(post_delete, sender=BCMemberProfile)
+def count_member_deleted(sender, instance, **kwargs):
+    if instance._stats_approved is not None:
+        stats.record([(stats.member_metrics(instance._stats_approved), instance.created_at, -1)])
+
+
+@receiver(post_save, sender=BCApplicantProfile)
+def count_applicant_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.record([(stats.applicant_metrics(), instance.created_at, 1)])
+
+
+@receiver(post_delete, sender=BCApplicantProfile)
+def count_applicant_deleted(sender, instance, **kwargs):
+    stats.record([(stats.applicant_metrics(), instance.created_at, -1)])
+
+
+@receiver(post_init, sender=BCMatch)
+def remember_match_state(sender, instance, **kwargs):
+    instance._stats_status = instance.__dict__.get('status')
+
+
+@receiver([pre_save, pre_delete], sender=BCMatch)
+def load_match_state(sender, instance, **kwargs):
+    _load_stored_state(instance, '_stats_status', 'status', 'matched_at')
+
+
+@receiver(post_save, sender=BCMatch)
+def count_match_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        stats.record([(stats.match_metrics(instance.status), instance.matched_at, 1)])
+    elif update_fields is not None and 'status' not in update_fields:
+        return
+    elif instance._stats_status is not None and instance.status != instance._stats_status:
+        stats.record([
+            (stats.match_metrics(instance._stats_status), instance.matched_at, -1),
+            (stats.match_metrics(instance.status), instance.matched_at, 1),
+        ])
+    instance._stats_status = instance.status
+
+
+@receiver(post_delete, sender=BCMatch)
+def count_match_deleted(sender, instance, **kwargs):
+    if instance._stats_status is not None:
+        stats.record([(stats.match_metrics(instance._stats_status), instance.matched_at, -1)])
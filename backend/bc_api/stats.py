@@ -0,0 +1,197 @@
+"""
+Admin dashboard statistics.
+
+Every metric counts profiles or matches in a given state, both overall and
+per day (bucketed by the day the profile or match was created, in the
+project's time zone).
+
+Two sources are supported:
+
+* by default the numbers come from one aggregate query over users and their
+  profiles and matches (plus one grouped query per model for the per-day
+  breakdown);
+* with ``BC_STATS_COUNTERS`` enabled they are read from ``BCStatCounter``
+  rows, which the write paths keep current (signals for ordinary saves and
+  deletes, explicit ``record`` calls for bulk updates). Reading the totals is
+  then a handful of rows regardless of table size. Run
+  ``manage.py rebuild_stat_counters`` after enabling it.
+
+Either way the response is cached for ``BC_ADMIN_STATS_CACHE_TTL`` seconds,
+since the dashboard polls it.
+"""
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import User, BCApplicantProfile, BCMatch, BCMemberProfile, BCStatCounter
+
+METRICS = (
+    'total_members', 'pending_members', 'total_applicants',
+    'total_matches', 'pending_matches', 'confirmed_matches', 'completed_matches',
+)
+
+# Counter rows holding the running totals use this date
+ALL_TIME = datetime.date.min
+
+MAX_DAYS = 365
+
+
+def member_metrics(is_approved):
+    return ['total_members' if is_approved else 'pending_members']
+
+
+def applicant_metrics():
+    return ['total_applicants']
+
+
+def match_metrics(status):
+    metrics = ['total_matches']
+    if f'{status}_matches' in METRICS:
+        metrics.append(f'{status}_matches')
+    return metrics
+
+
+def _day(value):
+    return timezone.localdate(value) if value else timezone.localdate()
+
+
+def compute_totals():
+    """All metrics from a single aggregate query.
+
+    Every profile and match hangs off a user, so one pass over users with
+    their profiles and the applicants' matches LEFT JOINed counts them all;
+    DISTINCT undoes the fan-out from the match join.
+    """
+    members = 'bc_member_profile'
+    matches = 'applicant_profile__matches'
+    return User.objects.aggregate(
+        total_members=Count(members, distinct=True, filter=Q(bc_member_profile__is_approved=True)),
+        pending_members=Count(members, distinct=True, filter=Q(bc_member_profile__is_approved=False)),
+        total_applicants=Count('applicant_profile', distinct=True),
+        total_matches=Count(matches, distinct=True),
+        pending_matches=Count(matches, distinct=True, filter=Q(applicant_profile__matches__status='pending')),
+        confirmed_matches=Count(matches, distinct=True, filter=Q(applicant_profile__matches__status='confirmed')),
+        completed_matches=Count(matches, distinct=True, filter=Q(applicant_profile__matches__status='completed')),
+    )
+
+
+def compute_daily(since=None):
+    """``{day: {metric: count}}`` from grouped queries over the source tables."""
+    daily = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    sources = [
+        (BCMemberProfile.objects, 'created_at', {
+            'total_members': Count('id', filter=Q(is_approved=True)),
+            'pending_members': Count('id', filter=Q(is_approved=False)),
+        }),
+        (BCApplicantProfile.objects, 'created_at', {
+            'total_applicants': Count('id'),
+        }),
+        (BCMatch.objects, 'matched_at', {
+            'total_matches': Count('id'),
+            'pending_matches': Count('id', filter=Q(status='pending')),
+            'confirmed_matches': Count('id', filter=Q(status='confirmed')),
+            'completed_matches': Count('id', filter=Q(status='completed')),
+        }),
+    ]
+    for queryset, field, counts in sources:
+        if since is not None:
+            queryset = queryset.filter(**{f'{field}__date__gte': since})
+        rows = queryset.annotate(day=TruncDate(field)).order_by().values('day').annotate(**counts)
+        for row in rows:
+            day = row.pop('day')
+            daily[day].update(row)
+    return daily
+
+
+def counter_totals():
+    totals = dict.fromkeys(METRICS, 0)
+    totals.update(BCStatCounter.objects.filter(day=ALL_TIME).values_list('metric', 'value'))
+    return totals
+
+
+def counter_daily(since):
+    daily = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    for metric, day, value in BCStatCounter.objects.filter(day__gte=since).values_list('metric', 'day', 'value'):
+        daily[day][metric] = value
+    return daily
+
+
+def get_stats(days=30):
+    """Return ``(totals, daily)`` for the dashboard, from the short-lived cache.
+
+    ``daily`` lists the last ``days`` days, oldest first, skipping empty days.
+    """
+    days = max(1, min(days, MAX_DAYS))
+    source = 'counters' if settings.BC_STATS_COUNTERS else 'aggregate'
+    key = f'bc_api:admin_stats:{source}:{days}'
+
+    def compute():
+        since = timezone.localdate() - datetime.timedelta(days=days - 1)
+        if settings.BC_STATS_COUNTERS:
+            totals, daily = counter_totals(), counter_daily(since)
+        else:
+            totals, daily = compute_totals(), compute_daily(since)
+        return totals, [
+            {'date': day.isoformat(), **counts}
+            for day, counts in sorted(daily.items())
+            if any(counts.values())
+        ]
+
+    return cache.get_or_set(key, compute, settings.BC_ADMIN_STATS_CACHE_TTL)
+
+
+def record(changes):
+    """Apply counter deltas once the current transaction commits.
+
+    ``changes`` is an iterable of ``(metrics, created_at, delta)``; each
+    metric moves by ``delta`` both in its all-time row and in the row for
+    the day ``created_at`` falls on. Nothing happens unless
+    ``BC_STATS_COUNTERS`` is enabled. Deltas are applied after commit so a
+    rolled-back write never counts and the hot all-time rows are only locked
+    for one statement.
+    """
+    if not settings.BC_STATS_COUNTERS:
+        return
+    deltas = defaultdict(int)
+    for metrics, created_at, delta in changes:
+        day = _day(created_at)
+        for metric in metrics:
+            deltas[(metric, ALL_TIME)] += delta
+            deltas[(metric, day)] += delta
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: _apply(deltas))
+
+
+def _apply(deltas):
+    """Upsert ``{(metric, day): delta}`` in one statement."""
+    table = connection.ops.quote_name(BCStatCounter._meta.db_table)
+    rows = ', '.join(['(%s, %s, %s)'] * len(deltas))
+    params = [value for (metric, day), delta in deltas.items() for value in (metric, day, delta)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (metric, day, value) VALUES {rows} '
+            f'ON CONFLICT (metric, day) DO UPDATE SET value = {table}.value + EXCLUDED.value',
+            params,
+        )
+
+
+@transaction.atomic
+def rebuild_counters():
+    """Recompute every counter row from the source tables."""
+    BCStatCounter.objects.all().delete()
+    rows = [BCStatCounter(metric=metric, day=ALL_TIME, value=value) for metric, value in compute_totals().items()]
+    rows += [
+        BCStatCounter(metric=metric, day=day, value=value)
+        for day, counts in compute_daily().items()
+        for metric, value in counts.items()
+        if value
+    ]
+    BCStatCounter.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
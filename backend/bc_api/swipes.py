@@ -0,0 +1,218 @@
+"""
+Swipe recording and mutual-like matching.
+
+A like can only turn into a match when the other side already liked back,
+so two people liking each other at the same moment must not both miss the
+other's swipe. ``record_swipe`` therefore locks both users' rows (in id
+order, so reciprocal swipes cannot deadlock) before inserting the swipe and
+looking for the reciprocal like. The whole path runs in one transaction and
+uses savepoint-guarded inserts, so duplicates surface as ``AlreadySwiped``
+rather than as a 500.
+"""
+from django.db import IntegrityError, transaction
+from django.http import Http404
+
+from . import deck, stats
+from .emails import send_match_notification, send_match_notifications
+from .models import User, BCApplicantProfile, BCMatch, BCMemberProfile, BCSwipe
+
+
+class AlreadySwiped(Exception):
+    """The swiper already has a swipe on this target."""
+
+
+def _profile(user, name):
+    try:
+        return getattr(user, name)
+    except (BCApplicantProfile.DoesNotExist, BCMemberProfile.DoesNotExist):
+        return None
+
+
+def match_pair(swiper, target):
+    """Return ``(applicant_profile, member_profile)`` for a swipe, if any.
+
+    Only an applicant and a BC member can be matched; every other pairing
+    returns ``(None, None)``.
+    """
+    if swiper.user_type == 'applicant':
+        applicant, member = _profile(swiper, 'applicant_profile'), _profile(target, 'bc_member_profile')
+    elif swiper.user_type == 'bc_member':
+        applicant, member = _profile(target, 'applicant_profile'), _profile(swiper, 'bc_member_profile')
+    else:
+        return None, None
+    if applicant is None or member is None:
+        return None, None
+    return applicant, member
+
+
+def create_pending_match(applicant, member):
+    """Insert a pending match, returning None if the pair already has one."""
+    try:
+        with transaction.atomic():
+            match = BCMatch.objects.create(applicant=applicant, bc_member=member, status='pending')
+    except IntegrityError:
+        return None
+    # Queued in this transaction, so they only go out if the match commits
+    send_match_notification(match)
+    return match
+
+
+@transaction.atomic
+def record_swipe(swiper, target_id, direction):
+    """Record a swipe and create the pending match it completes, if any.
+
+    Returns ``(swipe, match)``; ``match`` is None unless this swipe created
+    one. Raises ``Http404`` for an unknown target and ``AlreadySwiped`` for a
+    duplicate.
+    """
+    # One query loads both users and their profiles and, for likes, locks the
+    # pair so a reciprocal like in another transaction waits for this one.
+    users = User.objects.filter(
+        id__in=[swiper.id, target_id]
+    ).select_related('applicant_profile', 'bc_member_profile').order_by('id')
+    if direction == 'like':
+        users = users.select_for_update(of=('self',))
+    users = {user.id: user for user in users}
+
+    target = users.get(int(target_id))
+    if target is None or target.id == swiper.id:
+        raise Http404('No User matches the given query.')
+    swiper = users[swiper.id]
+
+    try:
+        with transaction.atomic():
+            swipe = BCSwipe.objects.create(swiper=swiper, target=target, direction=direction)
+    except IntegrityError:
+        raise AlreadySwiped
+
+    deck.record_swipe(swiper.id, target.id)
+
+    if direction != 'like':
+        return swipe, None
+
+    applicant, member = match_pair(swiper, target)
+    # Applicants who already have a confirmed match can't match again
+    if applicant is None or applicant.has_been_matched:
+        return swipe, None
+
+    mutual_like = BCSwipe.objects.filter(swiper=target, target=swiper, direction='like').exists()
+    if not mutual_like:
+        return swipe, None
+
+    # NOTE: applicant is NOT marked as matched yet; admin does that on confirm
+    return swipe, create_pending_match(applicant, member)
+
+
+def _insert_swipes(swiper, targets):
+    # A conflict means a concurrent request from the same user got there
+    # first; keep the swipes that are still new and report the rest as
+    # duplicates. Every attempt has its own savepoint, so losing the race
+    # again doesn't abort the surrounding transaction. Each genuine retry
+    # drops at least one target, which bounds the attempts.
+    for _ in range(len(targets)):
+        try:
+            with transaction.atomic():
+                return BCSwipe.objects.bulk_create(targets)
+        except IntegrityError:
+            existing = set(BCSwipe.objects.filter(
+                swiper=swiper, target_id__in=[swipe.target_id for swipe in targets]
+            ).values_list('target_id', flat=True))
+            targets = [swipe for swipe in targets if swipe.target_id not in existing]
+    with transaction.atomic():
+        return BCSwipe.objects.bulk_create(targets)
+
+
+def _insert_matches(pairs):
+    """Bulk-insert pending matches for ``(applicant, member)`` pairs."""
+    existing = set(BCMatch.objects.filter(
+        applicant_id__in={applicant.id for applicant, _ in pairs},
+        bc_member_id__in={member.id for _, member in pairs},
+    ).values_list('applicant_id', 'bc_member_id'))
+    new_matches = [
+        BCMatch(applicant=applicant, bc_member=member, status='pending')
+        for applicant, member in pairs
+        if (applicant.id, member.id) not in existing
+    ]
+    if not new_matches:
+        return []
+    try:
+        with transaction.atomic():
+            matches = BCMatch.objects.bulk_create(new_matches)
+    except IntegrityError:
+        # Lost a race for some pair; fall back to one conflict-safe insert each
+        matches = (create_pending_match(match.applicant, match.bc_member) for match in new_matches)
+        return [match for match in matches if match is not None]
+    send_match_notifications(matches)
+    # bulk_create skips the signals that normally keep counters current
+    stats.record([(stats.match_metrics('pending'), match.matched_at, 1) for match in matches])
+    return matches
+
+
+@transaction.atomic
+def record_swipes(swiper, items):
+    """Record a burst of swipes with a fixed number of queries.
+
+    ``items`` is a list of ``(target_id, direction)`` pairs that have already
+    been validated. Returns one result dict per item, in order, with a
+    ``status`` of ``'created'``, ``'already_swiped'`` or ``'not_found'`` and
+    the id of the pending match the swipe created, if any.
+    """
+    target_ids = {target_id for target_id, _ in items}
+    users = User.objects.filter(
+        id__in=target_ids | {swiper.id}
+    ).select_related('applicant_profile', 'bc_member_profile').order_by('id')
+    if any(direction == 'like' for _, direction in items):
+        users = users.select_for_update(of=('self',))
+    users = {user.id: user for user in users}
+    swiper = users[swiper.id]
+
+    already_swiped = set(BCSwipe.objects.filter(
+        swiper=swiper, target_id__in=target_ids
+    ).values_list('target_id', flat=True))
+
+    statuses = []
+    new_swipes = {}
+    for target_id, direction in items:
+        if target_id not in users or target_id == swiper.id:
+            statuses.append('not_found')
+        elif target_id in already_swiped or target_id in new_swipes:
+            statuses.append('already_swiped')
+        else:
+            new_swipes[target_id] = BCSwipe(swiper=swiper, target=users[target_id], direction=direction)
+            statuses.append('created')
+
+    created = {swipe.target_id for swipe in _insert_swipes(swiper, list(new_swipes.values()))}
+    deck.record_swipes(swiper.id, created)
+
+    # Resolve every reciprocal like for the batch in one query
+    liked = [target_id for target_id in created if new_swipes[target_id].direction == 'like']
+    mutual = set(BCSwipe.objects.filter(
+        swiper_id__in=liked, target=swiper, direction='like'
+    ).values_list('swiper_id', flat=True)) if liked else set()
+
+    pairs = {}
+    for target_id in mutual:
+        applicant, member = match_pair(swiper, users[target_id])
+        if applicant is not None and not applicant.has_been_matched:
+            pairs[target_id] = (applicant, member)
+    matches = {
+        (match.applicant_id, match.bc_member_id): match
+        for match in (_insert_matches(list(pairs.values())) if pairs else [])
+    }
+
+    results = []
+    for (target_id, direction), item_status in zip(items, statuses):
+        if item_status == 'created' and target_id not in created:
+            item_status = 'already_swiped'
+        match = None
+        if item_status == 'created' and target_id in pairs:
+            applicant, member = pairs[target_id]
+            match = matches.get((applicant.id, member.id))
+        results.append({
+            'target_id': target_id,
+            'direction': direction,
+            'status': item_status,
+            'match_created': match is not None,
+            'match_id': match.id if match else None,
+        })
+    return results
@@ -1,3 +1,1523 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import io
+import json
+import tempfile
+import threading
+import unittest
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.db.models import Sum
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from . import analytics, assignment, caching, deck, exports, imports, photos, ranking, realtime, stats, whitelist
+from .authentication import token_cache
+from .models import (
+    User, BCApplicantProfile, BCDeckEntry, BCFunnelRollup, BCMatch, BCMemberProfile, BCMemberWhitelist, BCMessage,
+    BCOutboxEmail, BCSwipe,
+)
+from .emails import deliver_queued_emails, queue_emails, queue_message_digests
+from .pagination import AdminCursorPagination
+from .swipes import record_swipe
+from .views import AdminAllApplicantsView
+
+if photos.HAS_PILLOW:
+    from PIL import Image, ImageSequence
+
+
+def make_member(email, **kwargs):
+    user = User.objects.create_user(email, name=email.split('@')[0], user_type='bc_member', has_completed_setup=True)
+    BCMemberProfile.objects.create(
+        user=user, year='Junior', major='Economics', availability='Mornings', bio='Hi',
+        is_approved=True, **kwargs
+    )
+    return user
+
+
+def make_applicant(email, **kwargs):
+    user = User.objects.create_user(email, name=email.split('@')[0], user_type='applicant', has_completed_setup=True)
+    BCApplicantProfile.objects.create(
+        user=user, role='Sophomore', why_bc='Consulting', relevant_experience='None', **kwargs
+    )
+    return user
+
+
+class DiscoverPagingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.members = [make_member(f'member{i}@berkeley.edu') for i in range(7)]
+        self.applicant = make_applicant('applicant@berkeley.edu')
+        deck.build_deck(self.applicant)
+        self.client = APIClient()
+        self.client.force_authenticate(self.applicant)
+
+    def pages(self, limit=3):
+        ids, cursor = [], None
+        while True:
+            params = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/api/discover/', params)
+            self.assertEqual(response.status_code, 200)
+            ids.append([profile['user']['id'] for profile in response.data['profiles']])
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_cursor_pages_cover_the_deck_once_in_a_stable_order(self):
+        pages = self.pages()
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        flat = [user_id for page in pages for user_id in page]
+        self.assertEqual(sorted(flat), sorted(member.id for member in self.members))
+        cache.clear()
+        self.assertEqual(self.pages(), pages)
+
+    def test_swipes_between_pages_do_not_shift_the_next_page(self):
+        first = self.client.get('/api/discover/', {'limit': 3}).data
+        expected = self.pages()[1]
+        for user_id in [profile['user']['id'] for profile in first['profiles']]:
+            self.client.post('/api/swipe/', {'target_id': user_id, 'direction': 'pass'}, format='json')
+        second = self.client.get('/api/discover/', {'limit': 3, 'cursor': first['next_cursor']}).data
+        self.assertEqual([profile['user']['id'] for profile in second['profiles']], expected)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/discover/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+
+class DeckMaintenanceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin@berkeley.edu', 'pw')
+        self.members = [make_member(f'member{i}@berkeley.edu') for i in range(3)]
+        self.applicants = [make_applicant(f'applicant{i}@berkeley.edu') for i in range(2)]
+        deck.rebuild_all_decks()
+
+    def deck_of(self, user):
+        return set(BCDeckEntry.objects.filter(owner=user).values_list('candidate_id', flat=True))
+
+    def as_user(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_new_applicant_profile_joins_every_deck(self):
+        user = User.objects.create_user('new@berkeley.edu', name='new', user_type='applicant')
+        response = self.as_user(user).post('/api/applicants/', {
+            'name': 'new', 'role': 'Sophomore', 'why_bc': 'Consulting', 'relevant_experience': 'None', 'interests': [],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.deck_of(user), {member.id for member in self.members})
+        for member in self.members:
+            self.assertIn(user.id, self.deck_of(member))
+
+    def test_approved_member_joins_applicant_decks(self):
+        pending = make_member('pending@berkeley.edu')
+        BCMemberProfile.objects.filter(user=pending).update(is_approved=False)
+        deck.rebuild_all_decks()
+        self.assertNotIn(pending.id, self.deck_of(self.applicants[0]))
+        response = self.as_user(self.admin).post(
+            f'/api/admin/members/{pending.bc_member_profile.id}/approve/', {'action': 'approve'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        for applicant in self.applicants:
+            self.assertIn(pending.id, self.deck_of(applicant))
+
+    def test_swipe_removes_only_that_card(self):
+        applicant, member = self.applicants[0], self.members[0]
+        self.as_user(applicant).post('/api/swipe/', {'target_id': member.id, 'direction': 'pass'}, format='json')
+        self.assertEqual(self.deck_of(applicant), {m.id for m in self.members[1:]})
+        self.assertIn(applicant.id, self.deck_of(member))
+
+    def test_confirmed_applicant_leaves_every_deck(self):
+        applicant, member = self.applicants[0], self.members[0]
+        match = BCMatch.objects.create(applicant=applicant.applicant_profile, bc_member=member.bc_member_profile)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.as_user(self.admin).post(f'/api/admin/matches/{match.id}/approve/', {'action': 'confirm'}, format='json')
+        self.assertEqual(self.deck_of(applicant), set())
+        self.assertFalse(BCDeckEntry.objects.filter(candidate=applicant).exists())
+
+    def test_incremental_decks_match_a_full_rebuild(self):
+        self.as_user(self.applicants[1]).post('/api/swipe/', {'target_id': self.members[2].id, 'direction': 'like'}, format='json')
+        make_member('late@berkeley.edu')
+        deck.profile_became_discoverable(User.objects.get(email='late@berkeley.edu').bc_member_profile)
+        incremental = set(BCDeckEntry.objects.values_list('owner_id', 'candidate_id', 'deck_key', 'score'))
+        deck.rebuild_all_decks()
+        self.assertEqual(set(BCDeckEntry.objects.values_list('owner_id', 'candidate_id', 'deck_key', 'score')), incremental)
+
+
+class DiscoverRankingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.strong = make_member('strong@berkeley.edu', areas_of_expertise=['Strategy', 'Finance'])
+        self.weak = make_member('weak@berkeley.edu', areas_of_expertise=['finance'])
+        self.others = [make_member(f'other{i}@berkeley.edu', areas_of_expertise=['Design']) for i in range(3)]
+        self.applicant = make_applicant('applicant@berkeley.edu', interests=['strategy', ' Finance '])
+        deck.rebuild_all_decks()
+        self.client = APIClient()
+        self.client.force_authenticate(self.applicant)
+
+    def card_ids(self):
+        cache.clear()
+        return [profile['user']['id'] for profile in self.client.get('/api/discover/').data['profiles']]
+
+    def test_best_overlap_comes_first_then_deck_order(self):
+        ids = self.card_ids()
+        self.assertEqual(ids[:2], [self.strong.id, self.weak.id])
+        rest = BCDeckEntry.objects.filter(owner=self.applicant, score=0).order_by('deck_key')
+        self.assertEqual(ids[2:], list(rest.values_list('candidate_id', flat=True)))
+
+    def test_tag_edits_rescore_both_sides(self):
+        profile = self.weak.bc_member_profile
+        profile.areas_of_expertise = ['Strategy', 'Finance', 'Design']
+        profile.save()
+        self.assertEqual(BCDeckEntry.objects.get(owner=self.applicant, candidate=self.weak).score, 2)
+
+        applicant = self.applicant.applicant_profile
+        applicant.interests = ['design']
+        applicant.save()
+        scores = dict(BCDeckEntry.objects.filter(owner=self.applicant).values_list('candidate_id', 'score'))
+        self.assertEqual(scores[self.strong.id], 0)
+        self.assertEqual(scores[self.weak.id], 1)
+        self.assertEqual({scores[other.id] for other in self.others}, {1})
+        self.assertEqual(BCDeckEntry.objects.get(owner=self.others[0], candidate=self.applicant).score, 1)
+
+    def test_page_is_one_indexed_query_whatever_the_deck_size(self):
+        first = self.client.get('/api/discover/', {'limit': 2}).data
+        cache.clear()
+        # deck page + profiles, whatever the cursor
+        with self.assertNumQueries(2):
+            self.client.get('/api/discover/', {'limit': 2, 'cursor': first['next_cursor']})
+
+
+class DiscoverCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.members = [make_member(f'member{i}@berkeley.edu') for i in range(3)]
+        self.applicant = make_applicant('applicant@berkeley.edu')
+        deck.rebuild_all_decks()
+        self.client = APIClient()
+        self.client.force_authenticate(self.applicant)
+
+    def card_ids(self):
+        return [profile['user']['id'] for profile in self.client.get('/api/discover/').data['profiles']]
+
+    def test_repeat_page_is_served_from_cache(self):
+        first = self.card_ids()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.card_ids(), first)
+
+    def test_swipe_invalidates_the_cached_page(self):
+        first = self.card_ids()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/swipe/', {'target_id': first[0], 'direction': 'pass'}, format='json')
+            # Generations move once the swipe commits, not before
+            self.assertEqual(self.card_ids(), first)
+        self.assertEqual(self.card_ids(), first[1:])
+
+    def test_profile_edit_invalidates_other_users_pages(self):
+        self.card_ids()
+        member = self.members[0]
+        member.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            member.save()
+        names = {profile['user']['id']: profile['user']['name'] for profile in self.client.get('/api/discover/').data['profiles']}
+        self.assertEqual(names[member.id], 'Renamed')
+
+
+class SwipeViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.member = make_member('member@berkeley.edu')
+        self.applicant = make_applicant('applicant@berkeley.edu')
+
+    def swipe(self, user, target, direction='like'):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post('/api/swipe/', {'target_id': target.id, 'direction': direction}, format='json')
+
+    def test_like_without_reciprocal_like_query_budget(self):
+        # savepoint, lock both users, savepoint + insert + release,
+        # deck delete, reciprocal-like check, release
+        with self.assertNumQueries(8):
+            response = self.swipe(self.applicant, self.member)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['match_created'])
+
+    def test_reciprocal_like_creates_pending_match_within_budget(self):
+        self.swipe(self.member, self.applicant)
+        # ...plus savepoint + insert + release for the match, one insert
+        # queueing both emails and one query for the (empty) message list
+        # in the response
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(13):
+            response = self.swipe(self.applicant, self.member)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['match_created'])
+        match = BCMatch.objects.get()
+        self.assertEqual(match.status, 'pending')
+        self.assertEqual(match.applicant.user, self.applicant)
+        self.assertEqual(BCOutboxEmail.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_pass_never_creates_match(self):
+        self.swipe(self.member, self.applicant)
+        response = self.swipe(self.applicant, self.member, 'pass')
+        self.assertFalse(response.data['match_created'])
+        self.assertFalse(BCMatch.objects.exists())
+
+    def test_duplicate_swipe_is_rejected(self):
+        self.swipe(self.applicant, self.member)
+        response = self.swipe(self.applicant, self.member)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(BCSwipe.objects.count(), 1)
+
+    def test_unknown_target_is_404(self):
+        client = APIClient()
+        client.force_authenticate(self.applicant)
+        response = client.post('/api/swipe/', {'target_id': 999999, 'direction': 'like'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_existing_match_is_not_duplicated(self):
+        BCMatch.objects.create(
+            applicant=self.applicant.applicant_profile,
+            bc_member=self.member.bc_member_profile,
+            status='rejected',
+        )
+        self.swipe(self.member, self.applicant)
+        response = self.swipe(self.applicant, self.member)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['match_created'])
+        self.assertEqual(BCMatch.objects.count(), 1)
+
+    def test_matched_applicant_cannot_match_again(self):
+        profile = self.applicant.applicant_profile
+        profile.has_been_matched = True
+        profile.save()
+        self.swipe(self.member, self.applicant)
+        response = self.swipe(self.applicant, self.member)
+        self.assertFalse(response.data['match_created'])
+
+
+class SwipeBatchViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.applicant = make_applicant('applicant@berkeley.edu')
+        self.members = [make_member(f'member{i}@berkeley.edu') for i in range(50)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.applicant)
+
+    def post(self, swipes):
+        return self.client.post('/api/swipe/batch/', {'swipes': swipes}, format='json')
+
+    def test_batch_query_count_does_not_grow_with_batch_size(self):
+        # Half of the members already liked the applicant back
+        for member in self.members[:25]:
+            BCSwipe.objects.create(swiper=member, target=self.applicant, direction='like')
+        swipes = [{'target_id': member.id, 'direction': 'like'} for member in self.members]
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(14):
+            response = self.post(swipes)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['matches_created'], 25)
+        self.assertEqual(BCMatch.objects.filter(status='pending').count(), 25)
+        self.assertEqual(BCSwipe.objects.filter(swiper=self.applicant).count(), 50)
+        self.assertEqual(BCOutboxEmail.objects.count(), 50)
+
+    def test_per_item_results(self):
+        BCSwipe.objects.create(swiper=self.applicant, target=self.members[0], direction='pass')
+        response = self.post([
+            {'target_id': self.members[0].id, 'direction': 'like'},
+            {'target_id': self.members[1].id, 'direction': 'pass'},
+            {'target_id': self.members[1].id, 'direction': 'like'},
+            {'target_id': 999999, 'direction': 'like'},
+        ])
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['already_swiped', 'created', 'already_swiped', 'not_found'],
+        )
+
+    def test_repeated_conflicts_only_retry_the_insert(self):
+        bulk_create = BCSwipe.objects.bulk_create
+        conflicts = [IntegrityError('duplicate'), IntegrityError('duplicate')]
+
+        def racing(swipes, **kwargs):
+            # Two concurrent requests in a row win the race
+            if conflicts:
+                raise conflicts.pop()
+            return bulk_create(swipes, **kwargs)
+
+        with mock.patch.object(BCSwipe.objects, 'bulk_create', side_effect=racing):
+            response = self.post([{'target_id': member.id, 'direction': 'pass'} for member in self.members[:3]])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.data['results']], ['created'] * 3)
+
+    def test_malformed_batch_is_rejected(self):
+        response = self.post([{'target_id': self.members[0].id, 'direction': 'maybe'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(BCSwipe.objects.exists())
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.member = make_member('member@berkeley.edu')
+        self.applicant = make_applicant('applicant@berkeley.edu')
+        BCSwipe.objects.create(swiper=self.member, target=self.applicant, direction='like')
+        self.client = APIClient()
+        self.client.force_authenticate(self.applicant)
+
+    def swipe(self, key, direction='like'):
+        return self.client.post(
+            '/api/swipe/', {'target_id': self.member.id, 'direction': direction},
+            format='json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_original_response_without_side_effects(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.swipe('retry-1')
+        with self.captureOnCommitCallbacks(execute=True):
+            retry = self.swipe('retry-1')
+
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertTrue(retry.data['match_created'])
+        self.assertEqual(BCMatch.objects.count(), 1)
+        self.assertEqual(BCOutboxEmail.objects.count(), 2)
+
+    def test_without_key_duplicate_is_still_an_error(self):
+        self.swipe('')
+        response = self.swipe('')
+        self.assertEqual(response.status_code, 400)
+
+    def test_key_reused_for_a_different_request_is_rejected(self):
+        self.swipe('retry-2')
+        response = self.swipe('retry-2', direction='pass')
+        self.assertEqual(response.status_code, 422)
+
+
+@unittest.skipUnless(photos.HAS_PILLOW, 'Pillow is not installed')
+@override_settings(BC_PHOTO_WORKERS=0)
+class PhotoPipelineTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.user = make_applicant('applicant@berkeley.edu')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content, name='photo.jpg', content_type='image/jpeg'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/upload-photo/', {
+                'photo': SimpleUploadedFile(name, content, content_type=content_type),
+            })
+
+    def jpeg(self):
+        # Landscape pixels with EXIF saying "rotate 90 degrees" and a GPS tag
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x8825] = {2: (37.0, 52.0, 10.0)}
+        buffer = io.BytesIO()
+        Image.new('RGB', (2000, 1500), 'red').save(buffer, 'JPEG', exif=exif)
+        return buffer.getvalue()
+
+    def test_upload_makes_oriented_webp_variants_without_metadata(self):
+        response = self.upload(self.jpeg())
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertRegex(self.user.photo_url, r'^/media/profiles/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        self.assertEqual(self.user.photo_variants['source'], self.user.photo_url)
+
+        photo = self.client.get('/api/me/').data['photo']
+        sizes = {}
+        for name, url in photo.items():
+            with default_storage.open(url[len(settings.MEDIA_URL):]) as stored, Image.open(stored) as image:
+                self.assertEqual(image.format, 'WEBP')
+                self.assertNotIn('exif', image.info)
+                sizes[name] = image.size
+        self.assertEqual(sizes, {'thumbnail': (160, 160), 'card': (720, 960), 'full': (1200, 1600)})
+
+        with default_storage.open(self.user.photo_url[len(settings.MEDIA_URL):]) as stored, Image.open(stored) as image:
+            self.assertEqual(image.size, (1500, 2000))
+            self.assertFalse(image.getexif())
+
+    def test_upload_is_stored_as_is_and_never_cached_until_published(self):
+        content = self.jpeg()
+        with mock.patch.object(photos, 'schedule'), mock.patch.object(photos, '_decode') as decode:
+            response = self.upload(content)
+        decode.assert_not_called()
+        path = response.data['photo_url'][len(settings.MEDIA_URL):]
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(path, f'uploads/{digest[:2]}/{digest}.jpg')
+        with default_storage.open(path) as stored:
+            self.assertEqual(stored.read(), content)
+        response = photos.serve_media(RequestFactory().get(f'/media/{path}'), path)
+        self.assertEqual(response['Cache-Control'], photos.PENDING)
+
+        photos.process(self.user.id, path)
+        self.user.refresh_from_db()
+        published = self.user.photo_url[len(settings.MEDIA_URL):]
+        with default_storage.open(published) as stored:
+            self.assertIn(hashlib.sha256(stored.read()).hexdigest(), published)
+
+        # A user who has moved on to another photo keeps it
+        self.user.photo_url = 'https://lh3.googleusercontent.com/a/photo'
+        self.user.save()
+        self.assertIsNone(photos.process(self.user.id, path))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.photo_url, 'https://lh3.googleusercontent.com/a/photo')
+
+    def test_identical_uploads_share_content_addressed_files(self):
+        content = self.jpeg()
+        first = self.upload(content).data['photo_url']
+        other = make_member('member@berkeley.edu')
+        self.client.force_authenticate(other)
+        with mock.patch.object(photos, '_write_variants') as write_variants:
+            second = self.upload(content).data['photo_url']
+        self.assertNotEqual(second, first)
+        write_variants.assert_not_called()
+        other.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(other.photo_url, self.user.photo_url)
+        self.assertEqual(other.photo_variants, self.user.photo_variants)
+
+        path = self.user.photo_variants['card'][len(settings.MEDIA_URL):]
+        response = photos.serve_media(RequestFactory().get(f'/media/{path}'), path)
+        self.assertEqual(response['Cache-Control'], photos.IMMUTABLE)
+
+    def test_garbage_collection_keeps_only_referenced_files(self):
+        uploads = [self.upload(self.jpeg()).data['photo_url']]
+        self.user.refresh_from_db()
+        old = self.user.photo_variants
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 400), 'blue').save(buffer, 'PNG')
+        uploads.append(self.upload(buffer.getvalue(), name='new.png', content_type='image/png').data['photo_url'])
+        self.user.refresh_from_db()
+        new = self.user.photo_url
+
+        self.assertEqual(photos.collect_garbage(), [])
+        deleted = photos.collect_garbage(min_age=timedelta(0))
+        self.assertEqual(sorted(deleted), sorted(url[len(settings.MEDIA_URL):] for url in [*old.values(), *uploads]))
+        self.assertTrue(default_storage.exists(new[len(settings.MEDIA_URL):]))
+        self.assertEqual(self.user.photo_variants['card'], new.replace('.png', '_card.webp'))
+
+    def test_animations_keep_their_frames_but_not_their_metadata(self):
+        frames = [Image.new('RGB', (40, 30), colour) for colour in ('red', 'green', 'blue')]
+        buffer = io.BytesIO()
+        frames[0].save(buffer, 'GIF', save_all=True, append_images=frames[1:], duration=[100, 200, 300], loop=0, comment=b'Somewhere in Berkeley')
+        self.upload(buffer.getvalue(), name='wave.gif', content_type='image/gif')
+        self.user.refresh_from_db()
+        with default_storage.open(self.user.photo_url[len(settings.MEDIA_URL):]) as stored:
+            content = stored.read()
+        self.assertNotIn(b'Berkeley', content)
+        with Image.open(io.BytesIO(content)) as image:
+            self.assertEqual(image.n_frames, 3)
+            durations = [frame.info['duration'] for frame in ImageSequence.Iterator(image)]
+        self.assertEqual(durations, [100, 200, 300])
+
+    @override_settings(STORAGES={**settings.STORAGES, 'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'}})
+    def test_processing_works_on_storages_without_local_paths(self):
+        self.upload(self.jpeg())
+        self.user.refresh_from_db()
+        variants = photos.process(self.user.id, self.user.photo_url[len(settings.MEDIA_URL):], force=True)
+        self.assertEqual(variants, self.user.photo_variants)
+        for url in variants.values():
+            self.assertTrue(default_storage.exists(url[len(settings.MEDIA_URL):]))
+
+    def test_other_photo_urls_are_served_as_is(self):
+        self.user.photo_url = 'https://lh3.googleusercontent.com/a/photo'
+        self.user.save()
+        photo = self.client.get('/api/me/').data['photo']
+        self.assertEqual(set(photo.values()), {'https://lh3.googleusercontent.com/a/photo'})
+
+    def test_rejects_files_that_are_not_images(self):
+        response = self.upload(b'not an image')
+        self.assertEqual(response.status_code, 400)
+
+
+@unittest.skipUnless(photos.HAS_PILLOW, 'Pillow is not installed')
+@override_settings(BC_PHOTO_WORKERS=0)
+class PhotoUploadCommitTests(TransactionTestCase):
+    jpeg = PhotoPipelineTests.jpeg
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+    def test_variants_are_recorded_without_a_surrounding_transaction(self):
+        # on_commit runs at once here, as in a view without ATOMIC_REQUESTS
+        user = make_applicant('applicant@berkeley.edu')
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post('/api/upload-photo/', {
+            'photo': SimpleUploadedFile('photo.jpg', self.jpeg(), content_type='image/jpeg'),
+        })
+        user.refresh_from_db()
+        self.assertNotEqual(user.photo_url, response.data['photo_url'])
+        self.assertTrue(user.photo_url.startswith('/media/profiles/'))
+        self.assertEqual(user.photo_variants['source'], user.photo_url)
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        queue_emails([(f'user{i}@berkeley.edu', 'Hello', 'Body') for i in range(3)])
+
+    def test_worker_sends_batch_over_one_connection(self):
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open') as open_connection:
+            self.assertEqual(deliver_queued_emails(batch_size=2), (2, 0))
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual(deliver_queued_emails(), (1, 0))
+        self.assertEqual(deliver_queued_emails(), (0, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(BCOutboxEmail.objects.exclude(status='sent').exists())
+
+    @override_settings(BC_EMAIL_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_dead_letter(self):
+        failing = mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('SMTP down'))
+        with failing:
+            self.assertEqual(deliver_queued_emails(), (0, 3))
+        email = BCOutboxEmail.objects.first()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        # Not due yet
+        self.assertEqual(deliver_queued_emails(), (0, 0))
+
+        BCOutboxEmail.objects.update(next_attempt_at=timezone.now())
+        with failing:
+            deliver_queued_emails()
+        self.assertEqual(BCOutboxEmail.objects.filter(status='dead').count(), 3)
+        self.assertIn('SMTP down', BCOutboxEmail.objects.first().last_error)
+
+
+class OutboxLeaseTests(TransactionTestCase):
+    def setUp(self):
+        queue_emails([(f'user{i}@berkeley.edu', 'Hello', 'Body') for i in range(2)])
+
+    def test_smtp_runs_outside_the_claim_transaction(self):
+        seen = []
+
+        def send(message):
+            seen.append((connection.in_atomic_block, set(BCOutboxEmail.objects.values_list('status', flat=True))))
+            return 1
+
+        with mock.patch('django.core.mail.EmailMessage.send', autospec=True, side_effect=send):
+            self.assertEqual(deliver_queued_emails(), (2, 0))
+        self.assertEqual(seen, [(False, {'sending'})] * 2)
+        self.assertEqual(set(BCOutboxEmail.objects.values_list('status', 'attempts')), {('sent', 1)})
+
+    def test_expired_lease_is_claimed_again(self):
+        BCOutboxEmail.objects.update(status='sending', attempts=1, next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(deliver_queued_emails(), (2, 0))
+        self.assertEqual(set(BCOutboxEmail.objects.values_list('status', 'attempts')), {('sent', 2)})
+
+    def test_held_lease_is_left_alone(self):
+        BCOutboxEmail.objects.update(status='sending', next_attempt_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(deliver_queued_emails(), (0, 0))
+
+    def test_results_skip_rows_another_worker_took_over(self):
+        def send(message):
+            # The lease ran out mid-batch and another worker claimed the rows
+            BCOutboxEmail.objects.update(next_attempt_at=timezone.now() + timedelta(hours=1))
+            return 1
+
+        with mock.patch('django.core.mail.EmailMessage.send', autospec=True, side_effect=send):
+            deliver_queued_emails()
+        self.assertEqual(set(BCOutboxEmail.objects.values_list('status', flat=True)), {'sending'})
+
+
+class MessageDigestTests(TestCase):
+    def setUp(self):
+        self.applicant = make_applicant('applicant@berkeley.edu')
+        self.members = [make_member(f'member{i}@berkeley.edu') for i in range(2)]
+        self.matches = [
+            BCMatch.objects.create(
+                applicant=self.applicant.applicant_profile, bc_member=member.bc_member_profile, status='confirmed'
+            )
+            for member in self.members
+        ]
+
+    def send(self, match, sender, count, minutes_ago=30):
+        BCMessage.objects.bulk_create([
+            BCMessage(match=match, sender=sender, content=f'Message {i}') for i in range(count)
+        ])
+        BCMessage.objects.filter(match=match).update(sent_at=timezone.now() - timedelta(minutes=minutes_ago))
+
+    def test_unread_messages_across_chats_become_one_email(self):
+        self.send(self.matches[0], self.members[0], 5)
+        self.send(self.matches[1], self.members[1], 3)
+
+        # savepoint, pending aggregate, lock matches, latest previews,
+        # outbox insert, cursor update, release
+        with self.assertNumQueries(7):
+            self.assertEqual(queue_message_digests(), 1)
+        email = BCOutboxEmail.objects.get()
+        self.assertEqual(email.to_email, self.applicant.email)
+        self.assertIn('8 new messages', email.subject)
+        # Nothing new since the last digest
+        self.assertEqual(queue_message_digests(), 0)
+
+    def test_messages_read_during_the_window_are_skipped(self):
+        self.send(self.matches[0], self.members[0], 2)
+        last_id = BCMessage.objects.latest('id').id
+        BCMatch.objects.filter(id=self.matches[0].id).update(applicant_last_read_message_id=last_id)
+        self.assertEqual(queue_message_digests(), 0)
+
+    def test_recent_messages_wait_for_the_window(self):
+        self.send(self.matches[0], self.members[0], 2, minutes_ago=1)
+        self.assertEqual(queue_message_digests(), 0)
+        self.assertFalse(BCOutboxEmail.objects.exists())
+
+
+class AdminStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin@berkeley.edu', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.members = [make_member(f'member{i}@berkeley.edu') for i in range(3)]
+        self.applicants = [make_applicant(f'applicant{i}@berkeley.edu') for i in range(3)]
+
+    def match(self, applicant, member, status='pending'):
+        return BCMatch.objects.create(
+            applicant=applicant.applicant_profile, bc_member=member.bc_member_profile, status=status
+        )
+
+    def test_totals_come_from_one_query_and_are_cached(self):
+        self.match(self.applicants[0], self.members[0])
+        self.match(self.applicants[0], self.members[1], 'confirmed')
+        self.match(self.applicants[1], self.members[0], 'rejected')
+        BCMemberProfile.objects.filter(user=self.members[2]).update(is_approved=False)
+
+        # one aggregate for the totals, one grouped query per model for the days
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/admin/stats/')
+        self.assertEqual(response.data['total_members'], 2)
+        self.assertEqual(response.data['pending_members'], 1)
+        self.assertEqual(response.data['total_applicants'], 3)
+        self.assertEqual(response.data['total_matches'], 3)
+        self.assertEqual(response.data['pending_matches'], 1)
+        self.assertEqual(response.data['confirmed_matches'], 1)
+        self.assertEqual(response.data['daily'][-1]['total_matches'], 3)
+        self.assertIn('discover_cache', response.data)
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/admin/stats/')
+
+    @override_settings(BC_STATS_COUNTERS=True)
+    def test_counters_track_the_write_paths(self):
+        stats.rebuild_counters()
+        with self.captureOnCommitCallbacks(execute=True):
+            match = self.match(self.applicants[0], self.members[0])
+            self.match(self.applicants[1], self.members[1])
+            BCSwipe.objects.create(swiper=self.members[2], target=self.applicants[2], direction='like')
+            swipe_client = APIClient()
+            swipe_client.force_authenticate(self.applicants[2])
+            swipe_client.post('/api/swipe/batch/', {'swipes': [{'target_id': self.members[2].id, 'direction': 'like'}]}, format='json')
+            self.client.post(f'/api/admin/matches/{match.id}/approve/', {'action': 'confirm'}, format='json')
+            profile = self.members[1].bc_member_profile
+            profile.is_approved = False
+            profile.save()
+            self.applicants[1].applicant_profile.delete()
+
+        self.assertEqual(stats.counter_totals(), stats.compute_totals())
+        since = timezone.localdate() - timedelta(days=1)
+        self.assertEqual(dict(stats.counter_daily(since)), dict(stats.compute_daily(since)))
+
+    @override_settings(BC_STATS_COUNTERS=True)
+    def test_rows_loaded_without_the_counted_state(self):
+        self.match(self.applicants[0], self.members[0])
+        stats.rebuild_counters()
+        # No query per row for the deferred state
+        with self.assertNumQueries(2):
+            profiles = list(BCMemberProfile.objects.only('id', 'user_id'))
+            matches = list(BCMatch.objects.only('id'))
+        self.assertEqual(len(profiles), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profiles[0].is_approved = False
+            profiles[0].save()
+            matches[0].status = 'confirmed'
+            matches[0].save()
+            profiles[1].delete()
+        self.assertEqual(stats.counter_totals(), stats.compute_totals())
+
+    def test_rebuild_matches_aggregate(self):
+        self.match(self.applicants[0], self.members[0], 'completed')
+        stats.rebuild_counters()
+        self.assertEqual(stats.counter_totals(), stats.compute_totals())
+
+
+class AdminListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin@berkeley.edu', 'pw'))
+        self.members = [make_member(f'member{i}@berkeley.edu') for i in range(6)]
+        self.applicants = [make_applicant(f'applicant{i}@berkeley.edu') for i in range(5)]
+        for i, applicant in enumerate(self.applicants):
+            for member in self.members[:3]:
+                match = BCMatch.objects.create(
+                    applicant=applicant.applicant_profile, bc_member=member.bc_member_profile,
+                    status='confirmed' if i % 2 else 'pending',
+                )
+                BCMessage.objects.create(match=match, sender=member, content='Hi')
+
+    def test_match_pages_take_one_query_and_walk_the_whole_table(self):
+        seen = []
+        url = '/api/admin/matches/?limit=4'
+        while url:
+            with self.assertNumQueries(1):
+                data = self.client.get(url).data
+            seen += [match['id'] for match in data['matches']]
+            self.assertNotIn('messages', data['matches'][0])
+            self.assertEqual(data['matches'][0]['message_count'], 1)
+            url = data['next']
+        self.assertEqual(sorted(seen), sorted(BCMatch.objects.values_list('id', flat=True)))
+
+    def test_applicant_rows_carry_only_the_listed_fields(self):
+        with self.assertNumQueries(1):
+            applicant = self.client.get('/api/admin/applicants/?limit=2').data['applicants'][0]
+        self.assertEqual(set(applicant['user']), {'id', 'email', 'name', 'photo_url', 'photo'})
+        self.assertNotIn('updated_at', applicant)
+
+    def test_pages_on_tied_values_neither_skip_nor_repeat_rows(self):
+        BCApplicantProfile.objects.update(created_at=timezone.now())
+        for ordering in ['created_at', '-created_at', 'role']:
+            seen = []
+            url = f'/api/admin/applicants/?limit=2&ordering={ordering}'
+            while url:
+                data = self.client.get(url).data
+                seen += [applicant['id'] for applicant in data['applicants']]
+                url = data['next']
+            self.assertEqual(sorted(seen), sorted(BCApplicantProfile.objects.values_list('id', flat=True)), ordering)
+
+        # Ties are broken by id in the same direction, so their order is fixed
+        view = AdminAllApplicantsView()
+        for ordering, expected in [('created_at', ('created_at', 'id')), ('-role', ('-role', '-id')), ('id', ('id',))]:
+            request = Request(RequestFactory().get('/', {'ordering': ordering}))
+            self.assertEqual(AdminCursorPagination().get_ordering(request, BCApplicantProfile.objects.all(), view), expected)
+
+    def test_filters_and_search(self):
+        data = self.client.get('/api/admin/matches/', {'status': 'confirmed', 'search': 'applicant1@'}).data
+        self.assertEqual(len(data['matches']), 3)
+
+        BCMemberProfile.objects.filter(user__in=self.members[:2]).update(is_approved=False)
+        pending = self.client.get('/api/admin/members/pending/').data['pending_members']
+        self.assertEqual(len(pending), 2)
+        approved = self.client.get('/api/admin/members/', {'approved': 'true', 'ordering': 'user_name'}).data
+        self.assertEqual(
+            [member['user']['name'] for member in approved['members']],
+            [f'member{i}' for i in range(2, 6)],
+        )
+
+
+class AdminBulkTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('admin@berkeley.edu', 'pw')
+        self.client.force_authenticate(self.admin)
+        self.members = [make_member(f'member{i}@berkeley.edu') for i in range(5)]
+        self.applicants = [make_applicant(f'applicant{i}@berkeley.edu') for i in range(5)]
+        self.matches = [
+            BCMatch.objects.create(applicant=applicant.applicant_profile, bc_member=member.bc_member_profile)
+            for applicant, member in zip(self.applicants, self.members)
+        ]
+
+    def test_confirm_takes_a_fixed_number_of_queries(self):
+        ids = [match.id for match in self.matches[:4]]
+        with self.assertNumQueries(8):
+            response = self.client.post('/api/admin/matches/bulk/', {'ids': ids + [0], 'action': 'confirm'}, format='json')
+        self.assertEqual(response.data['updated'], sorted(ids))
+        self.assertEqual(response.data['skipped'], [0])
+        self.assertEqual(BCMatch.objects.filter(status='confirmed').count(), 4)
+        self.assertEqual(BCApplicantProfile.objects.filter(has_been_matched=True).count(), 4)
+        self.assertEqual(BCOutboxEmail.objects.filter(subject__contains='confirmed').count(), 8)
+
+        # Already confirmed, so nothing changes the second time
+        response = self.client.post('/api/admin/matches/bulk/', {'ids': ids, 'action': 'confirm'}, format='json')
+        self.assertEqual(response.data['updated'], [])
+
+        response = self.client.post('/api/admin/matches/bulk/', {'ids': ids, 'action': 'complete'}, format='json')
+        self.assertEqual(len(response.data['updated']), 4)
+        self.assertEqual(BCMatch.objects.filter(status='completed').count(), 4)
+
+    def test_confirms_one_match_per_applicant(self):
+        applicant = self.applicants[0].applicant_profile
+        second = BCMatch.objects.create(applicant=applicant, bc_member=self.members[1].bc_member_profile)
+        ids = [self.matches[0].id, second.id]
+        response = self.client.post('/api/admin/matches/bulk/', {'ids': ids, 'action': 'confirm'}, format='json')
+        self.assertEqual(response.data['updated'], [self.matches[0].id])
+        self.assertEqual(response.data['skipped'], [second.id])
+        self.assertEqual(BCOutboxEmail.objects.filter(subject__contains='confirmed').count(), 2)
+
+        # Already matched, so a later batch passes over the other match too
+        response = self.client.post('/api/admin/matches/bulk/', {'ids': [second.id], 'action': 'confirm'}, format='json')
+        self.assertEqual(response.data['skipped'], [second.id])
+        self.assertEqual(BCMatch.objects.get(id=second.id).status, 'pending')
+        self.assertEqual(BCOutboxEmail.objects.filter(subject__contains='confirmed').count(), 2)
+
+    def test_approve_members(self):
+        BCMemberProfile.objects.update(is_approved=False)
+        ids = list(BCMemberProfile.objects.values_list('id', flat=True)[:3])
+        response = self.client.post('/api/admin/members/bulk-approve/', {'ids': ids}, format='json')
+        self.assertEqual(response.data['approved'], sorted(ids))
+        self.assertEqual(BCMemberProfile.objects.filter(is_approved=True, approved_by=self.admin).count(), 3)
+
+        # Approved members show up in applicants' decks
+        self.client.force_authenticate(self.applicants[4])
+        cards = self.client.get('/api/discover/').data['profiles']
+        self.assertEqual(len(cards), 3)
+
+    def test_rejects_bad_input(self):
+        response = self.client.post('/api/admin/matches/bulk/', {'ids': [1], 'action': 'delete'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/admin/members/bulk-approve/', {'ids': 'all'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(BC_MATCH_MEMBER_CAPACITY=1)
+class MatchSuggestionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin@berkeley.edu', 'pw'))
+        self.alice = make_member('alice@berkeley.edu', areas_of_expertise=['Strategy'])
+        self.bob = make_member('bob@berkeley.edu', areas_of_expertise=['Finance'])
+        first = make_applicant('first@berkeley.edu', interests=['Strategy'])
+        second = make_applicant('second@berkeley.edu', interests=['Finance'])
+        # Confirming first -> alice (the only overlap) would leave second with nobody
+        self.first_alice = self.match(first, self.alice)
+        self.first_bob = self.match(first, self.bob)
+        self.second_alice = self.match(second, self.alice)
+
+    def match(self, applicant, member):
+        return BCMatch.objects.create(applicant=applicant.applicant_profile, bc_member=member.bc_member_profile)
+
+    def test_suggests_the_best_assignment(self):
+        response = self.client.get('/api/admin/matches/suggestions/')
+        self.assertEqual({p['match_id'] for p in response.data['proposals']}, {self.first_bob.id, self.second_alice.id})
+        self.assertEqual(response.data['pending_matches'], 3)
+
+        # With room for two chats each, the overlap decides
+        response = self.client.get('/api/admin/matches/suggestions/', {'capacity': 2})
+        self.assertEqual({p['match_id'] for p in response.data['proposals']}, {self.first_alice.id, self.second_alice.id})
+
+    def test_overlap_agrees_with_the_discover_score(self):
+        interests, expertise = ['Product  Strategy', 'FINANCE'], ['product strategy', 'Finance ']
+        self.assertEqual(assignment.interest_overlap(interests, expertise), 2)
+        self.assertEqual(
+            assignment.interest_overlap(interests, expertise),
+            ranking.score(ranking.tag_set(interests), ranking.tag_set(expertise)),
+        )
+
+    def test_counts_confirmed_matches_towards_capacity(self):
+        BCMatch.objects.filter(id=self.second_alice.id).update(status='confirmed')
+        BCApplicantProfile.objects.filter(user__email='second@berkeley.edu').update(has_been_matched=True)
+        response = self.client.get('/api/admin/matches/suggestions/')
+        self.assertEqual([p['match_id'] for p in response.data['proposals']], [self.first_bob.id])
+
+    def test_apply_confirms_the_suggestions(self):
+        response = self.client.post('/api/admin/matches/suggestions/', {'weighting': 'none'}, format='json')
+        self.assertEqual(response.data['confirmed'], sorted([self.first_bob.id, self.second_alice.id]))
+        self.assertEqual(BCMatch.objects.filter(status='confirmed').count(), 2)
+        self.assertFalse(self.client.get('/api/admin/matches/suggestions/').data['proposals'])
+
+        response = self.client.get('/api/admin/matches/suggestions/', {'weighting': 'best'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AdminChangelistTests(TestCase):
+    changelists = ['bcmemberprofile', 'bcapplicantprofile', 'bcmatch', 'bcmessage', 'bcswipe', 'bcmemberwhitelist']
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(User.objects.create_superuser('admin@berkeley.edu', 'pw'))
+
+    def add_rows(self, start, count):
+        for i in range(start, start + count):
+            member = make_member(f'member{i}@berkeley.edu')
+            applicant = make_applicant(f'applicant{i}@berkeley.edu', has_been_matched=True)
+            match = BCMatch.objects.create(
+                applicant=applicant.applicant_profile, bc_member=member.bc_member_profile, status='confirmed'
+            )
+            BCMessage.objects.create(match=match, sender=member, content='Hi')
+            BCSwipe.objects.create(swiper=applicant, target=member, direction='like')
+            BCMemberWhitelist.objects.create(email=member.email)
+
+    def query_counts(self):
+        counts = {}
+        for model in self.changelists:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(f'/admin/bc_api/{model}/')
+            self.assertEqual(response.status_code, 200)
+            counts[model] = len(queries)
+        return counts
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_rows(0, 2)
+        small = self.query_counts()
+        self.add_rows(2, 6)
+        self.assertEqual(self.query_counts(), small)
+
+
+class RosterImportTests(TestCase):
+    header = 'email,name,year,major,areas_of_expertise\n'
+
+    def roster(self, count, start=0):
+        rows = ''.join(f'new{i}@berkeley.edu,New {i},Senior,Economics,Strategy; Tech\n' for i in range(start, start + count))
+        return io.BytesIO((self.header + rows).encode())
+
+    def run_import(self, stream, fmt='csv', kind='members'):
+        return list(imports.run_import(stream, fmt, kind))
+
+    def test_members_report_every_row(self):
+        make_applicant('applicant@berkeley.edu')
+        pending = make_member('pending@berkeley.edu')
+        BCMemberProfile.objects.filter(user=pending).update(is_approved=False)
+        stream = io.BytesIO((self.header + (
+            'new0@berkeley.edu,New 0,Senior,Economics,Strategy; Tech\n'
+            'pending@berkeley.edu,Pending,Junior,Math,\n'
+            'applicant@berkeley.edu,Applicant,Junior,Math,\n'
+            'not-an-email,Bad,Junior,Math,\n'
+            'new0@berkeley.edu,Again,Senior,Economics,\n'
+        )).encode())
+
+        report = self.run_import(stream)
+        self.assertEqual([entry['status'] for entry in report], ['created', 'updated', 'error', 'error', 'error'])
+        profile = BCMemberProfile.objects.get(user__email='new0@berkeley.edu')
+        self.assertTrue(profile.is_approved)
+        self.assertEqual(profile.areas_of_expertise, ['Strategy', 'Tech'])
+        self.assertEqual(profile.user.user_type, 'bc_member')
+        self.assertTrue(BCMemberProfile.objects.get(user=pending).is_approved)
+        self.assertEqual(BCMemberWhitelist.objects.count(), 2)
+
+        # Imported members are discoverable straight away
+        client = APIClient()
+        client.force_authenticate(User.objects.get(email='applicant@berkeley.edu'))
+        self.assertEqual(len(client.get('/api/discover/').data['profiles']), 2)
+
+    def test_queries_per_chunk_do_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            self.run_import(self.roster(2))
+        with CaptureQueriesContext(connection) as large:
+            self.run_import(self.roster(40, start=2))
+        self.assertEqual(len(small), len(large))
+
+    def test_whitelist_jsonl_ignores_existing_entries(self):
+        BCMemberWhitelist.objects.create(email='old@berkeley.edu')
+        stream = io.BytesIO(b'{"email": "old@berkeley.edu"}\n\n{"email": "new@berkeley.edu", "name": "New"}\n')
+        report = self.run_import(stream, fmt='jsonl', kind='whitelist')
+        self.assertEqual([entry['status'] for entry in report], ['exists', 'created'])
+        self.assertFalse(User.objects.filter(email='new@berkeley.edu').exists())
+
+    def test_emails_match_existing_users_in_any_case(self):
+        existing = make_member('jane.doe@berkeley.edu')
+        make_applicant('sam@berkeley.edu')
+        stream = io.BytesIO((self.header + (
+            'Jane.Doe@Berkeley.edu,Jane,Senior,Economics,Strategy\n'
+            'SAM@berkeley.edu,Sam,Junior,Math,\n'
+        )).encode())
+        report = self.run_import(stream)
+        self.assertEqual([entry['status'] for entry in report], ['updated', 'error'])
+        self.assertEqual(User.objects.filter(email__iexact='jane.doe@berkeley.edu').get(), existing)
+        self.assertEqual(BCMemberWhitelist.objects.get().email, 'jane.doe@berkeley.edu')
+
+    def test_admin_upload(self):
+        client = Client()
+        client.force_login(User.objects.create_superuser('admin@berkeley.edu', 'pw'))
+        upload = self.roster(3)
+        upload.name = 'roster.csv'
+        response = client.post('/admin/bc_api/bcmemberwhitelist/import/', {'file': upload, 'kind': 'members'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['counts'], [('created', 3)])
+        self.assertEqual(BCMemberProfile.objects.filter(approved_by__email='admin@berkeley.edu').count(), 3)
+
+
+class AdminExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin@berkeley.edu', 'pw'))
+        for i in range(3):
+            member = make_member(f'member{i}@berkeley.edu', areas_of_expertise=['Strategy', 'Tech'])
+            applicant = make_applicant(f'applicant{i}@berkeley.edu')
+            match = BCMatch.objects.create(
+                applicant=applicant.applicant_profile, bc_member=member.bc_member_profile,
+                status='confirmed' if i else 'pending',
+            )
+            BCMessage.objects.create(match=match, sender=member, content=f'Hi, {i}')
+
+    def download(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_with_status_filter(self):
+        lines = self.download('/api/admin/export/matches.csv', {'status': 'confirmed'}).splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'matched_at', 'status'])
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(all(',confirmed,' in line for line in lines[1:]))
+
+        members = self.download('/api/admin/export/members.csv').splitlines()
+        self.assertIn('Strategy; Tech', members[1])
+
+    def test_csv_cells_that_look_like_formulas_are_escaped(self):
+        match = BCMatch.objects.first()
+        BCMessage.objects.create(match=match, sender=match.bc_member.user, content='=HYPERLINK("http://evil", "x")')
+        lines = self.download('/api/admin/export/messages.csv').splitlines()
+        self.assertIn(',"\'=HYPERLINK(""http://evil"", ""x"")",', lines[-1])
+
+    def test_ndjson_with_date_filter(self):
+        today = timezone.localdate()
+        rows = [json.loads(line) for line in self.download('/api/admin/export/messages.ndjson', {'since': today.isoformat()}).splitlines()]
+        self.assertEqual([row['content'] for row in rows], ['Hi, 0', 'Hi, 1', 'Hi, 2'])
+        tomorrow = (today + timedelta(days=1)).isoformat()
+        self.assertEqual(self.download('/api/admin/export/messages.ndjson', {'since': tomorrow}), '')
+        # until includes the whole of its day
+        rows = self.download('/api/admin/export/messages.ndjson', {'until': today.isoformat()}).splitlines()
+        self.assertEqual(len(rows), 3)
+        yesterday = (today - timedelta(days=1)).isoformat()
+        self.assertEqual(self.download('/api/admin/export/messages.ndjson', {'until': yesterday}), '')
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.client.get('/api/admin/export/matches.csv', {'status': 'lost'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/admin/export/matches.csv', {'since': 'May'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/admin/export/users.csv').status_code, 404)
+
+    def test_asynchronous_stream_sends_the_header_first(self):
+        async def chunks():
+            response = exports.export_response('swipes', 'csv', asynchronous=True)
+            return [chunk async for chunk in response]
+
+        BCSwipe.objects.create(swiper=User.objects.get(email='applicant0@berkeley.edu'), target=User.objects.get(email='member0@berkeley.edu'), direction='like')
+        parts = async_to_sync(chunks)()
+        self.assertEqual(parts[0], b'id,swiper_email,target_email,direction,created_at\r\n')
+        self.assertIn(b'applicant0@berkeley.edu,member0@berkeley.edu,like', parts[1])
+
+
+@override_settings(BC_ROLLUP_LAG=0)
+class FunnelAnalyticsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin@berkeley.edu', 'pw'))
+        self.members = [make_member(f'member{i}@berkeley.edu') for i in range(2)]
+        self.applicant = make_applicant('applicant@berkeley.edu')
+        for member in self.members:
+            BCSwipe.objects.create(swiper=self.applicant, target=member, direction='like')
+        BCSwipe.objects.create(swiper=self.members[0], target=self.applicant, direction='like')
+        BCSwipe.objects.create(swiper=self.members[1], target=self.applicant, direction='pass')
+        self.match = BCMatch.objects.create(
+            applicant=self.applicant.applicant_profile, bc_member=self.members[0].bc_member_profile,
+        )
+        BCMatch.objects.filter(id=self.match.id).update(
+            status='confirmed', matched_at=timezone.now() - timedelta(hours=2), confirmed_at=timezone.now() - timedelta(hours=1),
+        )
+        BCMessage.objects.create(match=self.match, sender=self.applicant, content='Hi')
+        BCMessage.objects.create(match=self.match, sender=self.members[0], content='Hello')
+
+    def test_rollup_is_incremental_and_read_from_summaries(self):
+        processed, caught_up = analytics.rollup()
+        self.assertEqual(processed, {'swipes': 4, 'matches': 1, 'confirmations': 1, 'first_messages': 1})
+        self.assertTrue(caught_up)
+        # Nothing new, nothing counted twice
+        self.assertEqual(analytics.rollup()[0], dict.fromkeys(analytics.SOURCES, 0))
+
+        BCSwipe.objects.create(swiper=make_applicant('late@berkeley.edu'), target=self.members[0], direction='pass')
+        self.assertEqual(analytics.rollup()[0]['swipes'], 1)
+
+        with self.assertNumQueries(2):
+            data = self.client.get('/api/admin/analytics/', {'days': 7}).data
+        today = data['daily'][-1]
+        self.assertEqual((today['swipes'], today['likes'], today['matches']), (5, 3, 1))
+        self.assertEqual(today['mutual_like_rate'], round(1 / 3, 4))
+        self.assertEqual(today['avg_hours_to_confirmation'], 1.0)
+        self.assertAlmostEqual(today['avg_hours_to_first_message'], 1.0, places=1)
+        segments = {row['segment']: row for row in data['segments']}
+        self.assertEqual(segments['applicant:Sophomore']['like_rate'], round(2 / 3, 4))
+        self.assertEqual(segments['bc_member:Junior']['like_rate'], 0.5)
+        self.assertEqual(sum(hour['swipes'] for hour in data['hourly']), 5)
+
+    def test_catches_up_in_batches(self):
+        rounds = 0
+        caught_up = False
+        while not caught_up:
+            processed, caught_up = analytics.rollup(batch_size=1)
+            rounds += 1
+        # Four full batches of one swipe, then a pass that finds nothing new
+        self.assertEqual(rounds, 5)
+        swipes = BCFunnelRollup.objects.filter(period='day', metric='swipes').aggregate(total=Sum('count'))['total']
+        self.assertEqual(swipes, 4)
+
+
+class TokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        # Stands in for a shared cache such as Redis
+        patcher = mock.patch.object(caching, 'is_shared', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = make_applicant('applicant@berkeley.edu')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_profile_loads_with_the_token_then_comes_from_the_cache(self):
+        # Token, user and profile in one query; cached from the second use
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/me/')
+            self.assertEqual(response.data['profile']['role'], 'Sophomore')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/me/')
+        self.assertEqual(response.data['profile']['role'], 'Sophomore')
+
+    def test_change_committed_while_loading_is_not_cached(self):
+        self.client.get('/api/me/')
+        load = Token.objects.select_related
+
+        def racing(*args):
+            def get(**kwargs):
+                token = load(*args).get(**kwargs)
+                # Another request renames the user right after this one read it
+                with self.captureOnCommitCallbacks(execute=True):
+                    User.objects.filter(id=self.user.id).update(name='Renamed')
+                    caching.invalidate_auth(self.user.id)
+                return token
+            return mock.Mock(get=get)
+
+        with mock.patch.object(Token.objects, 'select_related', side_effect=racing):
+            self.assertEqual(self.client.get('/api/me/').data['name'], 'applicant')
+        self.assertEqual(self.client.get('/api/me/').data['name'], 'Renamed')
+
+    def test_per_process_cache_loads_every_time(self):
+        with mock.patch.object(caching, 'is_shared', return_value=False):
+            for _ in range(3):
+                with self.assertNumQueries(1):
+                    self.client.get('/api/me/')
+
+    def test_profile_edits_and_resets_are_seen_at_once(self):
+        self.client.get('/api/me/')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/applicants/{self.user.applicant_profile.id}/', {'role': 'Junior'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/me/').data['profile']['role'], 'Junior')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/reset-profile/')
+        response = self.client.get('/api/me/')
+        self.assertIsNone(response.data['user_type'])
+        self.assertNotIn('profile', response.data)
+
+    def test_deleted_token_stops_working(self):
+        self.assertEqual(self.client.get('/api/me/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        self.assertEqual(self.client.get('/api/me/').status_code, 401)
+
+
+class WhitelistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        whitelist.clear()
+        self.user = User.objects.create_user('Member@Berkeley.edu', name='Member')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def check(self):
+        return self.client.get('/api/bc-member/check-whitelist/').data['is_whitelisted']
+
+    def test_emails_are_stored_lowercased(self):
+        entry = BCMemberWhitelist.objects.create(email=' Member@Berkeley.EDU ')
+        self.assertEqual(entry.email, 'member@berkeley.edu')
+        entry = BCMemberWhitelist(email='MEMBER@berkeley.edu')
+        with self.assertRaises(ValidationError):
+            entry.full_clean()
+
+    def test_checks_come_from_the_cached_set(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            BCMemberWhitelist.objects.create(email='member@berkeley.edu')
+        self.assertTrue(self.check())
+        with self.assertNumQueries(0):
+            self.assertTrue(self.check())
+
+        # Removing the entry reloads the set
+        with self.captureOnCommitCallbacks(execute=True):
+            BCMemberWhitelist.objects.all().delete()
+        self.assertFalse(self.check())
+
+    def test_joining_checks_the_table(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            BCMemberWhitelist.objects.create(email='member@berkeley.edu')
+        self.assertTrue(self.check())
+
+        # Removed by another process, whose bump this worker never sees
+        with mock.patch.object(caching, 'invalidate_whitelist'):
+            BCMemberWhitelist.objects.all().delete()
+        self.assertTrue(self.check())
+        response = self.client.post('/api/bc-member/join/', {'year': 'Senior', 'major': 'Economics'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(BCMemberProfile.objects.filter(user=self.user).exists())
+
+    def test_roster_import_reloads_the_set(self):
+        self.assertFalse(self.check())
+        with self.captureOnCommitCallbacks(execute=True):
+            list(imports.run_import(io.BytesIO(b'email\nMEMBER@berkeley.edu\n'), 'csv', 'whitelist'))
+        self.assertTrue(self.check())
+
+
+class ReadCursorTests(TestCase):
+    def setUp(self):
+        self.member = make_member('member@berkeley.edu')
+        self.applicant = make_applicant('applicant@berkeley.edu')
+        self.match = BCMatch.objects.create(
+            applicant=self.applicant.applicant_profile,
+            bc_member=self.member.bc_member_profile,
+            status='confirmed',
+        )
+        self.messages = BCMessage.objects.bulk_create([
+            BCMessage(match=self.match, sender=self.member, content=f'Message {i}') for i in range(30)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.applicant)
+
+    def mark_read(self, data=None):
+        return self.client.post(f'/api/matches/{self.match.id}/messages/mark-read/', data or {}, format='json')
+
+    def test_mark_read_is_one_row_write_for_any_conversation_length(self):
+        # load match, newest message id, update the match row
+        with self.assertNumQueries(3):
+            response = self.mark_read()
+        self.assertEqual(response.data['last_read_message_id'], self.messages[-1].id)
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.applicant_last_read_message_id, self.messages[-1].id)
+
+    def test_unread_count_and_receipts_follow_the_cursor(self):
+        self.mark_read({'last_read_message_id': self.messages[9].id})
+        summary = self.client.get('/api/matches/summary/').data[0]
+        self.assertEqual(summary['unread_count'], 20)
+
+        member_client = APIClient()
+        member_client.force_authenticate(self.member)
+        messages = member_client.get(f'/api/matches/{self.match.id}/messages/').data
+        self.assertEqual(sum(message['is_read'] for message in messages), 10)
+
+    def test_cursor_never_moves_backwards(self):
+        self.mark_read()
+        response = self.mark_read({'last_read_message_id': self.messages[0].id})
+        self.assertEqual(response.data['last_read_message_id'], self.messages[-1].id)
+
+    def test_non_participant_cannot_mark_read(self):
+        self.client.force_authenticate(make_applicant('other@berkeley.edu'))
+        response = self.mark_read()
+        self.assertEqual(response.status_code, 403)
+
+
+class MatchSummaryTests(TestCase):
+    def setUp(self):
+        self.member = make_member('member@berkeley.edu')
+        self.applicants = [make_applicant(f'applicant{i}@berkeley.edu') for i in range(4)]
+        self.matches = [
+            BCMatch.objects.create(applicant=applicant.applicant_profile, bc_member=self.member.bc_member_profile, status='confirmed')
+            for applicant in self.applicants
+        ]
+        for match, applicant in zip(self.matches, self.applicants):
+            BCMessage.objects.bulk_create([
+                BCMessage(match=match, sender=applicant, content=f'{applicant.name} says {i}') for i in range(3)
+            ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_summary_is_one_query_for_any_number_of_matches(self):
+        with self.assertNumQueries(1):
+            rows = self.client.get('/api/matches/summary/').data
+        self.assertEqual(len(rows), 4)
+        by_name = {row['counterpart']['name']: row for row in rows}
+        self.assertEqual(by_name['applicant2']['last_message']['content'], 'applicant2 says 2')
+        self.assertEqual({row['unread_count'] for row in rows}, {3})
+
+
+class MessageKeysetTests(TestCase):
+    def setUp(self):
+        self.member = make_member('member@berkeley.edu')
+        self.applicant = make_applicant('applicant@berkeley.edu')
+        self.match = BCMatch.objects.create(
+            applicant=self.applicant.applicant_profile,
+            bc_member=self.member.bc_member_profile,
+            status='confirmed',
+        )
+        self.messages = BCMessage.objects.bulk_create([
+            BCMessage(match=self.match, sender=self.member, content=f'Message {i}') for i in range(10)
+        ])
+        self.url = f'/api/matches/{self.match.id}/messages/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.applicant)
+
+    def ids(self, response):
+        return [message['id'] for message in response.data]
+
+    def test_after_id_returns_only_newer_messages(self):
+        response = self.client.get(self.url, {'after_id': self.messages[6].id})
+        self.assertEqual(self.ids(response), [message.id for message in self.messages[7:]])
+        response = self.client.get(self.url, {'after_id': self.messages[-1].id})
+        self.assertEqual(response.data, [])
+
+    def test_before_id_pages_back_in_order(self):
+        response = self.client.get(self.url, {'before_id': self.messages[8].id, 'limit': 3})
+        self.assertEqual(self.ids(response), [message.id for message in self.messages[5:8]])
+
+    def test_bad_ids_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'after_id': 'x'}).status_code, 400)
+
+    def test_etag_answers_304_until_something_changes(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.post(f'{self.url}mark-read/', {}, format='json')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        BCMessage.objects.create(match=self.match, sender=self.member, content='New')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 11)
+
+    def test_outsiders_cannot_read(self):
+        self.client.force_authenticate(make_applicant('other@berkeley.edu'))
+        self.assertEqual(self.client.get(self.url, {'after_id': 0}).status_code, 403)
+
+
+class RealtimeTests(TestCase):
+    def setUp(self):
+        self.member = make_member('member@berkeley.edu')
+        self.applicant = make_applicant('applicant@berkeley.edu')
+        self.match = BCMatch.objects.create(
+            applicant=self.applicant.applicant_profile,
+            bc_member=self.member.bc_member_profile,
+            status='confirmed',
+        )
+        self.broker = realtime.InProcessBroker()
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        patcher = mock.patch.object(realtime, '_broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def subscribe(self, user):
+        async def subscribe():
+            return self.broker.subscribe(user.id)
+        return self.loop.run_until_complete(subscribe())
+
+    def next_event(self, subscription):
+        return self.loop.run_until_complete(asyncio.wait_for(subscription.queue.get(), 1))
+
+    def test_new_message_is_pushed_after_commit(self):
+        subscription = self.subscribe(self.member)
+        client = APIClient()
+        client.force_authenticate(self.applicant)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            client.post(f'/api/matches/{self.match.id}/messages/', {'content': 'Hi!'}, format='json')
+        self.assertTrue(subscription.queue.empty())
+
+        for callback in callbacks:
+            callback()
+        event = self.next_event(subscription)
+        self.assertEqual(event['type'], 'message.created')
+        self.assertEqual(event['data']['content'], 'Hi!')
+        self.assertEqual(event['ids']['match_id'], self.match.id)
+
+    def test_match_status_change_reaches_both_participants(self):
+        subscriptions = [self.subscribe(self.member), self.subscribe(self.applicant)]
+        admin = User.objects.create_superuser('admin@berkeley.edu', 'pw')
+        client = APIClient()
+        client.force_authenticate(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/admin/matches/{self.match.id}/approve/', {'action': 'complete'}, format='json')
+        for subscription in subscriptions:
+            event = self.next_event(subscription)
+            self.assertEqual((event['type'], event['data']['status']), ('match.status', 'completed'))
+
+
+class StreamTicketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_applicant('applicant@berkeley.edu')
+        self.token = Token.objects.create(user=self.user)
+
+    def stream_user(self, query):
+        request = RequestFactory().get(f'/api/events/?{query}')
+        request.user = AnonymousUser()
+        return async_to_sync(realtime._authenticate)(request)
+
+    def ticket(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = client.post('/api/events/ticket/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['ticket']
+
+    def test_ticket_opens_the_stream_and_token_in_url_does_not(self):
+        self.assertEqual(self.stream_user(f'ticket={self.ticket()}'), self.user)
+        self.assertIsNone(self.stream_user(f'token={self.token.key}'))
+        self.assertIsNone(self.stream_user('ticket=forged'))
+
+    @override_settings(BC_STREAM_TICKET_TTL=-1)
+    def test_expired_ticket_is_rejected(self):
+        self.assertIsNone(self.stream_user(f'ticket={self.ticket()}'))
+
+    def test_logout_revokes_tickets(self):
+        ticket = self.ticket()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        self.assertIsNone(self.stream_user(f'ticket={ticket}'))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentSwipeTests(TransactionTestCase):
+    def test_simultaneous_reciprocal_likes_create_exactly_one_match(self):
+        cache.clear()
+        for round_number in range(5):
+            member = make_member(f'member{round_number}@berkeley.edu')
+            applicant = make_applicant(f'applicant{round_number}@berkeley.edu')
+            barrier = threading.Barrier(2)
+            errors = []
+
+            def like(swiper, target):
+                try:
+                    barrier.wait()
+                    record_swipe(swiper, target.id, 'like')
+                except Exception as exc:  # pragma: no cover - reported below
+                    errors.append(exc)
+                finally:
+                    connection.close()
+
+            threads = [
+                threading.Thread(target=like, args=(applicant, member)),
+                threading.Thread(target=like, args=(member, applicant)),
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(
+                BCMatch.objects.filter(applicant__user=applicant, bc_member__user=member).count(), 1
+            )
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import realtime, views
 
 router = DefaultRouter()
 router.register(r'bc-members', views.BCMemberProfileViewSet, basename='bc-member')
@@ -13,6 +13,7 @@ urlpatterns = [
     path('upload-photo/', views.PhotoUploadView.as_view(), name='upload-photo'),
     path('discover/', views.DiscoverView.as_view(), name='discover'),
     path('swipe/', views.SwipeView.as_view(), name='swipe'),
+    path('swipe/batch/', views.SwipeBatchView.as_view(), name='swipe-batch'),
     path('reset-profile/', views.ResetProfileView.as_view(), name='reset-profile'),
     path('matches/<int:match_id>/messages/', views.MessageViewSet.as_view({
         'get': 'list',
@@ -21,6 +22,9 @@ urlpatterns = [
     path('matches/<int:match_id>/messages/mark-read/', views.MessageViewSet.as_view({
         'post': 'mark_read'
     }), name='mark-messages-read'),
+    # Server-Sent Events stream of new messages, match updates and read receipts
+    path('events/', realtime.event_stream, name='events'),
+    path('events/ticket/', views.StreamTicketView.as_view(), name='events-ticket'),
 
     # BC Member self-registration with invite code
     path('bc-member/join/', views.BCMemberJoinView.as_view(), name='bc-member-join'),
@@ -30,11 +34,16 @@ urlpatterns = [
     # Admin endpoints
     path('admin/check/', views.AdminCheckView.as_view(), name='admin-check'),
     path('admin/stats/', views.AdminStatsView.as_view(), name='admin-stats'),
+    path('admin/analytics/', views.AdminAnalyticsView.as_view(), name='admin-analytics'),
     path('admin/members/', views.AdminAllMembersView.as_view(), name='admin-all-members'),
     path('admin/members/pending/', views.AdminPendingMembersView.as_view(), name='admin-pending-members'),
+    path('admin/members/bulk-approve/', views.AdminBulkApproveMembersView.as_view(), name='admin-bulk-approve-members'),
     path('admin/members/<int:member_id>/approve/', views.AdminApproveMemberView.as_view(), name='admin-approve-member'),
     path('admin/members/create/', views.AdminCreateMemberView.as_view(), name='admin-create-member'),
     path('admin/applicants/', views.AdminAllApplicantsView.as_view(), name='admin-all-applicants'),
     path('admin/matches/', views.AdminAllMatchesView.as_view(), name='admin-all-matches'),
+    path('admin/matches/suggestions/', views.AdminMatchSuggestionsView.as_view(), name='admin-match-suggestions'),
+    path('admin/matches/bulk/', views.AdminBulkMatchActionView.as_view(), name='admin-bulk-match-action'),
     path('admin/matches/<int:match_id>/approve/', views.AdminApproveMatchView.as_view(), name='admin-approve-match'),
+    path('admin/export/<str:dataset>.<str:fmt>', views.AdminExportView.as_view(), name='admin-export'),
 ]
@@ -1,28 +1,37 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import filters, generics, viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Left
 from django.shortcuts import get_object_or_404, redirect
 from django.conf import settings
 from django.views import View
 from django.http import HttpResponse
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-import uuid
-import os
-
-from .models import User, BCMemberProfile, BCApplicantProfile, BCMatch, BCMessage, BCSwipe
-from .emails import send_match_notification, send_match_confirmed_notification, send_new_message_notification
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.core.handlers.asgi import ASGIRequest
+import datetime
+
+from .models import User, BCMemberProfile, BCApplicantProfile, BCMatch, BCMessage, BCSwipe, BCDeckEntry
+from .emails import send_match_confirmed_notification
+from .pagination import AdminCursorPagination, decode_cursor, encode_cursor, parse_limit
+from . import analytics, approvals, assignment, caching, deck, exports, photos, ranking, realtime, stats, whitelist
+from .idempotency import idempotent
+from .swipes import AlreadySwiped, record_swipe, record_swipes
 from .serializers import (
+    AdminBCApplicantSerializer,
+    AdminBCMatchSerializer,
+    AdminBCMemberSerializer,
     UserSerializer,
     BCMemberProfileSerializer,
     BCMemberProfileCreateSerializer,
     BCApplicantProfileSerializer,
     BCApplicantProfileCreateSerializer,
     BCMatchSerializer,
+    BCMatchSummarySerializer,
     BCMessageSerializer,
     BCSwipeSerializer,
 )
@@ -70,6 +79,12 @@ class PhotoUploadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
 
+    def initialize_request(self, request, *args, **kwargs):
+        # Spool uploads to a temporary file rather than memory; store_upload
+        # then reads it a chunk at a time and decoding happens in the worker
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
     def post(self, request):
         if 'photo' not in request.FILES:
             return Response(
@@ -94,19 +109,26 @@ class PhotoUploadView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Generate unique filename
-        ext = os.path.splitext(photo.name)[1].lower()
-        filename = f"profiles/{request.user.id}_{uuid.uuid4().hex}{ext}"
+        try:
+            photos.check(photo)
+        except photos.InvalidPhoto as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Save file
-        path = default_storage.save(filename, ContentFile(photo.read()))
+        # Stored as is for now; the worker strips its metadata, publishes it
+        # under its content hash and points photo_url there
+        path = photos.store_upload(photo)
 
         # Build full URL
         photo_url = f"{settings.MEDIA_URL}{path}"
 
-        # Update user's photo_url
+        # Update user's photo_url; only that field, so the variants recorded
+        # by the worker are never written over
         request.user.photo_url = photo_url
-        request.user.save()
+        request.user.save(update_fields=['photo_url'])
+
+        # Stripping and resized variants happen in the background (see
+        # bc_api.photos), for the photo_url saved above
+        photos.schedule(request.user.id, path)
 
         return Response({
             'photo_url': photo_url,
@@ -186,6 +208,10 @@ class BCApplicantProfileViewSet(viewsets.ModelViewSet):
             )
         return super().create(request, *args, **kwargs)
 
+    def perform_create(self, serializer):
+        profile = serializer.save()
+        deck.profile_became_discoverable(profile)
+
     @action(detail=False, methods=['get'])
     def me(self, request):
         """Get current user's applicant profile."""
@@ -200,132 +226,175 @@ class BCApplicantProfileViewSet(viewsets.ModelViewSet):
 
 
 class DiscoverView(APIView):
-    """Get profiles to swipe on based on user type."""
+    """Get profiles to swipe on based on user type.
+
+    Returns one bounded page of the user's deck. Candidates come from the
+    materialized ``BCDeckEntry`` rows (already filtered for eligibility and
+    past swipes), ranked by their stored interest/expertise overlap and then
+    by their stable per-user order. ``next_cursor`` can be passed back as ``?cursor=``
+    to fetch the following page while the user is still swiping. Profiles
+    swiped in the meantime simply drop out of later pages.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         user = request.user
+        limit = parse_limit(request.query_params.get('limit'))
+        cursor = request.query_params.get('cursor')
+        position = decode_cursor(cursor)
+        if cursor and (position is None or len(position) != 2):
+            return Response(
+                {'error': 'Invalid cursor'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if user.user_type not in ('applicant', 'bc_member'):
+            return Response(
+                {'error': 'User type not set'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Get IDs of users already swiped on
-        swiped_ids = BCSwipe.objects.filter(swiper=user).values_list('target_id', flat=True)
+        # Serve the same page again until a swipe, approval or edit changes it
+        cache_key = caching.discover_cache_key(user, cursor, limit)
+        data = caching.get_discover_response(cache_key)
+        if data is None:
+            data = self.build_page(user, position, limit)
+            if data is None:
+                return Response(
+                    {'error': 'Profile not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            caching.set_discover_response(cache_key, data)
 
+        return Response(data)
+
+    def build_page(self, user, position, limit):
+        """Build the discover payload, or None if the user's profile is missing."""
         if user.user_type == 'applicant':
             # Applicants see BC members
             # Check if applicant is already matched (with confirmed match)
             try:
                 if user.applicant_profile.has_been_matched:
-                    return Response({'profiles': [], 'message': 'Already matched'})
+                    return {'profiles': [], 'next_cursor': None, 'message': 'Already matched'}
             except BCApplicantProfile.DoesNotExist:
-                return Response(
-                    {'error': 'Profile not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+                return None
 
             # Only show APPROVED BC members
-            profiles = BCMemberProfile.objects.filter(
-                is_approved=True
-            ).exclude(
-                user_id__in=swiped_ids
-            ).select_related('user')
-            serializer = BCMemberProfileSerializer(profiles, many=True)
-
-        elif user.user_type == 'bc_member':
-            # BC members see applicants who haven't been matched yet
-            profiles = BCApplicantProfile.objects.filter(
-                has_been_matched=False
-            ).exclude(
-                user_id__in=swiped_ids
-            ).select_related('user')
-            serializer = BCApplicantProfileSerializer(profiles, many=True)
+            profiles = BCMemberProfile.objects.filter(is_approved=True)
+            serializer_class = BCMemberProfileSerializer
 
         else:
-            return Response(
-                {'error': 'User type not set'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        return Response({'profiles': serializer.data})
+            # BC members see applicants who haven't been matched yet
+            profiles = BCApplicantProfile.objects.filter(has_been_matched=False)
+            serializer_class = BCApplicantProfileSerializer
+
+        # Best tag overlap first, then the stable deck order; the stored
+        # score and the (owner, -score, deck_key) index keep this in SQL
+        entries = BCDeckEntry.objects.filter(owner=user)
+        if position:
+            after_score, after_key = -position[0], position[1]
+            entries = entries.filter(Q(score__lt=after_score) | Q(score=after_score, deck_key__gt=after_key))
+
+        # Take one extra row to know whether another page exists
+        rows = list(entries.order_by('-score', 'deck_key').values_list('score', 'deck_key', 'candidate_id')[:limit + 1])
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(ranking.rank_key(*rows[-1][:2]))
+
+        # The eligibility filter above is a safety net; the deck is kept in sync
+        candidate_ids = [candidate_id for _, _, candidate_id in rows]
+        by_user = {
+            profile.user_id: profile
+            for profile in profiles.filter(user_id__in=candidate_ids).select_related('user')
+        }
+        page = [by_user[candidate_id] for candidate_id in candidate_ids if candidate_id in by_user]
+
+        return {
+            'profiles': serializer_class(page, many=True).data,
+            'next_cursor': next_cursor,
+        }
 
 
 class SwipeView(APIView):
-    """Handle swiping (like/pass)."""
+    """Handle swiping (like/pass).
+
+    The swipe, the reciprocal-like check and the pending match are written
+    in one transaction; see ``bc_api.swipes.record_swipe``. Retries that send
+    the same ``Idempotency-Key`` get the original response back.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request):
-        user = request.user
         target_id = request.data.get('target_id')
         direction = request.data.get('direction')  # 'like' or 'pass'
 
+        try:
+            target_id = int(target_id)
+        except (TypeError, ValueError):
+            target_id = None
+
         if not target_id or direction not in ['like', 'pass']:
             return Response(
                 {'error': 'Invalid request'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        target_user = get_object_or_404(User, id=target_id)
+        try:
+            swipe, match = record_swipe(request.user, target_id, direction)
+        except AlreadySwiped:
+            return Response(
+                {'error': 'Already swiped on this profile'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'swipe': BCSwipeSerializer(swipe).data,
+            'match_created': match is not None,
+            'match': BCMatchSerializer(match).data if match else None
+        })
 
-        # Create swipe record
-        swipe, created = BCSwipe.objects.get_or_create(
-            swiper=user,
-            target=target_user,
-            defaults={'direction': direction}
-        )
 
-        if not created:
+class SwipeBatchView(APIView):
+    """Submit a burst of queued swipes in one request.
+
+    Expects ``{"swipes": [{"target_id": 1, "direction": "like"}, ...]}`` and
+    answers with one result per item, in order.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @idempotent
+    def post(self, request):
+        swipes = request.data.get('swipes')
+        if not isinstance(swipes, list) or not swipes:
             return Response(
-                {'error': 'Already swiped on this profile'},
+                {'error': 'Expected a non-empty "swipes" list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(swipes) > settings.BC_SWIPE_BATCH_MAX_SIZE:
+            return Response(
+                {'error': f'At most {settings.BC_SWIPE_BATCH_MAX_SIZE} swipes per batch'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Check for match (only on likes)
-        match_created = False
-        match_data = None
-
-        if direction == 'like':
-            # Check if there's a mutual like
-            mutual_like = BCSwipe.objects.filter(
-                swiper=target_user,
-                target=user,
-                direction='like'
-            ).exists()
-
-            if mutual_like:
-                # Create match
-                if user.user_type == 'applicant':
-                    applicant_profile = user.applicant_profile
-                    bc_member_profile = target_user.bc_member_profile
-                else:
-                    applicant_profile = target_user.applicant_profile
-                    bc_member_profile = user.bc_member_profile
-
-                # Check if applicant is already matched (has a confirmed match)
-                if not applicant_profile.has_been_matched:
-                    # Check if a match already exists (pending or otherwise)
-                    existing_match = BCMatch.objects.filter(
-                        applicant=applicant_profile,
-                        bc_member=bc_member_profile
-                    ).first()
-
-                    if not existing_match:
-                        # Create match with PENDING status - admin must confirm
-                        match = BCMatch.objects.create(
-                            applicant=applicant_profile,
-                            bc_member=bc_member_profile,
-                            status='pending'  # Requires admin confirmation
-                        )
-                        # NOTE: applicant is NOT marked as matched yet
-                        # Admin will mark them as matched when confirming
-
-                        # Send email notifications
-                        send_match_notification(match)
-
-                        match_created = True
-                        match_data = BCMatchSerializer(match).data
+        items = []
+        for item in swipes:
+            try:
+                target_id = int(item.get('target_id'))
+            except (AttributeError, TypeError, ValueError):
+                target_id = None
+            direction = item.get('direction') if isinstance(item, dict) else None
+            if not target_id or direction not in ['like', 'pass']:
+                return Response(
+                    {'error': 'Each swipe needs a target_id and a direction of "like" or "pass"'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            items.append((target_id, direction))
 
+        results = record_swipes(request.user, items)
         return Response({
-            'swipe': BCSwipeSerializer(swipe).data,
-            'match_created': match_created,
-            'match': match_data
+            'results': results,
+            'matches_created': sum(result['match_created'] for result in results),
         })
 
 
@@ -334,33 +403,52 @@ class MatchViewSet(viewsets.ReadOnlyModelViewSet):
 
     Users can see all their matches (pending, confirmed, completed).
     Status field indicates whether admin has confirmed the match.
+
+    ``/api/matches/summary/`` is the lightweight list for the matches tab:
+    counterpart, last message and unread count, without chat histories.
     """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = BCMatchSerializer
 
-    def get_queryset(self):
+    def get_user_matches(self):
         user = self.request.user
         # Exclude rejected matches from user view
         status_filter = ['pending', 'confirmed', 'completed']
 
         if user.user_type == 'applicant':
-            try:
-                return BCMatch.objects.filter(
-                    applicant=user.applicant_profile,
-                    status__in=status_filter
-                )
-            except BCApplicantProfile.DoesNotExist:
-                return BCMatch.objects.none()
+            return BCMatch.objects.filter(applicant__user=user, status__in=status_filter)
         elif user.user_type == 'bc_member':
-            try:
-                return BCMatch.objects.filter(
-                    bc_member=user.bc_member_profile,
-                    status__in=status_filter
-                )
-            except BCMemberProfile.DoesNotExist:
-                return BCMatch.objects.none()
+            return BCMatch.objects.filter(bc_member__user=user, status__in=status_filter)
         return BCMatch.objects.none()
 
+    def get_queryset(self):
+        return self.get_user_matches().select_related(
+            'applicant__user', 'bc_member__user'
+        ).prefetch_related('messages__sender')
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """List matches with last-message preview and unread count in one query."""
+        user = request.user
+        messages = BCMessage.objects.filter(match=OuterRef('pk'))
+        last_message = messages.order_by('-id')
+        # Unread = received after the caller's own read cursor
+        cursor = 'applicant_last_read_message_id' if user.user_type == 'applicant' else 'bc_member_last_read_message_id'
+        unread = messages.filter(id__gt=OuterRef(cursor)).exclude(sender=user).order_by().values('match')
+
+        matches = self.get_user_matches().select_related(
+            'applicant__user', 'bc_member__user'
+        ).annotate(
+            last_message_id=Subquery(last_message.values('id')[:1]),
+            last_message_content=Subquery(last_message.values(preview=Left('content', 200))[:1]),
+            last_message_sender_id=Subquery(last_message.values('sender_id')[:1]),
+            last_message_at=Subquery(last_message.values('sent_at')[:1]),
+            unread_count=Coalesce(Subquery(unread.annotate(count=Count('id')).values('count')), 0),
+        ).order_by(Coalesce('last_message_at', 'matched_at').desc())
+
+        serializer = BCMatchSummarySerializer(matches, many=True, context={'user': user})
+        return Response(serializer.data)
+
 
 class MessageViewSet(viewsets.ModelViewSet):
     """ViewSet for chat messages within a match.
@@ -373,11 +461,71 @@ class MessageViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         match_id = self.kwargs.get('match_id')
-        return BCMessage.objects.filter(match_id=match_id)
+        return BCMessage.objects.filter(match_id=match_id).select_related('sender')
+
+    def get_participant_match(self):
+        """The URL's match if the caller takes part in it, else None."""
+        user = self.request.user
+        return BCMatch.objects.select_related('applicant', 'bc_member').filter(
+            Q(applicant__user=user) | Q(bc_member__user=user),
+            id=self.kwargs.get('match_id'),
+        ).first()
+
+    def list(self, request, *args, **kwargs):
+        """List messages, optionally one keyset page at a time.
+
+        ``?after_id=<id>`` returns only messages newer than ``id`` (what a
+        poll needs; an empty list means nothing changed). ``?before_id=<id>``
+        returns up to ``?limit=`` messages older than ``id`` for scrolling
+        back through history. Both are served by the (match, id) index.
+        Without either, the whole conversation is returned; clients can send
+        the ``ETag`` back as ``If-None-Match`` to get a 304 when it is unchanged.
+        """
+        match = self.get_participant_match()
+        if match is None:
+            return Response(
+                {'error': 'Not authorized'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        context = {'match': match}
 
+        try:
+            after_id = int(request.query_params['after_id']) if 'after_id' in request.query_params else None
+            before_id = int(request.query_params['before_id']) if 'before_id' in request.query_params else None
+            limit = int(request.query_params.get('limit', settings.BC_MESSAGE_PAGE_SIZE))
+        except ValueError:
+            return Response(
+                {'error': 'after_id, before_id and limit must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, settings.BC_MESSAGE_MAX_PAGE_SIZE))
+        messages = self.get_queryset()
+
+        if after_id is not None:
+            page = list(messages.filter(id__gt=after_id).order_by('id')[:limit])
+            return Response(BCMessageSerializer(page, many=True, context=context).data)
+
+        if before_id is not None:
+            page = list(messages.filter(id__lt=before_id).order_by('-id')[:limit])
+            page.reverse()
+            return Response(BCMessageSerializer(page, many=True, context=context).data)
+
+        last_id = messages.aggregate(last_id=Max('id'))['last_id']
+        etag = '"{}-{}-{}-{}"'.format(
+            match.id, last_id or 0,
+            match.applicant_last_read_message_id, match.bc_member_last_read_message_id,
+        )
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(BCMessageSerializer(messages.order_by('id'), many=True, context=context).data)
+        response['ETag'] = etag
+        return response
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         match_id = self.kwargs.get('match_id')
-        match = get_object_or_404(BCMatch, id=match_id)
+        match = get_object_or_404(BCMatch.objects.select_related('applicant', 'bc_member'), id=match_id)
 
         # Only allow messaging for confirmed matches
         if match.status != 'confirmed':
@@ -389,8 +537,8 @@ class MessageViewSet(viewsets.ModelViewSet):
         # Verify user is part of this match
         user = request.user
         is_participant = (
-            (user.user_type == 'applicant' and match.applicant.user == user) or
-            (user.user_type == 'bc_member' and match.bc_member.user == user)
+            (user.user_type == 'applicant' and match.applicant.user_id == user.id) or
+            (user.user_type == 'bc_member' and match.bc_member.user_id == user.id)
         )
 
         if not is_participant:
@@ -404,18 +552,63 @@ class MessageViewSet(viewsets.ModelViewSet):
             sender=user,
             content=request.data.get('content', '')
         )
+        data = BCMessageSerializer(message).data
+        realtime.publish_message(message, data)
 
-        return Response(
-            BCMessageSerializer(message).data,
-            status=status.HTTP_201_CREATED
-        )
+        return Response(data, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['post'])
     def mark_read(self, request, match_id=None):
-        """Mark all messages in match as read for current user."""
-        match = get_object_or_404(BCMatch, id=match_id)
-        BCMessage.objects.filter(match=match).exclude(sender=request.user).update(is_read=True)
-        return Response({'status': 'ok'})
+        """Move the caller's read cursor forward.
+
+        Marks everything up to ``last_read_message_id`` (default: the newest
+        message) as read with a single-row update; the cursor never moves
+        backwards.
+        """
+        match = self.get_participant_match()
+        if match is None:
+            return Response(
+                {'error': 'Not authorized'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        messages = BCMessage.objects.filter(match=match)
+        if 'last_read_message_id' in request.data:
+            try:
+                last_read_id = int(request.data['last_read_message_id'])
+            except (TypeError, ValueError):
+                return Response(
+                    {'error': 'last_read_message_id must be an integer'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            last_read_id = messages.filter(id__lte=last_read_id).aggregate(last_id=Max('id'))['last_id']
+        else:
+            last_read_id = messages.aggregate(last_id=Max('id'))['last_id']
+
+        cursor = match.read_cursor_field(request.user.id)
+        if last_read_id and getattr(match, cursor) < last_read_id:
+            moved = BCMatch.objects.filter(
+                id=match.id, **{f'{cursor}__lt': last_read_id}
+            ).update(**{cursor: last_read_id})
+            if moved:
+                setattr(match, cursor, last_read_id)
+                realtime.publish_read_receipt(match, request.user, last_read_id)
+        return Response({'status': 'ok', 'last_read_message_id': getattr(match, cursor)})
+
+
+class StreamTicketView(APIView):
+    """Issue a short-lived ticket for opening the event stream.
+
+    ``EventSource`` cannot send the token header, and a token in the URL
+    would be logged; see ``bc_api.realtime``.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        return Response({
+            'ticket': realtime.issue_ticket(request.user),
+            'expires_in': settings.BC_STREAM_TICKET_TTL,
+        })
 
 
 class ResetProfileView(APIView):
@@ -432,6 +625,9 @@ class ResetProfileView(APIView):
         # Delete swipes
         BCSwipe.objects.filter(Q(swiper=user) | Q(target=user)).delete()
 
+        # Leave every deck until a new profile is set up
+        deck.profile_left_discovery(user.id)
+
         # Reset user state
         user.user_type = None
         user.has_completed_setup = False
@@ -481,14 +677,69 @@ class AdminCheckView(APIView):
         })
 
 
-class AdminPendingMembersView(APIView):
-    """List BC member applications pending approval."""
+def _bulk_ids(request):
+    """Read the ``ids`` list of a bulk admin request.
+
+    Returns ``(ids, error_response)``; exactly one of them is None.
+    """
+    ids = request.data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        return None, Response(
+            {'error': 'Expected a non-empty "ids" list'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(ids) > settings.BC_ADMIN_BULK_MAX_SIZE:
+        return None, Response(
+            {'error': f'At most {settings.BC_ADMIN_BULK_MAX_SIZE} ids per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        return {int(value) for value in ids}, None
+    except (TypeError, ValueError):
+        return None, Response(
+            {'error': 'ids must be integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+def _query_bool(value):
+    """Parse a ``true``/``false`` query parameter; None if absent or unrecognised."""
+    return {'true': True, '1': True, 'false': False, '0': False}.get((value or '').lower())
+
+
+class AdminListView(generics.ListAPIView):
+    """Base for the admin list endpoints.
+
+    Every page is one query: keyset-paginated (``?cursor=``, ``?limit=``),
+    searchable (``?search=``) and orderable (``?ordering=``) over fields
+    the query already loads. Subclasses add their own filters.
+    """
     permission_classes = [IsAdminUser]
+    pagination_class = AdminCursorPagination
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
 
-    def get(self, request):
-        pending = BCMemberProfile.objects.filter(is_approved=False).select_related('user')
-        serializer = BCMemberProfileSerializer(pending, many=True)
-        return Response({'pending_members': serializer.data})
+
+class AdminMemberListView(AdminListView):
+    serializer_class = AdminBCMemberSerializer
+    search_fields = ['user__name', 'user__email', 'major']
+    # Annotated so the cursor can read the position straight off each row
+    ordering_fields = ['id', 'created_at', 'user_name', 'year', 'semesters_in_bc']
+    ordering = '-created_at'
+
+    def get_queryset(self):
+        members = BCMemberProfile.objects.select_related('user').annotate(user_name=F('user__name'))
+        year = self.request.query_params.get('year')
+        if year:
+            members = members.filter(year=year)
+        return members
+
+
+class AdminPendingMembersView(AdminMemberListView):
+    """List BC member applications pending approval (``?year=`` filters)."""
+    results_key = 'pending_members'
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_approved=False)
 
 
 class AdminApproveMemberView(APIView):
@@ -513,6 +764,8 @@ class AdminApproveMemberView(APIView):
             member.user.has_completed_setup = True
             member.user.save()
 
+            deck.profile_became_discoverable(member)
+
             return Response({
                 'status': 'approved',
                 'member': BCMemberProfileSerializer(member).data
@@ -521,6 +774,7 @@ class AdminApproveMemberView(APIView):
             # Delete the profile
             user = member.user
             member.delete()
+            deck.profile_left_discovery(user.id)
             user.user_type = None
             user.has_completed_setup = False
             user.save()
@@ -533,27 +787,79 @@ class AdminApproveMemberView(APIView):
             )
 
 
-class AdminAllApplicantsView(APIView):
-    """List all applicants."""
+class AdminBulkApproveMembersView(APIView):
+    """Approve several pending BC member applications at once.
+
+    Expects ``{"ids": [...]}``. Ids that are unknown or already approved are
+    reported under ``skipped``.
+    """
     permission_classes = [IsAdminUser]
 
-    def get(self, request):
-        applicants = BCApplicantProfile.objects.all().select_related('user')
-        serializer = BCApplicantProfileSerializer(applicants, many=True)
-        return Response({'applicants': serializer.data})
+    def post(self, request):
+        ids, error = _bulk_ids(request)
+        if error:
+            return error
+        approved = sorted(member.id for member in approvals.approve_members(ids, request.user))
+        return Response({
+            'status': 'approved',
+            'approved': approved,
+            'skipped': sorted(ids - set(approved)),
+        })
 
 
-class AdminAllMatchesView(APIView):
-    """List all matches with their status."""
-    permission_classes = [IsAdminUser]
+class AdminAllApplicantsView(AdminListView):
+    """List all applicants (``?role=``, ``?matched=true|false`` filter)."""
+    serializer_class = AdminBCApplicantSerializer
+    results_key = 'applicants'
+    search_fields = ['user__name', 'user__email']
+    ordering_fields = ['id', 'created_at', 'user_name', 'role']
+    ordering = '-created_at'
 
-    def get(self, request):
-        matches = BCMatch.objects.all().select_related(
-            'applicant', 'applicant__user',
-            'bc_member', 'bc_member__user'
+    def get_queryset(self):
+        applicants = BCApplicantProfile.objects.select_related('user').annotate(user_name=F('user__name'))
+        role = self.request.query_params.get('role')
+        if role:
+            applicants = applicants.filter(role=role)
+        matched = _query_bool(self.request.query_params.get('matched'))
+        if matched is not None:
+            applicants = applicants.filter(has_been_matched=matched)
+        return applicants
+
+
+class AdminAllMatchesView(AdminListView):
+    """List all matches with their status.
+
+    Filters: ``?status=`` (comma-separated), ``?role=`` (applicant role),
+    ``?year=`` (member year). Message counts come from subqueries instead
+    of loading each chat.
+    """
+    serializer_class = AdminBCMatchSerializer
+    results_key = 'matches'
+    search_fields = [
+        'applicant__user__name', 'applicant__user__email',
+        'bc_member__user__name', 'bc_member__user__email',
+    ]
+    ordering_fields = ['id', 'matched_at', 'status']
+    ordering = '-matched_at'
+
+    def get_queryset(self):
+        messages = BCMessage.objects.filter(match=OuterRef('pk')).order_by()
+        matches = BCMatch.objects.select_related(
+            'applicant__user', 'bc_member__user', 'confirmed_by'
+        ).annotate(
+            message_count=Coalesce(Subquery(
+                messages.values('match').annotate(count=Count('id')).values('count')
+            ), 0),
+            last_message_at=Subquery(messages.order_by('-id').values('sent_at')[:1]),
         )
-        serializer = BCMatchSerializer(matches, many=True)
-        return Response({'matches': serializer.data})
+        params = self.request.query_params
+        if params.get('status'):
+            matches = matches.filter(status__in=params['status'].split(','))
+        if params.get('role'):
+            matches = matches.filter(applicant__role=params['role'])
+        if params.get('year'):
+            matches = matches.filter(bc_member__year=params['year'])
+        return matches
 
 
 class AdminApproveMatchView(APIView):
@@ -568,17 +874,20 @@ class AdminApproveMatchView(APIView):
         match = get_object_or_404(BCMatch, id=match_id)
 
         if action == 'confirm':
-            match.status = 'confirmed'
-            match.confirmed_by = request.user
-            match.confirmed_at = timezone.now()
-            match.save()
+            with transaction.atomic():
+                match.status = 'confirmed'
+                match.confirmed_by = request.user
+                match.confirmed_at = timezone.now()
+                match.save()
 
-            # Mark applicant as matched
-            match.applicant.has_been_matched = True
-            match.applicant.save()
+                # Mark applicant as matched
+                match.applicant.has_been_matched = True
+                match.applicant.save()
+                deck.profile_left_discovery(match.applicant.user_id)
 
-            # Send confirmation email
-            send_match_confirmed_notification(match)
+                # Queue confirmation emails with the status change
+                send_match_confirmed_notification(match)
+                realtime.publish_match_status(match)
 
             return Response({
                 'status': 'confirmed',
@@ -589,11 +898,13 @@ class AdminApproveMatchView(APIView):
             match.confirmed_by = request.user
             match.confirmed_at = timezone.now()
             match.save()
+            realtime.publish_match_status(match)
 
             return Response({'status': 'rejected'})
         elif action == 'complete':
             match.status = 'completed'
             match.save()
+            realtime.publish_match_status(match)
 
             return Response({'status': 'completed'})
         else:
@@ -603,6 +914,77 @@ class AdminApproveMatchView(APIView):
             )
 
 
+class AdminBulkMatchActionView(APIView):
+    """Confirm, reject or complete several matches at once.
+
+    Expects ``{"ids": [...], "action": "confirm" | "reject" | "complete"}``.
+    Confirm and reject apply to pending matches, complete to confirmed ones;
+    confirm also passes over applicants who already have a confirmed match
+    and all but one match per applicant. Other ids are reported under
+    ``skipped``.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        action = request.data.get('action')
+        if action not in approvals.MATCH_ACTIONS:
+            return Response(
+                {'error': 'Invalid action. Use "confirm", "reject", or "complete"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ids, error = _bulk_ids(request)
+        if error:
+            return error
+        updated = sorted(match.id for match in approvals.update_matches(ids, action, request.user))
+        return Response({
+            'status': approvals.MATCH_ACTIONS[action][1],
+            'updated': updated,
+            'skipped': sorted(ids - set(updated)),
+        })
+
+
+class AdminMatchSuggestionsView(APIView):
+    """Propose the pending matches to confirm (see ``bc_api.assignment``).
+
+    GET returns the proposal; POST confirms it in bulk. Both accept
+    ``capacity`` (confirmed matches per member) and ``weighting``
+    (``overlap`` or ``none``), as query parameters or in the body.
+    """
+    permission_classes = [IsAdminUser]
+
+    def _suggest(self, params):
+        weighting = params.get('weighting', 'overlap')
+        if weighting not in ('overlap', 'none'):
+            raise ValueError('weighting must be "overlap" or "none"')
+        capacity = params.get('capacity')
+        if capacity is not None:
+            capacity = int(capacity)
+            if capacity < 1:
+                raise ValueError('capacity must be at least 1')
+        return assignment.suggest_confirmations(capacity, weighting)
+
+    def get(self, request):
+        try:
+            proposals, summary = self._suggest(request.query_params)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'proposals': proposals, **summary})
+
+    def post(self, request):
+        try:
+            proposals, summary = self._suggest(request.data)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        proposed = {proposal['match_id'] for proposal in proposals}
+        confirmed = {match.id for match in approvals.update_matches(list(proposed), 'confirm', request.user)}
+        return Response({
+            'status': 'confirmed',
+            'confirmed': sorted(confirmed),
+            'skipped': sorted(proposed - confirmed),
+            **summary,
+        })
+
+
 class AdminCreateMemberView(APIView):
     """Create a BC member profile manually (for admins)."""
     permission_classes = [IsAdminUser]
@@ -670,6 +1052,7 @@ class AdminCreateMemberView(APIView):
             approved_by=request.user,
             approved_at=timezone.now(),
         )
+        deck.profile_became_discoverable(profile)
 
         return Response({
             'status': 'created',
@@ -677,14 +1060,55 @@ class AdminCreateMemberView(APIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class AdminAllMembersView(APIView):
-    """List all BC members (approved and pending)."""
+class AdminAllMembersView(AdminMemberListView):
+    """List all BC members (``?approved=true|false``, ``?year=`` filter)."""
+    results_key = 'members'
+
+    def get_queryset(self):
+        members = super().get_queryset()
+        approved = _query_bool(self.request.query_params.get('approved'))
+        if approved is not None:
+            members = members.filter(is_approved=approved)
+        return members
+
+
+class AdminExportView(APIView):
+    """Stream a dataset as CSV or NDJSON, e.g. ``/api/admin/export/matches.csv``.
+
+    Filters: ``?since=`` and ``?until=`` (inclusive ``YYYY-MM-DD`` dates) and
+    ``?status=`` (comma-separated; each dataset has its own values, see
+    ``bc_api.exports``).
+    """
     permission_classes = [IsAdminUser]
 
-    def get(self, request):
-        members = BCMemberProfile.objects.all().select_related('user')
-        serializer = BCMemberProfileSerializer(members, many=True)
-        return Response({'members': serializer.data})
+    def get(self, request, dataset, fmt):
+        if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+            return Response(
+                {'error': f'Unknown export. Use one of {sorted(exports.DATASETS)} as csv or ndjson'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        params = request.query_params
+        try:
+            since, until = (
+                datetime.date.fromisoformat(params[name]) if params.get(name) else None
+                for name in ('since', 'until')
+            )
+        except ValueError:
+            return Response(
+                {'error': 'since and until must be YYYY-MM-DD dates'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        statuses = [value for value in params.get('status', '').split(',') if value]
+        allowed = exports.DATASETS[dataset].statuses
+        if any(value not in allowed for value in statuses):
+            return Response(
+                {'error': f'status must be one of {sorted(allowed)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return exports.export_response(
+            dataset, fmt, since, until, statuses,
+            asynchronous=isinstance(request._request, ASGIRequest),
+        )
 
 
 class AdminStatsView(APIView):
@@ -692,17 +1116,45 @@ class AdminStatsView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
+        """Totals plus a per-day breakdown over the last ``?days=`` (default 30).
+
+        Served from a short-lived cache; see ``bc_api.stats``.
+        """
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response(
+                {'error': 'days must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        totals, daily = stats.get_stats(days)
         return Response({
-            'total_members': BCMemberProfile.objects.filter(is_approved=True).count(),
-            'pending_members': BCMemberProfile.objects.filter(is_approved=False).count(),
-            'total_applicants': BCApplicantProfile.objects.count(),
-            'total_matches': BCMatch.objects.count(),
-            'pending_matches': BCMatch.objects.filter(status='pending').count(),
-            'confirmed_matches': BCMatch.objects.filter(status='confirmed').count(),
-            'completed_matches': BCMatch.objects.filter(status='completed').count(),
+            **totals,
+            'daily': daily,
+            'discover_cache': caching.discover_cache_stats(),
         })
 
 
+class AdminAnalyticsView(APIView):
+    """Recruiting funnel for the last ``?days=`` (default 30) and ``?hours=`` (default 48).
+
+    Reads only the rollup tables maintained by ``manage.py rollup_analytics``;
+    see ``bc_api.analytics``.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 30))
+            hours = int(request.query_params.get('hours', 48))
+        except ValueError:
+            return Response(
+                {'error': 'days and hours must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(analytics.get_funnel(days, hours))
+
+
 class BCMemberJoinView(APIView):
     """
     Allow BC members to self-register via:
@@ -715,16 +1167,14 @@ class BCMemberJoinView(APIView):
 
     def post(self, request):
         from django.utils import timezone
-        from .models import BCMemberWhitelist
 
         # Check authorization: either valid invite code OR on whitelist
         invite_code = request.data.get('invite_code', '')
         valid_code = settings.BC_INVITE_CODE
 
-        is_whitelisted = BCMemberWhitelist.objects.filter(email__iexact=request.user.email).exists()
         has_valid_invite = invite_code == valid_code
 
-        if not has_valid_invite and not is_whitelisted:
+        if not has_valid_invite and not whitelist.is_whitelisted(request.user.email, check_database=True):
             return Response(
                 {'error': 'You are not authorized to register as a BC member. Contact admin to be added to the whitelist.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -770,6 +1220,7 @@ class BCMemberJoinView(APIView):
             project_experience=project_experience,
             is_approved=True  # Auto-approve for whitelisted/invite code users
         )
+        deck.profile_became_discoverable(profile)
 
         return Response({
             'success': True,
@@ -795,8 +1246,7 @@ class CheckWhitelistView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        from .models import BCMemberWhitelist
-        is_whitelisted = BCMemberWhitelist.objects.filter(email__iexact=request.user.email).exists()
+        is_whitelisted = whitelist.is_whitelisted(request.user.email)
         has_profile = hasattr(request.user, 'bc_member_profile')
 
         return Response({
@@ -0,0 +1,55 @@
+"""
+Cached BC member whitelist checks.
+
+Every Google login and the BC member join flow ask whether an email is on
+the whitelist. The list is small and rarely edited, so each worker keeps the
+whole set of (lowercased) emails in memory and answers from it. The set is
+reloaded when the whitelist generation (``caching.whitelist_generation``)
+moves, which the signals and the roster import bump on every change, and in
+any case after ``BC_WHITELIST_CACHE_TTL`` seconds.
+
+A bump only reaches every worker at once when the Django cache is shared
+(``REDIS_URL``); otherwise a change made by another process, such as
+``manage.py import_roster``, shows up after the TTL. The paths that make
+someone a BC member therefore pass ``check_database=True``: a yes from the
+cached set is confirmed against the table, so a removed email can't be used
+to join even while some worker still holds it.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from . import caching
+from .models import BCMemberWhitelist
+
+_lock = threading.Lock()
+_cached = {'emails': None, 'generation': None, 'expires': 0}
+
+
+def emails():
+    """The set of whitelisted emails, loaded at most once per change or TTL."""
+    generation = caching.whitelist_generation()
+    with _lock:
+        if _cached['generation'] == generation and _cached['expires'] > time.monotonic():
+            return _cached['emails']
+        loaded = frozenset(BCMemberWhitelist.objects.values_list('email', flat=True))
+        _cached.update(emails=loaded, generation=generation, expires=time.monotonic() + settings.BC_WHITELIST_CACHE_TTL)
+        return loaded
+
+
+def is_whitelisted(email, check_database=False):
+    """Whether ``email`` is on the whitelist.
+
+    With ``check_database`` a hit in the cached set costs one query to
+    confirm it; a miss still costs none.
+    """
+    email = BCMemberWhitelist.normalize_email(email)
+    if email not in emails():
+        return False
+    return not check_database or BCMemberWhitelist.objects.filter(email=email).exists()
+
+
+def clear():
+    with _lock:
+        _cached.update(emails=None, generation=None, expires=0)
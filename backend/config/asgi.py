@@ -2,6 +2,8 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Production runs this app (uvicorn workers under gunicorn) so the long-lived
+``/api/events/`` streams don't each tie up a WSGI worker.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
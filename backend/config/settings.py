@@ -127,6 +127,30 @@ else:
         }
     }
 
+# Cache
+# Discover pages, logins and the whitelist are invalidated by bumping
+# generation counters kept in this cache (bc_api.caching), so every web
+# worker has to see the same cache. Set REDIS_URL to share one; without it
+# each process has its own memory cache and only a single worker is allowed
+# (WEB_CONCURRENCY, which gunicorn reads for its worker count).
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    if int(os.getenv('WEB_CONCURRENCY', '1')) > 1:
+        from django.core.exceptions import ImproperlyConfigured
+        raise ImproperlyConfigured('WEB_CONCURRENCY > 1 needs a shared cache: set REDIS_URL')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -174,7 +198,7 @@ AUTH_USER_MODEL = 'bc_api.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'bc_api.authentication.ProfileTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -208,6 +232,12 @@ if FRONTEND_URL and 'localhost' not in FRONTEND_URL:
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Let clients send Idempotency-Key on retries and see when a response was
+# replayed, and revalidate message lists with ETag / If-None-Match
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'if-none-match')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed', 'ETag']
+
 # Django Allauth settings
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
@@ -257,3 +287,66 @@ REST_AUTH = {
 
 # BC Member invite code for self-registration
 BC_INVITE_CODE = os.getenv('BC_INVITE_CODE', 'garvisawesome')
+
+# Discovery deck paging
+BC_DISCOVER_PAGE_SIZE = int(os.getenv('BC_DISCOVER_PAGE_SIZE', '20'))
+BC_DISCOVER_MAX_PAGE_SIZE = int(os.getenv('BC_DISCOVER_MAX_PAGE_SIZE', '50'))
+
+# Maximum number of swipes accepted by /api/swipe/batch/
+BC_SWIPE_BATCH_MAX_SIZE = int(os.getenv('BC_SWIPE_BATCH_MAX_SIZE', '100'))
+
+# How long (seconds) a stored Idempotency-Key response can be replayed
+BC_IDEMPOTENCY_KEY_TTL = int(os.getenv('BC_IDEMPOTENCY_KEY_TTL', str(24 * 60 * 60)))
+
+# Chat history paging for /api/matches/<id>/messages/?before_id=
+BC_MESSAGE_PAGE_SIZE = int(os.getenv('BC_MESSAGE_PAGE_SIZE', '50'))
+BC_MESSAGE_MAX_PAGE_SIZE = int(os.getenv('BC_MESSAGE_MAX_PAGE_SIZE', '200'))
+
+# Pub/sub backend for /api/events/: InProcessBroker for a single worker,
+# PostgresBroker (LISTEN/NOTIFY) when running several
+BC_REALTIME_BACKEND = os.getenv('BC_REALTIME_BACKEND', 'bc_api.realtime.InProcessBroker')
+
+# Seconds a stream ticket (POST /api/events/ticket/) can be used to open
+# /api/events/ (and reconnect to it) after it was issued
+BC_STREAM_TICKET_TTL = int(os.getenv('BC_STREAM_TICKET_TTL', '60'))
+
+# Outbox delivery (manage.py send_queued_emails): give up after this many tries
+BC_EMAIL_MAX_ATTEMPTS = int(os.getenv('BC_EMAIL_MAX_ATTEMPTS', '8'))
+# Seconds a worker holds a claimed batch before another may retry it
+BC_EMAIL_LEASE = int(os.getenv('BC_EMAIL_LEASE', '600'))
+
+# New-message email digests: wait this long (seconds) after the first unread
+# message so a conversation becomes one email, and ignore anything older
+BC_MESSAGE_DIGEST_WINDOW = int(os.getenv('BC_MESSAGE_DIGEST_WINDOW', str(15 * 60)))
+BC_MESSAGE_DIGEST_MAX_AGE = int(os.getenv('BC_MESSAGE_DIGEST_MAX_AGE', str(3 * 24 * 60 * 60)))
+
+# Admin dashboard stats: cache lifetime (seconds), and whether to maintain and
+# read the BCStatCounter table instead of aggregating the source tables
+# (run manage.py rebuild_stat_counters when turning it on)
+BC_ADMIN_STATS_CACHE_TTL = int(os.getenv('BC_ADMIN_STATS_CACHE_TTL', '30'))
+BC_STATS_COUNTERS = os.getenv('BC_STATS_COUNTERS', 'False') == 'True'
+
+# Maximum number of ids accepted by the admin bulk approve/confirm endpoints
+BC_ADMIN_BULK_MAX_SIZE = int(os.getenv('BC_ADMIN_BULK_MAX_SIZE', '1000'))
+
+# Funnel analytics rollups (manage.py rollup_analytics): only events at least
+# this many seconds old are rolled up, so in-flight transactions can't commit
+# behind the high-water mark
+BC_ROLLUP_LAG = int(os.getenv('BC_ROLLUP_LAG', '300'))
+
+# Match suggestions: how many confirmed coffee chats one BC member can hold
+BC_MATCH_MEMBER_CAPACITY = int(os.getenv('BC_MATCH_MEMBER_CAPACITY', '3'))
+
+# API token logins cached per worker (bc_api.authentication), only with a
+# shared cache (REDIS_URL): lifetime in seconds (0 disables the cache) and
+# maximum number of tokens kept
+BC_AUTH_CACHE_TTL = int(os.getenv('BC_AUTH_CACHE_TTL', '60'))
+BC_AUTH_CACHE_SIZE = int(os.getenv('BC_AUTH_CACHE_SIZE', '10000'))
+
+# How long (seconds) a worker may answer whitelist checks from its cached
+# copy of the list before reloading it, even if no change was signalled
+BC_WHITELIST_CACHE_TTL = int(os.getenv('BC_WHITELIST_CACHE_TTL', '300'))
+
+# Background threads per worker that resize uploaded photos (bc_api.photos);
+# 0 resizes them in the request instead
+BC_PHOTO_WORKERS = int(os.getenv('BC_PHOTO_WORKERS', '2'))
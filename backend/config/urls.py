@@ -2,9 +2,9 @@
 URL configuration for Tindler BC Coffee Chat backend.
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from bc_api.photos import serve_media
 from bc_api.views import OAuthCallbackView
 
 urlpatterns = [
@@ -24,6 +24,7 @@ urlpatterns = [
     path('accounts/', include('allauth.urls')),
 ]
 
-# Serve media files in development
+# Serve media files in development (content-addressed photos with immutable
+# cache headers; a proxy serving /media/ in production should do the same)
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve_media)]
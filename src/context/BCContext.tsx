@@ -1,4 +1,4 @@
-import React, { createContext, useContext, useReducer, ReactNode, useCallback, useEffect, useState } from 'react';
+import React, { createContext, useContext, useReducer, ReactNode, useCallback, useEffect, useRef, useState } from 'react';
 import { BCUserType, BCMemberProfile, BCApplicantProfile, BCMatch, BCMessage } from '../services/types';
 import bcApiService from '../services/bcApi';
 
@@ -106,6 +106,7 @@ type BCAction =
   | { type: 'SHOW_MATCH_POPUP'; payload: BCMatch }
   | { type: 'HIDE_MATCH_POPUP' }
   | { type: 'ADD_MESSAGE'; payload: { matchId: string; message: BCMessage } }
+  | { type: 'ADD_MESSAGES'; payload: { matchId: string; messages: BCMessage[] } }
   | { type: 'RESET_BC_STATE' }
   | { type: 'SET_AUTHENTICATED'; payload: boolean }
   | { type: 'SET_LOADING'; payload: boolean }
@@ -247,6 +248,32 @@ function bcReducer(state: BCState, action: BCAction): BCState {
       };
     }
 
+    case 'ADD_MESSAGES': {
+      const { matchId, messages } = action.payload;
+      // Skip messages already shown (e.g. our own, added when sent)
+      const append = (existing: BCMessage[]) => {
+        const seen = new Set(existing.map((m) => m.id));
+        return [...existing, ...messages.filter((m) => !seen.has(m.id))];
+      };
+
+      if (state.applicantMatch && state.applicantMatch.id === matchId) {
+        return {
+          ...state,
+          applicantMatch: {
+            ...state.applicantMatch,
+            messages: append(state.applicantMatch.messages),
+          },
+        };
+      }
+
+      return {
+        ...state,
+        memberMatches: state.memberMatches.map((m) =>
+          m.id === matchId ? { ...m, messages: append(m.messages) } : m
+        ),
+      };
+    }
+
     case 'RESET_BC_STATE':
       return { ...defaultState, isAuthenticated: state.isAuthenticated, apiUser: null };
 
@@ -298,7 +325,8 @@ interface BCContextType extends BCState {
   getAvailableProfiles: () => (BCMemberProfile | BCApplicantProfile)[];
   loadUserFromAPI: () => Promise<void>;
   loadMatchesFromAPI: () => Promise<void>;
-  loadMessagesFromAPI: (matchId: string) => Promise<void>;
+  loadMessagesFromAPI: (matchId: string, revalidate?: boolean) => Promise<void>;
+  loadNewMessagesFromAPI: (matchId: string, afterId: number) => Promise<void>;
   logout: () => Promise<void>;
   isApplicant: boolean;
   isBCMember: boolean;
@@ -442,15 +470,26 @@ export function BCProvider({ children }: { children: ReactNode }) {
     }
   }, [state.userType]);
 
-  // Load messages for a specific match from API
-  const loadMessagesFromAPI = useCallback(async (matchId: string) => {
+  // ETag of the last full message list loaded per match
+  const messageETags = useRef<Record<string, string>>({});
+
+  // Load messages for a specific match from API. With revalidate (the
+  // messages are already on screen) nothing is sent back if they are unchanged.
+  const loadMessagesFromAPI = useCallback(async (matchId: string, revalidate = false) => {
     if (!bcApiService.isAuthenticated()) {
       return;
     }
 
     try {
-      const response = await bcApiService.getMessages(parseInt(matchId));
-      const messagesData = response.results || response || [];
+      const etag = revalidate ? messageETags.current[matchId] : null;
+      const response = await bcApiService.getMessagesIfChanged(parseInt(matchId), etag);
+      if (response.etag) {
+        messageETags.current[matchId] = response.etag;
+      }
+      if (response.messages === null) {
+        return;
+      }
+      const messagesData = response.messages.results || response.messages || [];
       const currentUserId = state.apiUser?.id ? String(state.apiUser.id) : '';
       const messages = messagesData.map((m: any) => convertAPIMessage(m, currentUserId));
 
@@ -460,6 +499,26 @@ export function BCProvider({ children }: { children: ReactNode }) {
     }
   }, [state.apiUser]);
 
+  // Append only the messages newer than afterId (for polling)
+  const loadNewMessagesFromAPI = useCallback(async (matchId: string, afterId: number) => {
+    if (!bcApiService.isAuthenticated()) {
+      return;
+    }
+
+    try {
+      const messagesData = await bcApiService.getMessages(parseInt(matchId), { afterId });
+      if (!messagesData.length) {
+        return;
+      }
+      const currentUserId = state.apiUser?.id ? String(state.apiUser.id) : '';
+      const messages = messagesData.map((m: any) => convertAPIMessage(m, currentUserId));
+
+      dispatch({ type: 'ADD_MESSAGES', payload: { matchId, messages } });
+    } catch (error) {
+      console.error('Failed to load new messages from API:', error);
+    }
+  }, [state.apiUser]);
+
   // Logout function
   const logout = useCallback(async () => {
     try {
@@ -613,6 +672,7 @@ export function BCProvider({ children }: { children: ReactNode }) {
         loadUserFromAPI,
         loadMatchesFromAPI,
         loadMessagesFromAPI,
+        loadNewMessagesFromAPI,
         logout,
         isApplicant,
         isBCMember,
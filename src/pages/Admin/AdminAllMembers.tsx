@@ -3,6 +3,7 @@ import { motion } from 'framer-motion';
 import { useNavigate } from 'react-router-dom';
 import { ArrowLeft, UserCheck, Mail, Calendar } from 'lucide-react';
 import bcApiService from '../../services/bcApi';
+import { PhotoVariants } from '../../services/types';
 
 interface BCMember {
   id: number;
@@ -11,6 +12,7 @@ interface BCMember {
     name: string;
     email: string;
     photo_url: string;
+    photo: PhotoVariants | null;
   };
   year: string;
   major: string;
@@ -25,6 +27,7 @@ export function AdminAllMembers() {
   const navigate = useNavigate();
   const [members, setMembers] = useState<BCMember[]>([]);
   const [loading, setLoading] = useState(true);
+  const [next, setNext] = useState<string | null>(null);
 
   useEffect(() => {
     loadMembers();
@@ -32,9 +35,9 @@ export function AdminAllMembers() {
 
   const loadMembers = async () => {
     try {
-      const data = await bcApiService.getAdminAllMembers();
-      // Filter to only show approved members
-      setMembers((data.members || []).filter((m: BCMember) => m.is_approved));
+      const data = await bcApiService.getAdminAllMembers({ approved: true });
+      setMembers(data.members || []);
+      setNext(data.next);
     } catch (err) {
       console.error('Failed to load members:', err);
     } finally {
@@ -42,6 +45,17 @@ export function AdminAllMembers() {
     }
   };
 
+  const loadMore = async () => {
+    if (!next) return;
+    try {
+      const data = await bcApiService.getAdminNextPage(next);
+      setMembers(prev => [...prev, ...(data.members || [])]);
+      setNext(data.next);
+    } catch (err) {
+      console.error('Failed to load more:', err);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen bg-dark-gray flex items-center justify-center">
@@ -88,7 +102,7 @@ export function AdminAllMembers() {
                 {/* Profile Header */}
                 <div className="flex items-start gap-4 mb-3">
                   <img
-                    src={member.user.photo_url || '/profiles/default.jpg'}
+                    src={member.user.photo?.thumbnail || member.user.photo_url || '/profiles/default.jpg'}
                     alt={member.user.name}
                     className="w-14 h-14 rounded-xl object-cover"
                   />
@@ -146,6 +160,14 @@ export function AdminAllMembers() {
             ))}
           </div>
         )}
+        {next && (
+          <button
+            onClick={loadMore}
+            className="mt-6 w-full py-3 bg-zinc-800 hover:bg-zinc-700 text-white rounded-lg font-medium transition-colors"
+          >
+            LOAD MORE
+          </button>
+        )}
       </div>
     </div>
   );
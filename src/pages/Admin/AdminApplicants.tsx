@@ -3,6 +3,7 @@ import { motion } from 'framer-motion';
 import { useNavigate } from 'react-router-dom';
 import { ArrowLeft, Users, CheckCircle, XCircle } from 'lucide-react';
 import bcApiService from '../../services/bcApi';
+import { PhotoVariants } from '../../services/types';
 
 interface Applicant {
   id: number;
@@ -11,6 +12,7 @@ interface Applicant {
     name: string;
     email: string;
     photo_url: string;
+    photo: PhotoVariants | null;
   };
   role: string;
   why_bc: string;
@@ -23,6 +25,7 @@ export function AdminApplicants() {
   const navigate = useNavigate();
   const [applicants, setApplicants] = useState<Applicant[]>([]);
   const [loading, setLoading] = useState(true);
+  const [next, setNext] = useState<string | null>(null);
 
   useEffect(() => {
     loadApplicants();
@@ -32,6 +35,7 @@ export function AdminApplicants() {
     try {
       const data = await bcApiService.getAdminAllApplicants();
       setApplicants(data.applicants || []);
+      setNext(data.next);
     } catch (err) {
       console.error('Failed to load applicants:', err);
     } finally {
@@ -39,6 +43,17 @@ export function AdminApplicants() {
     }
   };
 
+  const loadMore = async () => {
+    if (!next) return;
+    try {
+      const data = await bcApiService.getAdminNextPage(next);
+      setApplicants(prev => [...prev, ...(data.applicants || [])]);
+      setNext(data.next);
+    } catch (err) {
+      console.error('Failed to load more:', err);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen bg-dark-gray flex items-center justify-center">
@@ -85,7 +100,7 @@ export function AdminApplicants() {
                 {/* Profile Header */}
                 <div className="flex items-start gap-4 mb-3">
                   <img
-                    src={applicant.user.photo_url || '/profiles/default.jpg'}
+                    src={applicant.user.photo?.thumbnail || applicant.user.photo_url || '/profiles/default.jpg'}
                     alt={applicant.user.name}
                     className="w-14 h-14 rounded-xl object-cover"
                   />
@@ -136,6 +151,14 @@ export function AdminApplicants() {
             ))}
           </div>
         )}
+        {next && (
+          <button
+            onClick={loadMore}
+            className="mt-6 w-full py-3 bg-zinc-800 hover:bg-zinc-700 text-white rounded-lg font-medium transition-colors"
+          >
+            LOAD MORE
+          </button>
+        )}
       </div>
     </div>
   );
@@ -3,6 +3,7 @@ import { motion } from 'framer-motion';
 import { useNavigate } from 'react-router-dom';
 import { ArrowLeft, Coffee, Check, X, CheckCircle, Clock, XCircle } from 'lucide-react';
 import bcApiService from '../../services/bcApi';
+import { PhotoVariants } from '../../services/types';
 
 interface Match {
   id: number;
@@ -12,6 +13,7 @@ interface Match {
       name: string;
       email: string;
       photo_url: string;
+      photo: PhotoVariants | null;
     };
     role: string;
   };
@@ -21,6 +23,7 @@ interface Match {
       name: string;
       email: string;
       photo_url: string;
+      photo: PhotoVariants | null;
     };
     year: string;
     major: string;
@@ -33,6 +36,7 @@ export function AdminMatches() {
   const navigate = useNavigate();
   const [matches, setMatches] = useState<Match[]>([]);
   const [loading, setLoading] = useState(true);
+  const [next, setNext] = useState<string | null>(null);
   const [processingId, setProcessingId] = useState<number | null>(null);
   const [filter, setFilter] = useState<'all' | 'pending' | 'confirmed' | 'completed'>('all');
 
@@ -44,6 +48,7 @@ export function AdminMatches() {
     try {
       const data = await bcApiService.getAdminAllMatches();
       setMatches(data.matches || []);
+      setNext(data.next);
     } catch (err) {
       console.error('Failed to load matches:', err);
     } finally {
@@ -87,6 +92,17 @@ export function AdminMatches() {
     completed: Coffee,
   };
 
+  const loadMore = async () => {
+    if (!next) return;
+    try {
+      const data = await bcApiService.getAdminNextPage(next);
+      setMatches(prev => [...prev, ...(data.matches || [])]);
+      setNext(data.next);
+    } catch (err) {
+      console.error('Failed to load more:', err);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen bg-dark-gray flex items-center justify-center">
@@ -170,7 +186,7 @@ export function AdminMatches() {
                     {/* Applicant */}
                     <div className="flex-1 text-center">
                       <img
-                        src={match.applicant.user.photo_url || '/profiles/default.jpg'}
+                        src={match.applicant.user.photo?.thumbnail || match.applicant.user.photo_url || '/profiles/default.jpg'}
                         alt={match.applicant.user.name}
                         className="w-14 h-14 rounded-full object-cover mx-auto mb-2"
                       />
@@ -184,7 +200,7 @@ export function AdminMatches() {
                     {/* BC Member */}
                     <div className="flex-1 text-center">
                       <img
-                        src={match.bc_member.user.photo_url || '/profiles/default.jpg'}
+                        src={match.bc_member.user.photo?.thumbnail || match.bc_member.user.photo_url || '/profiles/default.jpg'}
                         alt={match.bc_member.user.name}
                         className="w-14 h-14 rounded-full object-cover mx-auto mb-2"
                       />
@@ -230,6 +246,14 @@ export function AdminMatches() {
             })}
           </div>
         )}
+        {next && (
+          <button
+            onClick={loadMore}
+            className="mt-6 w-full py-3 bg-zinc-800 hover:bg-zinc-700 text-white rounded-lg font-medium transition-colors"
+          >
+            LOAD MORE
+          </button>
+        )}
       </div>
     </div>
   );
@@ -3,6 +3,7 @@ import { motion, AnimatePresence } from 'framer-motion';
 import { useNavigate } from 'react-router-dom';
 import { ArrowLeft, Check, X, User, Briefcase, MapPin, Clock } from 'lucide-react';
 import bcApiService from '../../services/bcApi';
+import { PhotoVariants } from '../../services/types';
 
 interface PendingMember {
   id: number;
@@ -11,6 +12,7 @@ interface PendingMember {
     name: string;
     email: string;
     photo_url: string;
+    photo: PhotoVariants | null;
   };
   year: string;
   major: string;
@@ -25,6 +27,7 @@ export function AdminPendingMembers() {
   const navigate = useNavigate();
   const [members, setMembers] = useState<PendingMember[]>([]);
   const [loading, setLoading] = useState(true);
+  const [next, setNext] = useState<string | null>(null);
   const [processingId, setProcessingId] = useState<number | null>(null);
 
   useEffect(() => {
@@ -35,6 +38,7 @@ export function AdminPendingMembers() {
     try {
       const data = await bcApiService.getAdminPendingMembers();
       setMembers(data.pending_members || []);
+      setNext(data.next);
     } catch (err) {
       console.error('Failed to load pending members:', err);
     } finally {
@@ -68,6 +72,17 @@ export function AdminPendingMembers() {
     }
   };
 
+  const loadMore = async () => {
+    if (!next) return;
+    try {
+      const data = await bcApiService.getAdminNextPage(next);
+      setMembers(prev => [...prev, ...(data.pending_members || [])]);
+      setNext(data.next);
+    } catch (err) {
+      console.error('Failed to load more:', err);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen bg-dark-gray flex items-center justify-center">
@@ -115,7 +130,7 @@ export function AdminPendingMembers() {
                 {/* Profile Header */}
                 <div className="flex items-start gap-4 mb-4">
                   <img
-                    src={member.user.photo_url || '/profiles/default.jpg'}
+                    src={member.user.photo?.thumbnail || member.user.photo_url || '/profiles/default.jpg'}
                     alt={member.user.name}
                     className="w-16 h-16 rounded-xl object-cover"
                   />
@@ -195,6 +210,14 @@ export function AdminPendingMembers() {
             ))}
           </AnimatePresence>
         )}
+        {next && (
+          <button
+            onClick={loadMore}
+            className="mt-6 w-full py-3 bg-zinc-800 hover:bg-zinc-700 text-white rounded-lg font-medium transition-colors"
+          >
+            LOAD MORE
+          </button>
+        )}
       </div>
     </div>
   );
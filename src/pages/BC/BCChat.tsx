@@ -6,6 +6,9 @@ import { useBC } from '../../context/BCContext';
 import { BCMessage, BCMatch } from '../../services/types';
 import bcApiService from '../../services/bcApi';
 
+// How often an open chat checks for new messages
+const POLL_INTERVAL_MS = 5000;
+
 function formatTime(date: Date): string {
   return date.toLocaleTimeString('en-US', {
     hour: 'numeric',
@@ -54,6 +57,8 @@ export function BCChat() {
     addMessage,
     isAuthenticated,
     loadMessagesFromAPI,
+    loadNewMessagesFromAPI,
+    loadMatchesFromAPI,
   } = useBC();
 
   const [inputValue, setInputValue] = useState('');
@@ -81,21 +86,60 @@ export function BCChat() {
     }
   }, [userType, match, isApplicant, navigate]);
 
-  // Load messages from API if authenticated
+  // Newest server message id shown, for polling with after_id
+  const messages = match?.messages;
+  const lastMessageId = (messages || []).reduce((last, m) => {
+    const id = Number(m.id);
+    return Number.isInteger(id) && id > last ? id : last;
+  }, 0);
+  const lastMessageIdRef = useRef(lastMessageId);
+  lastMessageIdRef.current = lastMessageId;
+  const hasMatch = !!match;
+
+  // Load messages from API once per conversation if authenticated
   useEffect(() => {
-    if (isAuthenticated && match && matchId) {
+    if (isAuthenticated && hasMatch && matchId) {
       setIsLoadingMessages(true);
-      loadMessagesFromAPI(matchId)
+      loadMessagesFromAPI(matchId, lastMessageIdRef.current > 0)
         .finally(() => {
           setIsLoadingMessages(false);
         });
     }
-  }, [isAuthenticated, match, matchId, loadMessagesFromAPI]);
+  }, [isAuthenticated, hasMatch, matchId, loadMessagesFromAPI]);
+
+  // Fetch new messages and status changes as soon as the server pushes them
+  useEffect(() => {
+    if (!isAuthenticated || !hasMatch || !matchId) return;
+
+    return bcApiService.subscribeToEvents({
+      'message.created': (data) => {
+        if (String(data.match_id) === matchId) {
+          loadNewMessagesFromAPI(matchId, lastMessageIdRef.current);
+        }
+      },
+      'match.status': (data) => {
+        // Reloaded matches come without messages, so fetch those again too
+        if (String(data.match_id) === matchId) {
+          loadMatchesFromAPI().then(() => loadMessagesFromAPI(matchId));
+        }
+      },
+    });
+  }, [isAuthenticated, hasMatch, matchId, loadNewMessagesFromAPI, loadMatchesFromAPI, loadMessagesFromAPI]);
+
+  // Poll for messages newer than the last one shown, in case the stream is down
+  useEffect(() => {
+    if (!isAuthenticated || !hasMatch || !matchId) return;
+
+    const interval = setInterval(() => {
+      loadNewMessagesFromAPI(matchId, lastMessageIdRef.current);
+    }, POLL_INTERVAL_MS);
+    return () => clearInterval(interval);
+  }, [isAuthenticated, hasMatch, matchId, loadNewMessagesFromAPI]);
 
   // Scroll to bottom when messages change
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
-  }, [match?.messages]);
+  }, [messages]);
 
   if (!match || !currentProfile) return null;
 
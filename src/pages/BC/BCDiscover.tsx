@@ -11,6 +11,9 @@ import { BCMatch, BCMemberProfile, BCApplicantProfile } from '../../services/typ
 import { mockBCMembers, mockBCApplicants, shuffleBCProfiles } from '../../data/mockBCProfiles';
 import bcApiService from '../../services/bcApi';
 
+// Prefetch the next deck page when this many cards (or fewer) are left
+const PREFETCH_REMAINING = 5;
+
 export function BCDiscover() {
   const navigate = useNavigate();
   const {
@@ -37,6 +40,11 @@ export function BCDiscover() {
   } = useBC();
 
   const [isSwiping, setIsSwiping] = useState(false);
+  // Cursor for the next deck page: undefined until a page has been fetched here
+  // (swiped cards leave the deck, so the first page then holds unseen ones),
+  // null once the deck is exhausted
+  const [nextCursor, setNextCursor] = useState<string | null | undefined>(undefined);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const availableProfiles = getAvailableProfiles();
   const topProfile = availableProfiles[0];
 
@@ -204,41 +212,65 @@ export function BCDiscover() {
     }
   };
 
+  // Map an API profile to the card shape for the side being viewed
+  const convertProfile = useCallback((p: any): BCMemberProfile | BCApplicantProfile => {
+    if (isApplicant) {
+      // User is applicant, viewing BC members
+      return {
+        id: String(p.user?.id || p.id),  // Use user ID for API swipes
+        name: p.user?.name || '',
+        photoUrl: p.user?.photo?.card || p.user?.photo_url || '/profiles/default.jpg',
+        year: p.year,
+        major: p.major,
+        semestersInBC: p.semesters_in_bc,
+        areasOfExpertise: p.areas_of_expertise || [],
+        availability: p.availability,
+        bio: p.bio,
+        projectExperience: p.project_experience,
+      };
+    }
+    // User is BC member, viewing applicants
+    return {
+      id: String(p.user?.id || p.id),  // Use user ID for API swipes
+      name: p.user?.name || '',
+      photoUrl: p.user?.photo?.card || p.user?.photo_url || '/profiles/default.jpg',
+      role: p.role,
+      whyBC: p.why_bc,
+      relevantExperience: p.relevant_experience,
+      interests: p.interests || [],
+    };
+  }, [isApplicant]);
+
+  // Fetch the following deck page while the last few cards are on screen
+  useEffect(() => {
+    if (!isAuthenticated || nextCursor === null || isLoadingMore) return;
+    if (availableProfiles.length === 0 || availableProfiles.length > PREFETCH_REMAINING) return;
+
+    setIsLoadingMore(true);
+    bcApiService.getDiscoverProfiles({ cursor: nextCursor })
+      .then((discoverResponse) => {
+        const seen = new Set(availableProfiles.map((p) => p.id));
+        const more = (discoverResponse.profiles || [])
+          .map(convertProfile)
+          .filter((p: BCMemberProfile | BCApplicantProfile) => !seen.has(p.id));
+        setProfiles([...availableProfiles, ...more]);
+        setNextCursor(discoverResponse.next_cursor || null);
+      })
+      .catch((error) => {
+        console.error('Failed to load more profiles:', error);
+        setNextCursor(null);
+      })
+      .finally(() => setIsLoadingMore(false));
+  }, [availableProfiles.length, nextCursor, isLoadingMore, isAuthenticated, convertProfile]);
+
   const handleRefresh = async () => {
     if (isAuthenticated) {
       // Fetch fresh profiles from API
       try {
         const discoverResponse = await bcApiService.getDiscoverProfiles();
         const discoverProfiles = discoverResponse.profiles || discoverResponse;
-        const converted = discoverProfiles.map((p: any) => {
-          if (isApplicant) {
-            // User is applicant, viewing BC members
-            return {
-              id: String(p.user?.id || p.id),  // Use user ID for API swipes
-              name: p.user?.name || '',
-              photoUrl: p.user?.photo_url || '/profiles/default.jpg',
-              year: p.year,
-              major: p.major,
-              semestersInBC: p.semesters_in_bc,
-              areasOfExpertise: p.areas_of_expertise || [],
-              availability: p.availability,
-              bio: p.bio,
-              projectExperience: p.project_experience,
-            };
-          } else {
-            // User is BC member, viewing applicants
-            return {
-              id: String(p.user?.id || p.id),  // Use user ID for API swipes
-              name: p.user?.name || '',
-              photoUrl: p.user?.photo_url || '/profiles/default.jpg',
-              role: p.role,
-              whyBC: p.why_bc,
-              relevantExperience: p.relevant_experience,
-              interests: p.interests || [],
-            };
-          }
-        });
-        setProfiles(converted);
+        setProfiles(discoverProfiles.map(convertProfile));
+        setNextCursor(discoverResponse.next_cursor || null);
       } catch (error) {
         console.error('Failed to refresh profiles:', error);
         // Fallback to mock data
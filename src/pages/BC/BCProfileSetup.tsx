@@ -177,7 +177,7 @@ export function BCProfileSetup() {
             setProfiles(discoverProfiles.map((p: any) => ({
               id: String(p.user?.id || p.id),  // Use user ID for API swipes
               name: p.user?.name || '',
-              photoUrl: p.user?.photo_url || '/profiles/default.jpg',
+              photoUrl: p.user?.photo?.card || p.user?.photo_url || '/profiles/default.jpg',
               year: p.year,
               major: p.major,
               semestersInBC: p.semesters_in_bc,
@@ -223,7 +223,7 @@ export function BCProfileSetup() {
             setProfiles(discoverProfiles.map((p: any) => ({
               id: String(p.user?.id || p.id),
               name: p.user?.name || '',
-              photoUrl: p.user?.photo_url || '/profiles/default.jpg',
+              photoUrl: p.user?.photo?.card || p.user?.photo_url || '/profiles/default.jpg',
               role: p.role,
               whyBC: p.why_bc,
               relevantExperience: p.relevant_experience,
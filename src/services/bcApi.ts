@@ -5,6 +5,18 @@ const BC_API_URL = import.meta.env.VITE_API_URL || 'https://api.icelatte.co';
 
 const BC_TOKEN_KEY = 'bc_auth_token';
 
+// Query parameters accepted by the admin list endpoints
+type AdminListParams = {
+  search?: string;
+  ordering?: string;
+  limit?: number;
+  status?: string;
+  role?: string;
+  year?: string;
+  approved?: boolean;
+  matched?: boolean;
+};
+
 class BCAPIService {
   private client: AxiosInstance;
 
@@ -164,8 +176,14 @@ class BCAPIService {
   }
 
   // Discovery endpoints
-  async getDiscoverProfiles() {
-    const response = await this.client.get('/api/discover/');
+  // Returns one page of the deck; pass `next_cursor` back to prefetch the next page
+  async getDiscoverProfiles(params: { cursor?: string | null; limit?: number } = {}) {
+    const response = await this.client.get('/api/discover/', {
+      params: {
+        ...(params.cursor ? { cursor: params.cursor } : {}),
+        ...(params.limit ? { limit: params.limit } : {}),
+      },
+    });
     return response.data;
   }
 
@@ -178,23 +196,55 @@ class BCAPIService {
     return response.data;
   }
 
+  // Submit queued swipes in one request; results come back in the same order
+  async swipeBatch(swipes: { target_id: number; direction: 'like' | 'pass' }[]) {
+    const response = await this.client.post('/api/swipe/batch/', { swipes });
+    return response.data;
+  }
+
   // Match endpoints
   async getMatches() {
     const response = await this.client.get('/api/matches/');
     return response.data;
   }
 
+  // Lightweight list for the matches tab (no chat histories)
+  async getMatchSummaries() {
+    const response = await this.client.get('/api/matches/summary/');
+    return response.data;
+  }
+
   async getMatch(matchId: number) {
     const response = await this.client.get(`/api/matches/${matchId}/`);
     return response.data;
   }
 
   // Message endpoints
-  async getMessages(matchId: number) {
-    const response = await this.client.get(`/api/matches/${matchId}/messages/`);
+  // Pass afterId when polling to fetch only new messages, beforeId to page back through history
+  async getMessages(matchId: number, params: { afterId?: number; beforeId?: number; limit?: number } = {}) {
+    const response = await this.client.get(`/api/matches/${matchId}/messages/`, {
+      params: {
+        ...(params.afterId !== undefined ? { after_id: params.afterId } : {}),
+        ...(params.beforeId !== undefined ? { before_id: params.beforeId } : {}),
+        ...(params.limit ? { limit: params.limit } : {}),
+      },
+    });
     return response.data;
   }
 
+  // Whole conversation, unless it still matches `etag` from an earlier call
+  // (then `messages` is null); the server answers that case with a 304
+  async getMessagesIfChanged(matchId: number, etag?: string | null) {
+    const response = await this.client.get(`/api/matches/${matchId}/messages/`, {
+      headers: etag ? { 'If-None-Match': etag } : {},
+      validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+    });
+    return {
+      messages: response.status === 304 ? null : response.data,
+      etag: (response.headers['etag'] as string | undefined) || null,
+    };
+  }
+
   async sendMessage(matchId: number, content: string) {
     const response = await this.client.post(`/api/matches/${matchId}/messages/`, {
       content,
@@ -207,6 +257,56 @@ class BCAPIService {
     return response.data;
   }
 
+  // Real-time events (message.created, match.status, messages.read) over SSE.
+  // EventSource can't send headers, so the stream is opened with a short-lived
+  // ticket rather than the token (which would end up in server logs).
+  // Returns a function that closes the stream.
+  subscribeToEvents(handlers: Record<string, (data: any) => void>): () => void {
+    if (!this.getToken()) {
+      return () => {};
+    }
+    let source: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | null = null;
+    let closed = false;
+
+    const reconnectLater = (delay: number) => {
+      // Stop for good once logged out
+      if (!closed && this.getToken()) {
+        retry = setTimeout(connect, delay);
+      }
+    };
+
+    const connect = async () => {
+      let ticket: string;
+      try {
+        const response = await this.client.post('/api/events/ticket/');
+        ticket = response.data.ticket;
+      } catch {
+        reconnectLater(30000);
+        return;
+      }
+      if (closed) return;
+      source = new EventSource(`${BC_API_URL}/api/events/?ticket=${encodeURIComponent(ticket)}`);
+      Object.entries(handlers).forEach(([type, handler]) => {
+        source!.addEventListener(type, (event) => handler(JSON.parse((event as MessageEvent).data)));
+      });
+      // The browser reconnects by itself while the ticket is still valid;
+      // once it gives up (the ticket expired), start over with a new one
+      source.onerror = () => {
+        if (source?.readyState === EventSource.CLOSED) {
+          reconnectLater(3000);
+        }
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      if (retry) clearTimeout(retry);
+      source?.close();
+    };
+  }
+
   // Reset profile (logout/switch role)
   async resetProfile() {
     const response = await this.client.post('/api/reset-profile/');
@@ -227,15 +327,28 @@ class BCAPIService {
     return response.data;
   }
 
+  // Recruiting funnel (daily, hourly and per-segment rates) from the rollups
+  async getAdminAnalytics(params: { days?: number; hours?: number } = {}) {
+    const response = await this.client.get('/api/admin/analytics/', { params });
+    return response.data;
+  }
+
+  // Admin lists are paginated: each response holds one page plus a `next`
+  // link (null on the last page) to pass to getAdminNextPage
+  async getAdminNextPage(next: string) {
+    const response = await this.client.get(next);
+    return response.data;
+  }
+
   // Get all BC members (approved and pending)
-  async getAdminAllMembers() {
-    const response = await this.client.get('/api/admin/members/');
+  async getAdminAllMembers(params: AdminListParams = {}) {
+    const response = await this.client.get('/api/admin/members/', { params });
     return response.data;
   }
 
   // Get pending BC member applications
-  async getAdminPendingMembers() {
-    const response = await this.client.get('/api/admin/members/pending/');
+  async getAdminPendingMembers(params: AdminListParams = {}) {
+    const response = await this.client.get('/api/admin/members/pending/', { params });
     return response.data;
   }
 
@@ -247,6 +360,12 @@ class BCAPIService {
     return response.data;
   }
 
+  // Approve several pending BC members in one request
+  async adminBulkApproveMembers(ids: number[]) {
+    const response = await this.client.post('/api/admin/members/bulk-approve/', { ids });
+    return response.data;
+  }
+
   // Create BC member manually
   async adminCreateMember(data: {
     email: string;
@@ -265,14 +384,14 @@ class BCAPIService {
   }
 
   // Get all applicants
-  async getAdminAllApplicants() {
-    const response = await this.client.get('/api/admin/applicants/');
+  async getAdminAllApplicants(params: AdminListParams = {}) {
+    const response = await this.client.get('/api/admin/applicants/', { params });
     return response.data;
   }
 
   // Get all matches
-  async getAdminAllMatches() {
-    const response = await this.client.get('/api/admin/matches/');
+  async getAdminAllMatches(params: AdminListParams = {}) {
+    const response = await this.client.get('/api/admin/matches/', { params });
     return response.data;
   }
 
@@ -284,6 +403,24 @@ class BCAPIService {
     return response.data;
   }
 
+  // Confirm, reject, or complete several matches in one request
+  async adminBulkMatchAction(ids: number[], action: 'confirm' | 'reject' | 'complete') {
+    const response = await this.client.post('/api/admin/matches/bulk/', { ids, action });
+    return response.data;
+  }
+
+  // Best set of pending matches to confirm, given each member's capacity
+  async getAdminMatchSuggestions(params: { capacity?: number; weighting?: 'overlap' | 'none' } = {}) {
+    const response = await this.client.get('/api/admin/matches/suggestions/', { params });
+    return response.data;
+  }
+
+  // Confirm the suggested matches in one request
+  async adminApplyMatchSuggestions(params: { capacity?: number; weighting?: 'overlap' | 'none' } = {}) {
+    const response = await this.client.post('/api/admin/matches/suggestions/', params);
+    return response.data;
+  }
+
   // ==================== BC MEMBER INVITE ====================
 
   // Validate invite code (no auth required)
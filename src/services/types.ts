@@ -184,6 +184,13 @@ export function apiMessageToMessage(apiMessage: APIMessage): Message {
 
 export type BCUserType = 'applicant' | 'bc_member';
 
+// Resized copies of a user's photo (`photo` in API user objects)
+export interface PhotoVariants {
+  thumbnail: string;  // 160x160 square, for avatars and list rows
+  card: string;       // up to 720x960, for discover cards
+  full: string;       // up to 1600px, for full-screen views
+}
+
 // BC Member Profile
 export interface BCMemberProfile {
   id: string;